@@ -0,0 +1,261 @@
+"""
+The module represents AUTHENTICATION classes used in the project.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from ..models import Member
+from ..tenants import current_organization
+from .cache import member_claims
+
+# Columns of a member authentication and permission checks need
+AUTH_FIELDS = ('id', 'organization_id', 'is_active', 'is_manager', 'position')
+
+
+class AuthenticatedMember:
+    """
+    The member an access token was issued for, holding only `AUTH_FIELDS`.
+
+    Any other attribute loads the whole `Member` on first access
+    (a single query), so views that need more of the member still work.
+    Compares equal to the `Member` with the same primary key.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, row: dict):
+        self.__dict__.update(row)
+        self.pk = row['id']
+
+    @cached_property
+    def member(self) -> Member:
+        """
+        The whole member, loaded on first access.
+        """
+        return Member._base_manager.get(pk=self.pk)
+
+    def __getattr__(self, name):
+        # Only called for attributes not in `AUTH_FIELDS`
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.member, name)
+
+    def __eq__(self, other):
+        if isinstance(other, (Member, AuthenticatedMember)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return str(self.member)
+
+
+class MemberAuthCache:
+    """
+    Process-local cache of `AUTH_FIELDS` of members keyed by member id.
+
+    An entry is used while it is younger than `TTL` seconds and stored
+    under the current permission claims version of the member
+    (see `member_claims`), which is bumped whenever the member is saved
+    or deleted (see `api.signals`), so a changed or deactivated member
+    is loaded again on the next request in every process. Like
+    `BlacklistFilter`, cross-process invalidation relies on a cache backend
+    shared by all processes; with a process-local backend staleness
+    is bounded by `TTL`.
+
+    Configured by `MEMBER_AUTH_CACHE` setting.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    @property
+    def config(self) -> dict:
+        return settings.MEMBER_AUTH_CACHE
+
+    def lookup(self, pk) -> tuple:
+        """
+        Returns the current version of the member and its cached row,
+        None if the row is missing, expired or stale.
+        """
+        version = member_claims.versions([pk])[pk]
+        return version, self.cached(pk, version)
+
+    async def alookup(self, pk) -> tuple:
+        """
+        Async counterpart of `lookup()`.
+        """
+        version = (await member_claims.aversions([pk]))[pk]
+        return version, self.cached(pk, version)
+
+    def cached(self, pk, version):
+        """
+        Returns the cached row of the member if it is current, None otherwise.
+        """
+        entry = self.entries.get(pk)
+        if entry is not None and entry[0] == version and entry[1] > time.monotonic():
+            return entry[2]
+        return None
+
+    def store(self, pk, version, row):
+        """
+        Stores the row of the member under the version,
+        evicting the oldest entries beyond `MAX_SIZE`.
+        """
+        with self.lock:
+            self.entries[pk] = (version, time.monotonic() + self.config['TTL'], row)
+            self.entries.move_to_end(pk)
+            while len(self.entries) > self.config['MAX_SIZE']:
+                self.entries.popitem(last=False)
+
+    def get(self, pk, load):
+        """
+        Returns the row of the member, loading a cache miss with `load`.
+
+        :param pk: Primary key of the member.
+        :param load: A callable taking the primary key and returning the row, None if there is none.
+        """
+        if not self.config['ENABLED']:
+            return load(pk)
+        version, row = self.lookup(pk)
+        if row is None and (row := load(pk)) is not None:
+            self.store(pk, version, row)
+        return row
+
+    async def aget(self, pk, load):
+        """
+        Async counterpart of `get()`, `load` is awaited.
+        """
+        if not self.config['ENABLED']:
+            return await load(pk)
+        version, row = await self.alookup(pk)
+        if row is None and (row := await load(pk)) is not None:
+            self.store(pk, version, row)
+        return row
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+member_auth_cache = MemberAuthCache()
+
+
+def auth_rows():
+    """
+    Returns a queryset of `AUTH_FIELDS` of members of all organizations.
+    """
+    return Member._base_manager.values(*AUTH_FIELDS)
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication usable by both sync and async views.
+
+    Sync views call `authenticate()` as usual, async views
+    (see `AsyncReadMixin`) await `aauthenticate()`, which validates
+    the token the same way (without I/O) and loads the member
+    with the async ORM.
+
+    The member is an `AuthenticatedMember` loaded with only the columns
+    authentication and permissions need, and is served from
+    `member_auth_cache` for subsequent requests, so authentication
+    takes at most one query and usually none.
+
+    Requests not scoped to an organization by `TenantMiddleware`
+    are scoped to the organization of the authenticated member.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            self.bind_organization(request, result[0])
+        return result
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        user = await self.aget_user(validated_token)
+        self.bind_organization(request, user)
+        return user, validated_token
+
+    @staticmethod
+    def bind_organization(request, user):
+        """
+        Scopes the request to the organization of the member,
+        unless `TenantMiddleware` has resolved the organization of the request
+        (the member is then looked up in it).
+
+        The scope is reset by the middleware at the end of the request.
+        """
+        django_request = request._request
+        # Set to None by the middleware if the request names no organization
+        if hasattr(django_request, 'organization_id') and django_request.organization_id is None:
+            django_request.organization_id = user.organization_id
+            current_organization.set(user.organization_id)
+
+    def get_user(self, validated_token):
+        """
+        Returns the member the token was issued for.
+
+        :param validated_token: The validated access token.
+        :return: An `AuthenticatedMember`.
+        """
+        user_id = self.user_id(validated_token)
+        row = member_auth_cache.get(user_id, lambda pk: auth_rows().filter(pk=pk).first())
+        return self.check_user(row, validated_token)
+
+    async def aget_user(self, validated_token):
+        """
+        Async counterpart of `get_user()`.
+        """
+        user_id = self.user_id(validated_token)
+        row = await member_auth_cache.aget(user_id, lambda pk: auth_rows().filter(pk=pk).afirst())
+        return self.check_user(row, validated_token)
+
+    @staticmethod
+    def user_id(validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+    @staticmethod
+    def check_user(row, validated_token) -> AuthenticatedMember:
+        """
+        Checks that the member exists in the organization of the request
+        (if it is resolved) and is active.
+        """
+        organization_id = current_organization.get()
+        if row is None or (organization_id is not None and row['organization_id'] != organization_id):
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if not row['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        user = AuthenticatedMember(row)
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        return user
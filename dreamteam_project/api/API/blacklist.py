@@ -0,0 +1,213 @@
+"""
+The module represents the in-memory TOKEN BLACKLIST FILTER used in the project.
+
+The filter answers "definitely not blacklisted" for the vast majority
+of refresh requests without a database query; only JTIs that may be
+blacklisted are checked against the `BlacklistedToken` table.
+"""
+
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+
+class BloomFilter:
+    """
+    Compact probabilistic set of strings.
+
+    Membership test never gives false negatives and gives false positives
+    with a probability close to `error_rate` while no more than `capacity`
+    items are added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item: str):
+        """
+        Yields bit positions of the item (double hashing of a single digest).
+        """
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, item: str):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(item))
+
+
+class BlacklistFilter:
+    """
+    Process-local Bloom filter of JTIs of blacklisted, unexpired tokens.
+
+    The filter is rebuilt from the database every `TTL` seconds, which also
+    evicts JTIs of expired tokens. Blacklisting in any process bumps
+    a generation counter in the shared cache; a process that sees a new
+    generation loads only the blacklist entries added since its last load.
+    Cross-process invalidation therefore relies on a cache backend
+    shared by all processes (e.g. Redis or Memcached), the filter cannot be
+    enabled with a process-local one (see `check()`). While the generation
+    cannot be read from the cache, every token is checked in the database.
+
+    Configured by `TOKEN_BLACKLIST_FILTER` setting.
+    """
+    generation_key = 'token-blacklist:generation'
+
+    # Cache backends not shared between processes
+    local_backends = (LocMemCache, DummyCache)
+
+    # Entries loaded again on every incremental load: concurrent transactions
+    # may commit blacklist entries out of primary key order.
+    reload_overlap = 1000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.built_at = 0.0
+        self.last_id = 0
+        self.generation = None
+
+    @property
+    def config(self) -> dict:
+        return settings.TOKEN_BLACKLIST_FILTER
+
+    @property
+    def enabled(self) -> bool:
+        return self.config['ENABLED']
+
+    @property
+    def cache(self):
+        return caches[self.config['CACHE_ALIAS']]
+
+    def check(self):
+        """
+        Refuses to enable the filter with a cache backend
+        not shared by all server processes.
+
+        :raises ImproperlyConfigured: If the cache backend is process-local.
+        """
+        if self.enabled and isinstance(self.cache, self.local_backends):
+            raise ImproperlyConfigured(
+                f'TOKEN_BLACKLIST_FILTER needs a cache shared by all server processes, '
+                f'"{self.config["CACHE_ALIAS"]}" cache is {type(self.cache).__name__}.'
+            )
+
+    def might_contain(self, jti: str) -> bool:
+        """
+        Checks whether the token with the JTI may be blacklisted.
+
+        :param jti: JTI of the token.
+        :return: False if the token is definitely not blacklisted.
+        """
+        generation = self.shared_generation()
+        if generation is None:
+            # Tokens blacklisted by other processes may be missed
+            return True
+        with self.lock:
+            self.sync(generation)
+            return jti in self.bloom
+
+    def shared_generation(self):
+        """
+        Returns the generation counter from the shared cache,
+        starting it if the cache has lost it.
+
+        :return: The generation, None if the cache is not available.
+        """
+        try:
+            generation = self.cache.get(self.generation_key)
+            if generation is None:
+                self.cache.add(self.generation_key, time.time_ns(), timeout=None)
+                generation = self.cache.get(self.generation_key)
+        except Exception:  # Errors of the cache backend, e.g. an unreachable Redis
+            return None
+        return generation
+
+    def add(self, jti: str):
+        """
+        Adds the JTI of a just blacklisted token
+        and notifies other processes after commit.
+        """
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+        transaction.on_commit(self.notify)
+
+    def invalidate(self):
+        """
+        Notifies all processes (including this one) after commit
+        that tokens have been blacklisted by a bulk operation.
+        """
+        transaction.on_commit(lambda: self.notify(reload=True))
+
+    def notify(self, reload=False):
+        """
+        Bumps the shared generation counter.
+
+        :param reload: Whether this process must also load new entries,
+            otherwise it is considered up to date if nobody else
+            has bumped the generation since its last load.
+        """
+        try:
+            generation = self.cache.incr(self.generation_key)
+        except ValueError:
+            self.cache.add(self.generation_key, time.time_ns(), timeout=None)
+            generation = None
+        with self.lock:
+            if not reload and generation is not None and generation - 1 == self.generation:
+                self.generation = generation
+
+    def sync(self, generation):
+        """
+        Rebuilds the filter if its TTL has expired,
+        or loads new entries if the generation has changed.
+        """
+        if self.bloom is None or time.monotonic() - self.built_at > self.config['TTL']:
+            self.rebuild(generation)
+        elif generation != self.generation:
+            self.load(generation)
+
+    def rebuild(self, generation):
+        entries = list(
+            BlacklistedToken.objects.filter(
+                token__expires_at__gt=timezone.now()
+            ).values_list('id', 'token__jti')
+        )
+        # Leave room for tokens blacklisted until the next rebuild.
+        self.bloom = BloomFilter(2 * len(entries) + 1024, self.config['ERROR_RATE'])
+        self.built_at = time.monotonic()
+        self.last_id = 0
+        self.add_entries(entries, generation)
+
+    def load(self, generation):
+        entries = BlacklistedToken.objects.filter(
+            id__gt=self.last_id - self.reload_overlap
+        ).values_list('id', 'token__jti')
+        self.add_entries(entries, generation)
+
+    def add_entries(self, entries, generation):
+        for entry_id, jti in entries:
+            self.bloom.add(jti)
+            self.last_id = max(self.last_id, entry_id)
+        self.generation = generation
+
+
+blacklist_filter = BlacklistFilter()
@@ -0,0 +1,284 @@
+"""
+The module represents CACHE utilities used in the project.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class VersionedCache:
+    """
+    Read-through cache of serialized payloads keyed by object id
+    and a per-object version counter.
+
+    Readers look up the current version of every requested object
+    and then the payloads stored under `<prefix>:<id>:<version>`.
+    Bumping the version of an object makes its old payload unreachable,
+    so writers never delete payloads and readers never see a stale one.
+
+    The cache alias and payload timeout are taken from the settings
+    dictionary named by `setting`, which allows any Django cache backend
+    to be plugged in (locmem is used by default and in tests).
+    """
+
+    def __init__(self, prefix: str, setting: str):
+        self.prefix = prefix
+        self.setting = setting
+
+    @property
+    def cache(self):
+        """
+        The Django cache backend the payloads are stored in.
+        """
+        return caches[getattr(settings, self.setting)['ALIAS']]
+
+    @property
+    def timeout(self):
+        """
+        Time in seconds for which a payload is kept in the cache.
+        """
+        return getattr(settings, self.setting)['TIMEOUT']
+
+    def version_key(self, pk) -> str:
+        return f'{self.prefix}:{pk}:version'
+
+    def payload_key(self, pk, version) -> str:
+        return f'{self.prefix}:{pk}:{version}'
+
+    def versions(self, pks) -> dict:
+        """
+        Returns current versions of the objects, initializing missing ones.
+
+        A missing counter (never set or evicted) is seeded with the current
+        time in nanoseconds, so it is always ahead of any version
+        the payloads may still be stored under.
+
+        :param pks: Primary keys of the objects.
+        :return: A dictionary mapping primary keys to versions.
+        """
+        keys = {self.version_key(pk): pk for pk in pks}
+        found = self.cache.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        for key in missing:
+            self.cache.add(key, time.time_ns(), timeout=None)
+        if missing:
+            found.update(self.cache.get_many(missing))
+        return {pk: found[key] for key, pk in keys.items()}
+
+    async def aversions(self, pks) -> dict:
+        """
+        Async counterpart of `versions()`, using the async cache API.
+        """
+        keys = {self.version_key(pk): pk for pk in pks}
+        found = await self.cache.aget_many(keys)
+        missing = [key for key in keys if key not in found]
+        for key in missing:
+            await self.cache.aadd(key, time.time_ns(), timeout=None)
+        if missing:
+            found.update(await self.cache.aget_many(missing))
+        return {pk: found[key] for key, pk in keys.items()}
+
+    def bump(self, pks):
+        """
+        Increments versions of the objects, invalidating their payloads.
+
+        :param pks: Primary keys of the changed objects.
+        """
+        for pk in set(pks):
+            key = self.version_key(pk)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.add(key, time.time_ns(), timeout=None)
+
+    def get_many(self, pks, load) -> dict:
+        """
+        Returns payloads of the objects, loading cache misses with `load`.
+
+        :param pks: Primary keys of the objects.
+        :param load: A callable taking a list of primary keys
+            and returning a dictionary mapping them to payloads.
+        :return: A dictionary mapping primary keys to payloads.
+        """
+        versions, payloads, missing = self.lookup(pks)
+        if missing:
+            payloads.update(self.store(versions, load(missing)))
+        return payloads
+
+    async def aget_many(self, pks, load) -> dict:
+        """
+        Async counterpart of `get_many()`, `load` is awaited.
+        """
+        versions, payloads, missing = await self.alookup(pks)
+        if missing:
+            payloads.update(await self.astore(versions, await load(missing)))
+        return payloads
+
+    def lookup(self, pks) -> tuple:
+        """
+        Returns current versions of the objects, payloads found in the cache
+        and primary keys of the missing ones, counting hits and misses.
+        """
+        versions = self.versions(pks)
+        keys = {self.payload_key(pk, version): pk for pk, version in versions.items()}
+        found = self.cache.get_many(keys)
+        payloads = {keys[key]: payload for key, payload in found.items()}
+        missing = [pk for pk in versions if pk not in payloads]
+
+        self.count('hits', len(found))
+        self.count('misses', len(missing))
+        return versions, payloads, missing
+
+    async def alookup(self, pks) -> tuple:
+        """
+        Async counterpart of `lookup()`.
+        """
+        versions = await self.aversions(pks)
+        keys = {self.payload_key(pk, version): pk for pk, version in versions.items()}
+        found = await self.cache.aget_many(keys)
+        payloads = {keys[key]: payload for key, payload in found.items()}
+        missing = [pk for pk in versions if pk not in payloads]
+
+        await self.acount('hits', len(found))
+        await self.acount('misses', len(missing))
+        return versions, payloads, missing
+
+    def store(self, versions, loaded) -> dict:
+        """
+        Stores loaded payloads under the current versions and returns them.
+        """
+        self.cache.set_many(
+            {self.payload_key(pk, versions[pk]): payload for pk, payload in loaded.items()},
+            timeout=self.timeout
+        )
+        return loaded
+
+    async def astore(self, versions, loaded) -> dict:
+        """
+        Async counterpart of `store()`.
+        """
+        await self.cache.aset_many(
+            {self.payload_key(pk, versions[pk]): payload for pk, payload in loaded.items()},
+            timeout=self.timeout
+        )
+        return loaded
+
+    def get(self, pk, load):
+        """
+        Returns the payload of a single object, see `get_many()`.
+        """
+        return self.get_many([pk], load)[pk]
+
+    def count(self, counter: str, value: int):
+        """
+        Adds `value` to the hit or miss counter.
+        """
+        if not value:
+            return
+        key = f'{self.prefix}:{counter}'
+        try:
+            self.cache.incr(key, value)
+        except ValueError:
+            if not self.cache.add(key, value, timeout=None):
+                self.cache.incr(key, value)
+
+    async def acount(self, counter: str, value: int):
+        """
+        Async counterpart of `count()`.
+        """
+        if not value:
+            return
+        key = f'{self.prefix}:{counter}'
+        try:
+            await self.cache.aincr(key, value)
+        except ValueError:
+            if not await self.cache.aadd(key, value, timeout=None):
+                await self.cache.aincr(key, value)
+
+    def stats(self) -> dict:
+        """
+        Returns hit and miss counters of the cache.
+        """
+        counters = ('hits', 'misses')
+        found = self.cache.get_many([f'{self.prefix}:{counter}' for counter in counters])
+        return {counter: found.get(f'{self.prefix}:{counter}', 0) for counter in counters}
+
+
+class ChangeMarkers(VersionedCache):
+    """
+    Version counters and modification times of whole tables.
+
+    Versions of the tables a representation is built from make
+    a cheap change marker for conditional requests: it is read from
+    the cache, not the database, and changes whenever any of the tables
+    is written to (see `api.signals`).
+
+    Tables are versioned per organization (see `table_keys()`),
+    so writes of one organization do not invalidate representations
+    of the others.
+    """
+
+    @staticmethod
+    def table_keys(models, organization_id=None) -> list:
+        """
+        Returns names the tables of the models are versioned under
+        in the organization, or across organizations for `None`.
+        """
+        scope = 'all' if organization_id is None else organization_id
+        return [f'{model._meta.db_table}@{scope}' for model in models]
+
+    def modified_key(self, table) -> str:
+        return f'{self.prefix}:{table}:modified'
+
+    def bump(self, tables):
+        """
+        Increments versions of the tables and sets their modification time.
+
+        :param tables: Names of the changed tables.
+        """
+        super().bump(tables)
+        now = time.time()
+        self.cache.set_many({self.modified_key(table): now for table in tables}, timeout=None)
+
+    def markers(self, tables) -> tuple:
+        """
+        Returns current versions of the tables and their last modification time.
+
+        A missing modification time is seeded with the current time.
+
+        :param tables: Names of the tables.
+        :return: A (versions, last modification timestamp) pair.
+        """
+        versions = self.versions(tables)
+        keys = [self.modified_key(table) for table in tables]
+        found = self.cache.get_many(keys)
+        for key in keys:
+            if key not in found:
+                self.cache.add(key, time.time(), timeout=None)
+                found[key] = self.cache.get(key)
+        return versions, max(found.values())
+
+    async def amarkers(self, tables) -> tuple:
+        """
+        Async counterpart of `markers()`.
+        """
+        versions = await self.aversions(tables)
+        keys = [self.modified_key(table) for table in tables]
+        found = await self.cache.aget_many(keys)
+        for key in keys:
+            if key not in found:
+                await self.cache.aadd(key, time.time(), timeout=None)
+                found[key] = await self.cache.aget(key)
+        return versions, max(found.values())
+
+
+# Serialized `TeamViewSerializer` payloads keyed by team id
+team_rosters = VersionedCache('team-roster', setting='TEAM_ROSTER_CACHE')
+
+# Versions of permission claims of access tokens keyed by member id
+member_claims = VersionedCache('member-claims', setting='TOKEN_PERMISSION_CLAIMS')
+
+# Versions of tables keyed by table name, for conditional requests
+table_versions = ChangeMarkers('table', setting='CHANGE_MARKERS')
@@ -0,0 +1,106 @@
+"""
+The module represents the streaming EXPORT of the organization directory
+used in the project.
+
+Members, teams and memberships are read with server-side cursors
+(`QuerySet.iterator()`) and encoded chunk by chunk, so memory use
+does not depend on the size of the organization.
+Under ASGI the chunks are streamed by an async iterator (see `async_chunks()`).
+"""
+
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from ..models import Member, Team, TeamMembership
+from ..tenants import scoped
+from .renderers import FastJSONRenderer
+
+# Exported sections: (name, record type, model, columns)
+SECTIONS = (
+    (
+        'members', 'member', Member,
+        ('id', 'username', 'first_name', 'last_name', 'email', 'position', 'is_manager', 'is_active'),
+    ),
+    ('teams', 'team', Team, ('id', 'name')),
+    ('memberships', 'membership', TeamMembership, ('id', 'member_id', 'team_id', 'date_joined')),
+)
+
+DEFAULT_CHUNK_SIZE = 2000
+
+encode = FastJSONRenderer().render
+
+
+def section_rows(model, columns, chunk_size, organization_id):
+    """
+    Yields lists of up to `chunk_size` rows of the section, ordered by ID.
+    """
+    # Rows are read while the response is streamed, after the request
+    # is no longer scoped, so the organization is filtered explicitly.
+    queryset = scoped(model.objects.all(), organization_id)
+    rows = queryset.order_by('pk').values(*columns).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+def ndjson_chunks(chunk_size=DEFAULT_CHUNK_SIZE, organization_id=None):
+    """
+    Yields the export as newline delimited JSON, one record per line;
+    every record has a `type` key (`member`, `team` or `membership`).
+
+    :param chunk_size: Number of rows fetched and encoded at once.
+    :param organization_id: The exported organization, all organizations by default.
+    :return: A generator of bytes.
+    """
+    for _, record_type, model, columns in SECTIONS:
+        for rows in section_rows(model, columns, chunk_size, organization_id):
+            yield b''.join(encode({'type': record_type, **row}) + b'\n' for row in rows)
+
+
+def json_chunks(chunk_size=DEFAULT_CHUNK_SIZE, organization_id=None):
+    """
+    Yields the export as a single JSON object
+    with `members`, `teams` and `memberships` lists.
+
+    :param chunk_size: Number of rows fetched and encoded at once.
+    :param organization_id: The exported organization, all organizations by default.
+    :return: A generator of bytes.
+    """
+    separator = b'{'
+    for name, _, model, columns in SECTIONS:
+        yield separator + encode(name) + b':['
+        first = True
+        for rows in section_rows(model, columns, chunk_size, organization_id):
+            chunk = b','.join(encode(row) for row in rows)
+            yield chunk if first else b',' + chunk
+            first = False
+        yield b']'
+        separator = b','
+    yield b'}'
+
+
+async def async_chunks(chunks):
+    """
+    Yields chunks of a stream of the export asynchronously,
+    every chunk is read and encoded in a thread.
+
+    Under ASGI Django consumes sync iterators of streaming responses
+    as a whole before sending them, async iterators chunk by chunk.
+
+    :param chunks: A generator of bytes, e.g. of `ndjson_chunks()`.
+    :return: An async generator of bytes.
+    """
+    read = sync_to_async(next)
+    try:
+        while (chunk := await read(chunks, None)) is not None:
+            yield chunk
+    finally:
+        # Closes the server-side cursor if the client has gone away
+        await sync_to_async(chunks.close)()
+
+
+# Streams of the export keyed by format
+FORMATS = {
+    'ndjson': ndjson_chunks,
+    'json': json_chunks,
+}
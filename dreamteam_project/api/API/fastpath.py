@@ -0,0 +1,119 @@
+"""
+The module represents the FAST-PATH (read-only) serialization used in the project.
+
+Representations are built straight from `.values()` rows instead of
+model instances and `ModelSerializer.to_representation()`, with the output
+of `MembersViewSerializer` and `TeamViewSerializer` respectively
+(checked by the view tests comparing responses with these serializers).
+
+Enabled by `FAST_SERIALIZATION` setting.
+"""
+
+from collections import defaultdict
+from operator import itemgetter
+
+from django.conf import settings
+from rest_framework import serializers
+
+from ..models import Team, TeamMembership
+from .serializers import MemberInTeamSerializer
+
+
+def fast_serialization_enabled() -> bool:
+    return settings.FAST_SERIALIZATION['ENABLED']
+
+
+class MemberValuesSerializer:
+    """
+    Fast-path equivalent of `MembersViewSerializer` for member lists.
+    """
+    columns = ('id', 'username', 'first_name', 'last_name', 'position', 'email')
+    row = itemgetter(*columns)
+
+    def values(self, queryset):
+        """
+        Returns rows of the member queryset, keeping its annotations
+        (e.g. the search rank results are paginated by).
+        """
+        return queryset.prefetch_related(None).values(*self.columns, *queryset.query.annotations)
+
+    def serialize(self, rows) -> list:
+        """
+        Serializes member rows, fetching their teams with a single query.
+
+        :param rows: Rows returned by `values()`.
+        :return: A list of serialized members.
+        """
+        rows = list(rows)
+        return self.build(rows, self.memberships(rows))
+
+    async def aserialize(self, rows) -> list:
+        """
+        Async counterpart of `serialize()` for rows fetched by an async view.
+        """
+        # `aiterator()` of `values_list()` querysets fails in Django 4.2,
+        # rows are fetched at once by `async for` instead.
+        return self.build(rows, [membership async for membership in self.memberships(rows)])
+
+    @staticmethod
+    def memberships(rows):
+        return TeamMembership.objects.filter(
+            member_id__in=[row['id'] for row in rows]
+        ).order_by('pk').values_list('member_id', 'id', 'team__name')
+
+    def build(self, rows, memberships) -> list:
+        teams = defaultdict(list)
+        for member_id, membership_id, team_name in memberships:
+            teams[member_id].append({'id': membership_id, 'team': team_name})
+
+        columns, row = self.columns, self.row
+        return [{**dict(zip(columns, row(values))), 'teams': teams[values['id']]} for values in rows]
+
+
+class TeamValuesSerializer:
+    """
+    Fast-path equivalent of `TeamViewSerializer` for team rosters.
+    """
+    member_columns = MemberInTeamSerializer.Meta.fields
+    date_joined = serializers.DateField().to_representation
+
+    def serialize(self, team_ids) -> dict:
+        """
+        Serializes rosters of the teams with two queries.
+
+        :param team_ids: IDs of the teams to serialize.
+        :return: A dictionary mapping team IDs to serialized teams.
+        """
+        teams = self.teams(self.team_rows(team_ids))
+        return self.add_members(teams, self.memberships(teams))
+
+    async def aserialize(self, team_ids) -> dict:
+        """
+        Async counterpart of `serialize()`.
+        """
+        teams = self.teams([row async for row in self.team_rows(team_ids)])
+        return self.add_members(teams, [row async for row in self.memberships(teams)])
+
+    @staticmethod
+    def team_rows(team_ids):
+        return Team.objects.filter(pk__in=team_ids).values_list('id', 'name')
+
+    @staticmethod
+    def teams(rows) -> dict:
+        return {team_id: {'id': team_id, 'name': name, 'members': []} for team_id, name in rows}
+
+    def memberships(self, teams):
+        # Ordered by team first to read rosters from `team_memberships_team_idx`
+        return TeamMembership.objects.filter(team_id__in=teams).order_by('team_id', 'pk').values_list(
+            'team_id', 'id', 'date_joined', *(f'member__{column}' for column in self.member_columns)
+        )
+
+    def add_members(self, teams, memberships) -> dict:
+        member_columns, date_joined = self.member_columns, self.date_joined
+        for team_id, membership_id, joined, *member in memberships:
+            teams[team_id]['members'].append({
+                'id': membership_id,
+                'date_joined': date_joined(joined),
+                'member': dict(zip(member_columns, member)),
+            })
+        return teams
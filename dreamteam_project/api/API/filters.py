@@ -0,0 +1,81 @@
+"""
+The module represents FILTER backends used in the project.
+"""
+
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+from ..search import fts_table
+
+
+class IndexedSearchFilter(SearchFilter):
+    """
+    Search filter over the indexed `search_text` column (see `api.search`).
+
+    Every search term must match, as a word prefix or substring
+    on PostgreSQL, where misspelled terms also match by trigram
+    word similarity, and as a word prefix on SQLite.
+
+    Matches are annotated with `search_rank` (the sum over terms of:
+    3 — the text starts with the term, 2 — a word starts with it,
+    1 — it occurs inside a word, 0 — a fuzzy match), which pagination
+    orders results by before the usual key (see `KeysetPagination`).
+
+    `search_fields` of the view are only used to document the endpoint.
+    """
+    rank_annotation = 'search_rank'
+
+    def get_search_terms(self, request) -> list:
+        return [term.lower() for term in super().get_search_terms(request)]
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        vendor = connections[queryset.db].vendor
+        if vendor == 'postgresql':
+            for term in terms:
+                queryset = queryset.filter(
+                    Q(search_text__contains=term) | Q(search_text__trigram_word_similar=term)
+                )
+        elif vendor == 'sqlite':
+            table = fts_table(queryset.model._meta.db_table)
+            queryset = queryset.filter(pk__in=RawSQL(
+                f'SELECT rowid FROM {table} WHERE {table} MATCH %s',
+                [self.fts_query(terms)],
+            ))
+        else:
+            for term in terms:
+                queryset = queryset.filter(search_text__contains=term)
+
+        return queryset.annotate(**{self.rank_annotation: self.rank(terms)})
+
+    @staticmethod
+    def fts_query(terms) -> str:
+        """
+        Returns an FTS5 query matching rows containing all the word prefixes.
+        """
+        return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+    @staticmethod
+    def rank(terms):
+        """
+        Returns the expression ranking matched rows, see the class docstring.
+        """
+        ranks = [
+            Case(
+                When(search_text__startswith=term, then=Value(3)),
+                When(search_text__contains=f' {term}', then=Value(2)),
+                When(search_text__contains=term, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            for term in terms
+        ]
+        rank = ranks[0]
+        for term_rank in ranks[1:]:
+            rank = rank + term_rank
+        return rank
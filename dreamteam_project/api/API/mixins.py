@@ -2,26 +2,413 @@
 The module represents CUSTOM MIXIN class used in the project.
 """
 
-from ..models import Member
+import hashlib
+from inspect import isawaitable
 
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Prefetch
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
 
-class MemberMixin:
+from ..db.routers import read_alias, read_from_replica
+from ..models import Member, Team, TeamMembership
+from ..tenants import current_organization
+from .cache import table_versions
+from .fastpath import MemberValuesSerializer, fast_serialization_enabled
+
+
+class ConditionalGetMixin:
+    """
+    Mixin for views answering conditional GET requests
+    with `304 Not Modified`, see `not_modified()`.
+
+    The strong `ETag` is a digest of the request URL, the response format
+    and versions of the tables of `change_models` in the organization
+    of the request, `Last-Modified` is the last modification time
+    of these tables (see `ChangeMarkers`).
+    Both are read from the cache, so a matching request is answered
+    after authentication and permission checks without querying the
+    database (except the object lookup of `retrieve`) or serializing.
+    Responses read from a replica are sent without the markers,
+    see `not_modified()`.
+    """
+    change_models = ()
+
+    _change_markers = None
+
+    def get_change_markers(self) -> tuple:
+        """
+        Returns the ETag and Last-Modified timestamp of the response.
+        """
+        tables = self.change_tables()
+        return self.make_change_markers(tables, *table_versions.markers(tables))
+
+    async def aget_change_markers(self) -> tuple:
+        """
+        Async counterpart of `get_change_markers()`, reading the cache with the async API.
+        """
+        tables = self.change_tables()
+        return self.make_change_markers(tables, *await table_versions.amarkers(tables))
+
+    def change_tables(self) -> list:
+        return table_versions.table_keys(self.change_models, current_organization.get())
+
+    def make_change_markers(self, tables, versions, last_modified) -> tuple:
+        key = '|'.join([
+            self.request.build_absolute_uri(),
+            self.request.accepted_renderer.format,
+            *(f'{table}:{versions[table]}' for table in tables),
+        ])
+        return f'"{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}"', int(last_modified)
+
+    def not_modified(self, request):
+        """
+        Returns `304 Not Modified` response if the client's copy is current.
+
+        Called by read actions before any query of their own
+        (`retrieve` after the object lookup, which checks permissions),
+        the response markers are added by `finalize_response()`.
+
+        Table versions are bumped when the primary database commits,
+        so the markers describe its rows; a lagging replica may still serve
+        older ones, which clients must not cache under the markers.
+        A response read from a replica is therefore sent without them.
+        """
+        self._change_markers = self.get_change_markers()
+        return self.conditional_response(request)
+
+    async def anot_modified(self, request):
+        """
+        Async counterpart of `not_modified()`.
+        """
+        self._change_markers = await self.aget_change_markers()
+        return self.conditional_response(request)
+
+    def conditional_response(self, request):
+        etag, last_modified = self._change_markers
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None and read_alias.get() is not None:
+            self._change_markers = None
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self._change_markers is not None and response.status_code in (200, 304):
+            etag, last_modified = self._change_markers
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    Mixin for views reading from a replica database in `replica_actions`
+    (see `ReplicaRouter`), other actions read from the primary database.
+
+    The replica is chosen when the request is initialized, so the member
+    is authenticated from it too, and released when the response is finalized.
+    With `ConditionalGetMixin` the replica serves `304 Not Modified`
+    responses too, other responses read from it carry no change markers.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    _replica_token = None
+
+    def initialize_request(self, request, *args, **kwargs):
+        request = super().initialize_request(request, *args, **kwargs)
+        if getattr(self, 'action', None) in self.replica_actions:
+            self._replica_token = read_from_replica()
+        return request
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Released after the mixins that follow have finalized the response
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self._replica_token is not None:
+            read_alias.reset(self._replica_token)
+            self._replica_token = None
+        return response
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin for views supporting sparse fieldsets in GET requests.
+
+    — `?fields=id,username` renders only the listed fields;
+    — `?expand=teams` renders the listed nested fields in full,
+        other nested fields are rendered as lists of IDs.
+
+    Without both parameters every field is rendered in full.
+    Views use `is_selected()` and `is_expanded()` to load only
+    what is rendered, the serializer must support `fields` and `expand`
+    arguments (see `SparseFieldsetSerializer`).
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    _fieldset = None
+
+    def get_fieldset(self) -> tuple:
+        """
+        Returns fields and expanded fields requested, validated
+        against the serializer (`None` stands for all fields).
+        """
+        if self._fieldset is None:
+            self._fieldset = (None, None)
+            if self.request.method == 'GET':
+                serializer_class = self.get_serializer_class()
+                fields = self.parse(self.fields_query_param, serializer_class.Meta.fields)
+                expand = self.parse(self.expand_query_param, serializer_class.compact_fields)
+                if fields is not None or expand is not None:
+                    self._fieldset = (fields, expand or set())
+        return self._fieldset
+
+    def parse(self, param, allowed):
+        value = self.request.query_params.get(param)
+        if value is None:
+            return None
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        if unknown := names - set(allowed):
+            raise ValidationError({param: _('Unknown fields: ') + ', '.join(sorted(unknown))})
+        return names
+
+    def is_selected(self, field) -> bool:
+        fields = self.get_fieldset()[0]
+        return fields is None or field in fields
+
+    def is_expanded(self, field) -> bool:
+        expand = self.get_fieldset()[1]
+        return self.is_selected(field) and (expand is None or field in expand)
+
+    def get_serializer(self, *args, **kwargs):
+        fields, expand = self.get_fieldset()
+        if expand is not None:
+            kwargs.update(fields=fields, expand=expand)
+        return super().get_serializer(*args, **kwargs)
+
+
+class AsyncReadMixin:
+    """
+    Mixin for views serving read requests asynchronously (under ASGI).
+
+    GET and HEAD requests are authenticated with `aauthenticate()`
+    of the authentication classes (see `AsyncJWTAuthentication`) and
+    checked with `ahas_permission()`/`ahas_object_permission()` of the
+    permission classes, the handler of the action is awaited if it is
+    a coroutine and objects are loaded with `aget_object()` and `apaginate_queryset()`.
+    Other requests are handled by the regular (sync) view in a thread.
+
+    Handlers must not query the database or the cache synchronously,
+    the same goes for authentication and permission classes without
+    async counterparts of their checks.
+    """
+    async_methods = ('GET', 'HEAD')
+
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        return markcoroutinefunction(super().as_view(*args, **initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in self.async_methods:
+            return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            response = handler(request, *args, **kwargs)
+            if isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        """
+        Async counterpart of `initial()`.
+        """
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        request.accepted_renderer, request.accepted_media_type = self.perform_content_negotiation(request)
+        request.version, request.versioning_scheme = self.determine_version(request, *args, **kwargs)
+
+        await self.aperform_authentication(request)
+        await self.acheck_permissions(request)
+        self.check_throttles(request)
+
+    async def aperform_authentication(self, request):
+        """
+        Authenticates the request, awaiting `aauthenticate()`
+        of authentication classes that have one.
+        """
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, 'aauthenticate'):
+                    user_auth_tuple = await authenticator.aauthenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+        request._not_authenticated()
+
+    async def acheck_permissions(self, request):
+        """
+        Async counterpart of `check_permissions()`, awaiting
+        `ahas_permission()` of permissions that have one.
+        """
+        for permission in self.get_permissions():
+            if hasattr(permission, 'ahas_permission'):
+                allowed = await permission.ahas_permission(request, self)
+            else:
+                allowed = permission.has_permission(request, self)
+            if not allowed:
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, 'message', None),
+                    code=getattr(permission, 'code', None)
+                )
+
+    async def acheck_object_permissions(self, request, obj):
+        """
+        Async counterpart of `check_object_permissions()`, awaiting
+        `ahas_object_permission()` of permissions that have one.
+        """
+        for permission in self.get_permissions():
+            if hasattr(permission, 'ahas_object_permission'):
+                allowed = await permission.ahas_object_permission(request, self, obj)
+            else:
+                allowed = permission.has_object_permission(request, self, obj)
+            if not allowed:
+                self.permission_denied(
+                    request,
+                    message=getattr(permission, 'message', None),
+                    code=getattr(permission, 'code', None)
+                )
+
+    async def aget_object(self):
+        """
+        Async counterpart of `get_object()`.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, DjangoValidationError):
+            raise Http404
+        await self.acheck_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        """
+        Async counterpart of `paginate_queryset()`, see `KeysetPagination`.
+        """
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+
+
+class MemberMixin(ConditionalGetMixin, SparseFieldsetMixin):
     """
     Mixin for different Member views that provides
-    a pre-defined queryset for Member model.
+    a pre-defined queryset for Member model
+    and answers conditional requests.
     """
+    change_models = (Member, TeamMembership, Team)
+
+    # Member columns rendered by `MembersViewSerializer`
+    member_fields = ('username', 'first_name', 'last_name', 'position', 'email')
 
     def get_queryset(self):
         """
         Retrieves a queryset for Member model with selected fields
-        and team memberships prefetched.
+        and team memberships prefetched, both trimmed to the requested
+        fieldset: teams are joined only when expanded.
 
         :return: A queryset for Member model.
         """
-        return Member.objects.only(
-            'username',
-            'first_name',
-            'last_name',
-            'position',
-            'email'
-        ).prefetch_related('team_memberships__team')
+        # `username` is the pagination key and `organization` keys cache
+        # invalidation of changes, both are always loaded.
+        queryset = Member.objects.only(
+            'username', 'organization_id',
+            *(field for field in self.member_fields if self.is_selected(field))
+        )
+        if self.is_expanded('teams'):
+            memberships = TeamMembership.objects.select_related('team').only('member', 'team', 'team__name')
+        elif self.is_selected('teams'):
+            memberships = TeamMembership.objects.only('member', 'team')
+        else:
+            return queryset
+        return queryset.prefetch_related(Prefetch('team_memberships', queryset=memberships.order_by('pk')))
+
+    def list(self, request, *args, **kwargs):
+        """
+        Answers conditional requests, then lists members through the fast
+        (read-only) serialization path if it is enabled and all fields are requested.
+        """
+        if not_modified := self.not_modified(request):
+            return not_modified
+        if not fast_serialization_enabled() or self.get_fieldset() != (None, None):
+            return super().list(request, *args, **kwargs)
+
+        fast_serializer = MemberValuesSerializer()
+        rows = fast_serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        data = fast_serializer.serialize(rows if page is None else page)
+
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        if not_modified := self.not_modified(request):
+            return not_modified
+        return Response(self.get_serializer(instance).data)
+
+
+class AsyncMemberMixin(AsyncReadMixin):
+    """
+    Async counterpart of `MemberMixin` read actions,
+    for views deriving from `MemberMixin`.
+    """
+
+    async def list(self, request, *args, **kwargs):
+        if not_modified := await self.anot_modified(request):
+            return not_modified
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if not fast_serialization_enabled() or self.get_fieldset() != (None, None):
+            page = await self.apaginate_queryset(queryset)
+            members = [member async for member in queryset] if page is None else page
+            data = self.get_serializer(members, many=True).data
+        else:
+            fast_serializer = MemberValuesSerializer()
+            rows = fast_serializer.values(queryset)
+            page = await self.apaginate_queryset(rows)
+            data = await fast_serializer.aserialize([row async for row in rows.aiterator()] if page is None else page)
+
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    async def retrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        if not_modified := await self.anot_modified(request):
+            return not_modified
+        return Response(self.get_serializer(instance).data)
@@ -0,0 +1,133 @@
+"""
+The module represents CUSTOM PAGINATION classes used in the project.
+"""
+
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+from .filters import IndexedSearchFilter
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Base keyset (cursor) pagination for the list endpoints.
+
+    Pages are selected with `WHERE <key> > <last seen key> LIMIT <size>`
+    on a unique ordering key instead of `OFFSET`, so the cost of a page
+    does not grow with the size of the table and the `next` cursor
+    stays stable while rows are added or removed.
+
+    Subclasses must order by a unique column, `pk` is used by default.
+
+    Search results ranked by `IndexedSearchFilter` are ordered by rank first;
+    rows with the same rank are then paged by offset from the last rank seen.
+
+    Async views fetch the page with `apaginate_queryset()`.
+    """
+    ordering = 'pk'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view) -> tuple:
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if IndexedSearchFilter.rank_annotation in queryset.query.annotations:
+            return (f'-{IndexedSearchFilter.rank_annotation}', *ordering)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self.set_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async counterpart of `paginate_queryset()`.
+        """
+        page_queryset = self.page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self.set_page([item async for item in page_queryset])
+
+    def page_queryset(self, queryset, request, view=None):
+        """
+        Returns the queryset of the requested page and one more row,
+        `CursorPagination.paginate_queryset()` up to the query.
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            order = self.ordering[0]
+            order_attr = order.lstrip('-')
+            if self.cursor.reverse != order.startswith('-'):
+                queryset = queryset.filter(**{f'{order_attr}__lt': current_position})
+            else:
+                queryset = queryset.filter(**{f'{order_attr}__gt': current_position})
+
+        return queryset[offset:offset + self.page_size + 1]
+
+    def set_page(self, results) -> list:
+        """
+        Sets the page and cursor positions from the fetched rows,
+        `CursorPagination.paginate_queryset()` after the query.
+        """
+        offset, reverse, current_position = self.cursor or (0, False, None)
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+
+class MemberCursorPagination(KeysetPagination):
+    """
+    Keyset pagination for Member list endpoints, ordered by `username`.
+    """
+    ordering = 'username'
+
+
+class TeamCursorPagination(KeysetPagination):
+    """
+    Keyset pagination for Team list endpoints, ordered by `name`.
+    """
+    ordering = 'name'
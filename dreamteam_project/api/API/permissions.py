@@ -2,8 +2,60 @@
 The module represents CUSTOM PERMISSION classes used in the project.
 """
 
+from django.conf import settings
 from rest_framework.permissions import BasePermission
 
+from .cache import member_claims
+
+
+def token_claims(request):
+    """
+    Returns permission claims of the request access token,
+    if they are enabled and still current.
+
+    Claims are current while the claims version of the member in the cache
+    equals the version in the token, see `api.API.tokens.permission_claims`.
+
+    :param request: The HTTP request object.
+    :return: The access token, or None if its claims cannot be trusted.
+    """
+    token = request.auth
+    if not settings.TOKEN_PERMISSION_CLAIMS['ENABLED'] or token is None:
+        return None
+    version = token.get('claims_version')
+    if version is None or version != member_claims.versions([request.user.id])[request.user.id]:
+        return None
+    return token
+
+
+async def atoken_claims(request):
+    """
+    Async counterpart of `token_claims()`, reading the claims version with the async cache API.
+    """
+    token = request.auth
+    if not settings.TOKEN_PERMISSION_CLAIMS['ENABLED'] or token is None:
+        return None
+    version = token.get('claims_version')
+    if version is None or version != (await member_claims.aversions([request.user.id]))[request.user.id]:
+        return None
+    return token
+
+
+def is_manager(request) -> bool:
+    """
+    Checks if the member is a manager, from the token claims if possible.
+    """
+    claims = token_claims(request)
+    return claims['is_manager'] if claims else request.user.is_manager
+
+
+async def ais_manager(request) -> bool:
+    """
+    Async counterpart of `is_manager()`.
+    """
+    claims = await atoken_claims(request)
+    return claims['is_manager'] if claims else request.user.is_manager
+
 
 class IsManager(BasePermission):
     """
@@ -21,7 +73,13 @@ class IsManager(BasePermission):
         :param view: The API view being accessed.
         :return: True if the member is a manager, False otherwise.
         """
-        return request.user.is_manager
+        return is_manager(request)
+
+    async def ahas_permission(self, request, view) -> bool:
+        """
+        Async counterpart of `has_permission()`, used by async views.
+        """
+        return await ais_manager(request)
 
 
 class IsManagerOrReadOnlyOwnProfile(BasePermission):
@@ -45,7 +103,7 @@ class IsManagerOrReadOnlyOwnProfile(BasePermission):
         :param view: The API view being accessed.
         :return: True if the member has permission, False otherwise.
         """
-        return request.user.is_manager or view.action == 'retrieve'
+        return is_manager(request) or view.action == 'retrieve'
 
     def has_object_permission(self, request, view, obj):
         """
@@ -57,7 +115,19 @@ class IsManagerOrReadOnlyOwnProfile(BasePermission):
         :param obj: Member profile being accessed.
         :return: True if the member has permission, False otherwise.
         """
-        return request.user.is_manager or obj == request.user
+        return is_manager(request) or obj == request.user
+
+    async def ahas_permission(self, request, view):
+        """
+        Async counterpart of `has_permission()`, used by async views.
+        """
+        return await ais_manager(request) or view.action == 'retrieve'
+
+    async def ahas_object_permission(self, request, view, obj):
+        """
+        Async counterpart of `has_object_permission()`, used by async views.
+        """
+        return await ais_manager(request) or obj == request.user
 
 
 class IsManagerOrReadOnlyOwnTeam(BasePermission):
@@ -71,6 +141,9 @@ class IsManagerOrReadOnlyOwnTeam(BasePermission):
     — If the view action is 'retrieve' (for viewing a specific team),
         any authenticated member can access it.
     — Non-managers can only access teams to which they are assigned as members.
+
+    With permission claims enabled, teams of the member
+    are taken from the access token instead of the database.
     """
 
     def has_permission(self, request, view):
@@ -81,7 +154,7 @@ class IsManagerOrReadOnlyOwnTeam(BasePermission):
         :param view: The API view being accessed.
         :return: True if the member has permission, False otherwise.
         """
-        return request.user.is_manager or view.action == 'retrieve'
+        return is_manager(request) or view.action == 'retrieve'
 
     def has_object_permission(self, request, view, obj):
         """
@@ -93,4 +166,20 @@ class IsManagerOrReadOnlyOwnTeam(BasePermission):
         :param obj: The specific team object being accessed.
         :return: True if the member has permission, False otherwise.
         """
+        if claims := token_claims(request):
+            return claims['is_manager'] or obj.id in claims['team_ids']
         return request.user.is_manager or obj.members.filter(id=request.user.id).exists()
+
+    async def ahas_permission(self, request, view):
+        """
+        Async counterpart of `has_permission()`, used by async views.
+        """
+        return await ais_manager(request) or view.action == 'retrieve'
+
+    async def ahas_object_permission(self, request, view, obj):
+        """
+        Async counterpart of `has_object_permission()`, used by async views.
+        """
+        if claims := await atoken_claims(request):
+            return claims['is_manager'] or obj.id in claims['team_ids']
+        return request.user.is_manager or await obj.members.filter(id=request.user.id).aexists()
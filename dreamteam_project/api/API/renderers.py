@@ -0,0 +1,61 @@
+"""
+The module represents RENDERERS used in the project.
+"""
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer encoding with `orjson` (a dependency of the project),
+    falling back to `JSONRenderer` if it is not installed.
+
+    The output decodes to the same data as of `JSONRenderer` with compact,
+    unicode JSON (the REST framework defaults): dates, times and decimals are
+    still formatted by the REST framework encoder and U+2028/U+2029 are escaped.
+    It is not byte for byte the same though:
+
+    - float exponents are written shorter (`1e16` rather than `1e+16`);
+    - NaN and infinite floats are rendered as `null`, `JSONRenderer`
+      (with the strict JSON default) raises `ValueError` for them.
+
+    Other configurations and indented output fall back to `JSONRenderer`.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        content = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """
+    Renderer of newline delimited JSON.
+
+    Streaming views write records themselves, the renderer is used
+    for content negotiation and renders other responses (e.g. errors)
+    as a single line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        content = super().render(data, accepted_media_type, renderer_context)
+        return content + b'\n' if content else content
@@ -2,10 +2,54 @@
 The module represents SERIALIZERS used in the project.
 """
 
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.utils.translation import gettext as _
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 
 from ..models import Member, MemberPosition, Team, TeamMembership
+from ..signals import memberships_bulk_created, memberships_bulk_deleted
+from .tokens import MemberRefreshToken
+
+
+def one_team_error_message(member, team) -> str:
+    """
+    Returns the error message for a one-team member
+    who is already in another team.
+
+    :param member: The member being added to a team.
+    :param team: The team the member is already in.
+    :return: The error message.
+    """
+    full_name = f"{member.first_name} {member.last_name} ({member.position})"
+    return _(f"{full_name} already exists in the {team.name} team")
+
+
+def membership_conflict(member, team):
+    """
+    Returns the field and the message of the validation error
+    for a membership rejected by a unique constraint.
+
+    Called after `IntegrityError`, when the conflicting membership
+    (added concurrently) is committed.
+
+    :param member: The member being added to a team.
+    :param team: The team the member is being added to.
+    :return: A (field, message) pair, or None if no membership conflicts.
+    """
+    current = TeamMembership.objects.select_related('team').filter(member=member).order_by('pk')
+    teams = [membership.team for membership in current]
+    if team in teams:
+        return 'non_field_errors', _('The fields member, team must make a unique set.')
+    if member.position in MemberPosition.only_one_team() and teams:
+        return 'member', one_team_error_message(member, teams[0])
+    return None
 
 
 class TeamMembershipEditSerializer(serializers.ModelSerializer):
@@ -18,11 +62,17 @@ class TeamMembershipEditSerializer(serializers.ModelSerializer):
     — Members with positions requiring a single team
         cannot be added to multiple teams.
     — Members without a specified position can't be added to a team.
+
+    The one-team check is optimistic: it gives the error message,
+    the rule is enforced by a unique index of the database
+    (see `TeamMembership`), whose violations by concurrent adds
+    are reported by `create()` with the same message.
     """
 
     class Meta:
         model = TeamMembership
         fields = '__all__'
+        read_only_fields = ('organization',)
 
     def validate(self, data):
         member = data.get('member')
@@ -30,18 +80,9 @@ class TeamMembershipEditSerializer(serializers.ModelSerializer):
 
         # Check if the member is already in another team (only one-team members).
         if member_position in MemberPosition.only_one_team():
-            # This query inside transaction
-            # see create() TeamMemberAddAPIView
-            team_member = (
-                TeamMembership.objects.select_for_update().
-                select_related('team').filter(member=member).first()
-            )
+            team_member = TeamMembership.objects.select_related('team').filter(member=member).first()
             if team_member:
-                first_name = member.first_name
-                last_name = member.last_name
-                full_name = f"{first_name} {last_name} ({member_position})"
-                team = team_member.team.name
-                error_message = _(f"{full_name} already exists in the {team} team")
+                error_message = one_team_error_message(member, team_member.team)
                 raise serializers.ValidationError({'member': error_message})
 
         # Check if the member without a specified position.
@@ -51,6 +92,205 @@ class TeamMembershipEditSerializer(serializers.ModelSerializer):
 
         return data
 
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            conflict = membership_conflict(validated_data['member'], validated_data['team'])
+            if conflict is None:
+                raise
+            field, error_message = conflict
+            raise serializers.ValidationError({field: error_message})
+
+
+class TeamMembershipPairSerializer(serializers.Serializer):
+    """
+    Serializer for a (member, team) pair,
+    used in TeamMembershipBulkEditSerializer.
+    """
+    member = serializers.IntegerField(min_value=1)
+    team = serializers.IntegerField(min_value=1)
+
+
+class TeamMembershipBulkEditSerializer(serializers.Serializer):
+    """
+    Serializer for editing team composition in bulk,
+    used in view to add or remove many members to teams at once.
+
+    Pairs are validated by the same rules as in TeamMembershipEditSerializer,
+    but with a constant number of queries per batch:
+    — memberships to remove are selected and deleted with one query each;
+    — members, teams and current memberships of the members to add
+        are selected with one query each and new memberships
+        are inserted with a single `bulk_create`.
+
+    As in TeamMembershipEditSerializer, the one-team check is optimistic:
+    if a concurrent add violates a unique index, the batch is inserted
+    row by row and the conflicting pairs are rejected.
+
+    Invalid pairs do not fail the whole batch: the result of saving
+    lists every pair with its status (`created`, `removed` or `rejected`)
+    and, for rejected pairs, the errors.
+    """
+    max_batch_size = 1000
+
+    add = TeamMembershipPairSerializer(many=True, required=False, max_length=max_batch_size)
+    remove = TeamMembershipPairSerializer(many=True, required=False, max_length=max_batch_size)
+
+    def validate(self, data):
+        if not data.get('add') and not data.get('remove'):
+            raise serializers.ValidationError(_('Provide members to add or remove'))
+        return data
+
+    def create(self, validated_data):
+        # Removal goes first, so a member can be moved
+        # from one team to another within a single batch.
+        removed = self.remove_memberships(validated_data.get('remove', []))
+        added = self.add_memberships(validated_data.get('add', []))
+        return {'added': added, 'removed': removed}
+
+    @staticmethod
+    def rejected(pair, field, message) -> dict:
+        return {**pair, 'status': 'rejected', 'errors': {field: [message]}}
+
+    def remove_memberships(self, pairs) -> list:
+        """
+        Deletes memberships of the given (member, team) pairs.
+
+        :param pairs: A list of validated pairs.
+        :return: A list of per-pair results.
+        """
+        if not pairs:
+            return []
+
+        query = Q()
+        for pair in pairs:
+            query |= Q(member_id=pair['member'], team_id=pair['team'])
+        found = list(TeamMembership.objects.filter(query).only(
+            'id', 'member_id', 'team_id', 'organization_id', 'member_position'
+        ))
+        memberships = {(membership.member_id, membership.team_id): membership.id for membership in found}
+        # Nothing references memberships, so the cascade collector
+        # (which sends `post_delete` per row) is not needed.
+        TeamMembership.objects.filter(id__in=memberships.values())._raw_delete(TeamMembership.objects.db)
+        memberships_bulk_deleted.send(sender=TeamMembership, memberships=found)
+
+        results = []
+        for pair in pairs:
+            membership_id = memberships.pop((pair['member'], pair['team']), None)
+            if membership_id is None:
+                results.append(self.rejected(pair, 'non_field_errors', _('The member is not in the team')))
+            else:
+                results.append({**pair, 'status': 'removed', 'id': membership_id})
+        return results
+
+    def add_memberships(self, pairs) -> list:
+        """
+        Creates memberships of the given (member, team) pairs.
+
+        :param pairs: A list of validated pairs.
+        :return: A list of per-pair results.
+        """
+        if not pairs:
+            return []
+
+        members = Member.objects.only(
+            'first_name', 'last_name', 'position'
+        ).in_bulk({pair['member'] for pair in pairs})
+        teams = Team.objects.only('name', 'organization_id').in_bulk({pair['team'] for pair in pairs})
+
+        # Single query for all members of the batch
+        member_teams = defaultdict(list)
+        current = TeamMembership.objects.select_related('team').filter(member_id__in=members)
+        for membership in current:
+            member_teams[membership.member_id].append(membership.team)
+
+        results = []
+        new_memberships = []
+        for pair in pairs:
+            member = members.get(pair['member'])
+            team = teams.get(pair['team'])
+            if member is None:
+                error_message = _(f'Invalid pk "{pair["member"]}" - object does not exist.')
+                results.append(self.rejected(pair, 'member', error_message))
+            elif team is None:
+                error_message = _(f'Invalid pk "{pair["team"]}" - object does not exist.')
+                results.append(self.rejected(pair, 'team', error_message))
+            elif team in member_teams[member.id]:
+                error_message = _('The fields member, team must make a unique set.')
+                results.append(self.rejected(pair, 'non_field_errors', error_message))
+            elif member.position in MemberPosition.only_one_team() and member_teams[member.id]:
+                error_message = one_team_error_message(member, member_teams[member.id][0])
+                results.append(self.rejected(pair, 'member', error_message))
+            elif not member.position:
+                error_message = _('Members without a position cannot be added to the team')
+                results.append(self.rejected(pair, 'member', error_message))
+            else:
+                member_teams[member.id].append(team)
+                new_memberships.append(TeamMembership(
+                    member=member, team=team, member_position=member.position, organization_id=team.organization_id
+                ))
+                results.append({**pair, 'status': 'created'})
+
+        try:
+            with transaction.atomic():
+                created = TeamMembership.objects.bulk_create(new_memberships)
+        except IntegrityError:
+            created = self.insert_one_by_one(new_memberships)
+
+        created_ids = {(membership.member_id, membership.team_id): membership.id for membership in created}
+        for result, membership in zip([result for result in results if result['status'] == 'created'], new_memberships):
+            membership_id = created_ids.get((membership.member_id, membership.team_id))
+            if membership_id is not None:
+                result['id'] = membership_id
+                continue
+            conflict = membership_conflict(membership.member, membership.team) or (
+                'non_field_errors', _('The member could not be added to the team')
+            )
+            result.update(self.rejected(result, *conflict))
+
+        memberships_bulk_created.send(sender=TeamMembership, memberships=created)
+        return results
+
+    @staticmethod
+    def insert_one_by_one(memberships) -> list:
+        """
+        Inserts memberships one by one (without signals, as `bulk_create`),
+        skipping the ones rejected by a unique index.
+
+        :return: A list of inserted memberships.
+        """
+        created = []
+        for membership in memberships:
+            try:
+                with transaction.atomic():
+                    created.extend(TeamMembership.objects.bulk_create([membership]))
+            except IntegrityError:
+                continue
+        return created
+
+
+class SparseFieldsetSerializer(serializers.ModelSerializer):
+    """
+    Model serializer rendering a subset of its fields
+    (see `SparseFieldsetMixin`).
+
+    `compact_fields` maps nested fields to callables returning
+    their compact (IDs only) replacements, used unless expanded.
+    """
+    compact_fields = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        if expand is not None:
+            for name, compact_field in self.compact_fields.items():
+                if name in self.fields and name not in expand:
+                    self.fields[name] = compact_field()
+
 
 class MemberInTeamSerializer(serializers.ModelSerializer):
     """
@@ -75,20 +315,35 @@ class TeamMembershipSerializer(serializers.ModelSerializer):
         fields = ('id', 'date_joined', 'member')
 
 
-class TeamViewSerializer(serializers.ModelSerializer):
+class TeamViewSerializer(SparseFieldsetSerializer):
     """
     Serializer for the Team model, designed for the Team view set.
 
     Note:
     — `members` is represented as a list of team memberships,
-        which includes details about the team members.
+        which includes details about the team members,
+        or as a list of member IDs unless expanded.
     """
     members = TeamMembershipSerializer(source='memberships', many=True, read_only=True)
+    compact_fields = {
+        'members': lambda: serializers.SlugRelatedField(
+            source='memberships', slug_field='member_id', many=True, read_only=True
+        ),
+    }
 
     class Meta:
         model = Team
         fields = ('id', 'name', 'members')
 
+    def validate_name(self, value):
+        # Names are unique within the organization `Team.objects` is scoped to
+        teams = Team.objects.filter(name=value)
+        if self.instance is not None:
+            teams = teams.exclude(pk=self.instance.pk)
+        if teams.exists():
+            raise serializers.ValidationError(_('team with this Team Name already exists.'))
+        return value
+
 
 class TeamForMembersSerializer(serializers.ModelSerializer):
     """
@@ -102,15 +357,21 @@ class TeamForMembersSerializer(serializers.ModelSerializer):
         fields = ('id', 'team')
 
 
-class MembersViewSerializer(serializers.ModelSerializer):
+class MembersViewSerializer(SparseFieldsetSerializer):
     """
     Serializer for the Member model, designed for the Member view sets.
 
     Note:
-     — `teams` is represented as a list of teams to which the member belongs.
+     — `teams` is represented as a list of teams to which the member belongs,
+        or as a list of team IDs unless expanded.
      — `password` is a write-only field for setting or updating the member's password.
     """
     teams = TeamForMembersSerializer(source='team_memberships', many=True, read_only=True)
+    compact_fields = {
+        'teams': lambda: serializers.SlugRelatedField(
+            source='team_memberships', slug_field='team_id', many=True, read_only=True
+        ),
+    }
     password = serializers.CharField(write_only=True)
 
     class Meta:
@@ -125,3 +386,83 @@ class MembersViewSerializer(serializers.ModelSerializer):
             'teams',
             'password'
         )
+        extra_kwargs = {
+            # Usernames are unique across organizations, not only in `Member.objects`
+            'username': {'validators': [
+                UnicodeUsernameValidator(),
+                UniqueValidator(
+                    queryset=Member._base_manager.all(),
+                    message=Member._meta.get_field('username').error_messages['unique']
+                ),
+            ]},
+        }
+
+    def create(self, validated_data):
+        password = validated_data.pop('password')
+        member = Member(**validated_data)
+        member.set_password(password)
+        member.save()
+        return member
+
+    def update(self, instance, validated_data):
+        if (password := validated_data.pop('password', None)) is not None:
+            instance.set_password(password)
+        # A member in several teams cannot take a one-team position,
+        # the unique index of memberships rejects it (see `Member.save()`).
+        try:
+            return super().update(instance, validated_data)
+        except IntegrityError:
+            if instance.position not in MemberPosition.only_one_team():
+                raise
+            error_message = _('Members in several teams cannot take a one-team position')
+            raise serializers.ValidationError({'position': error_message})
+
+
+class ChangeFeedQuerySerializer(serializers.Serializer):
+    """
+    Serializer for query parameters of the change feed:
+    `since` is the cursor (ID of the last event seen, 0 to start
+    from the oldest retained event) and `limit` the page size.
+    """
+    since = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=settings.CHANGE_FEED['MAX_PAGE_SIZE'], default=settings.CHANGE_FEED['PAGE_SIZE']
+    )
+
+
+class TeamHistoryQuerySerializer(serializers.Serializer):
+    """
+    Serializer for query parameters of a retrieved team:
+    `as_of` is the date (YYYY-MM-DD) to show the roster on,
+    the current roster is shown without it.
+    """
+    as_of = serializers.DateField(required=False)
+
+
+class MemberTenureSerializer(serializers.Serializer):
+    """
+    Serializer for a tenure of a member in a team (see `api.history.tenures()`),
+    a deleted team has no ID and is named as it was when it was deleted.
+    """
+    team_id = serializers.IntegerField(allow_null=True)
+    team_name = serializers.CharField()
+    date_joined = serializers.DateField()
+    date_left = serializers.DateField(allow_null=True)
+    days = serializers.IntegerField()
+
+
+class MemberTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Serializer for obtaining tokens,
+    issues tokens with permission claims (if enabled).
+    """
+    token_class = MemberRefreshToken
+
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Serializer for refreshing tokens,
+    checks the blacklist through the in-memory filter first
+    and re-issues permission claims (if enabled).
+    """
+    token_class = MemberRefreshToken
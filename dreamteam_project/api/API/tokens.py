@@ -0,0 +1,209 @@
+"""
+The module represents TOKEN utilities used in the project.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import (
+    OutstandingToken,
+    BlacklistedToken
+)
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..models import Member
+from .blacklist import blacklist_filter
+from .cache import member_claims
+
+logger = logging.getLogger(__name__)
+
+
+class FilteredRefreshToken(RefreshToken):
+    """
+    Refresh token checking the blacklist through the in-memory filter.
+
+    The blacklist table is queried only when the filter reports
+    a possible match (see `api.API.blacklist.BlacklistFilter`).
+    """
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if blacklist_filter.enabled and not blacklist_filter.might_contain(jti):
+            return
+        super().check_blacklist()
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
+
+
+def permission_claims(member_id) -> dict:
+    """
+    Returns claims used by permission classes instead of database queries.
+
+    The version is read before the member, so claims changed in between
+    are issued with an outdated version and will not be trusted.
+
+    :param member_id: ID of the member the token is issued for.
+    :return: A dictionary with `is_manager`, `team_ids`
+        and `claims_version` claims.
+    """
+    version = member_claims.versions([member_id])[member_id]
+    rows = Member.objects.filter(pk=member_id).values_list('is_manager', 'team_memberships__team_id')
+    return {
+        'is_manager': any(is_manager for is_manager, _ in rows),
+        'team_ids': sorted(team_id for _, team_id in rows if team_id is not None),
+        'claims_version': version,
+    }
+
+
+class MemberRefreshToken(FilteredRefreshToken):
+    """
+    Refresh token carrying permission claims of the member,
+    if enabled by `TOKEN_PERMISSION_CLAIMS` setting.
+
+    Claims are copied to access tokens and are reloaded every time
+    an access token is issued on refresh, so refreshed tokens
+    always carry current claims.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        if settings.TOKEN_PERMISSION_CLAIMS['ENABLED']:
+            token.payload.update(permission_claims(user.pk))
+        return token
+
+    @property
+    def access_token(self):
+        if settings.TOKEN_PERMISSION_CLAIMS['ENABLED']:
+            self.payload.update(permission_claims(self.payload[api_settings.USER_ID_CLAIM]))
+        return super().access_token
+
+
+def blacklist_outstanding_tokens(users) -> int:
+    """
+    Blacklists all unexpired, not yet blacklisted tokens of the users.
+
+    The tokens are selected with a single anti-join query
+    and blacklisted with a single bulk insert, so the number of queries
+    does not depend on the number of tokens or users. Conflicts with
+    tokens blacklisted concurrently (e.g. by rotation) are ignored.
+
+    :param users: A queryset or a list of members (or their IDs).
+    :return: The number of selected tokens, all of them are blacklisted on return;
+        tokens blacklisted concurrently after the selection are counted as well.
+    """
+    token_ids = list(OutstandingToken.objects.filter(
+        user__in=users,
+        expires_at__gt=timezone.now(),
+        blacklistedtoken__isnull=True,
+    ).values_list('id', flat=True))
+
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token_id=token_id) for token_id in token_ids],
+        ignore_conflicts=True,
+    )
+    if token_ids:
+        blacklist_filter.invalidate()
+    return len(token_ids)
+
+
+def token_table_sizes() -> dict:
+    """
+    Returns the number of rows in the token blacklist tables.
+    """
+    return {
+        'outstanding': OutstandingToken.objects.count(),
+        'blacklisted': BlacklistedToken.objects.count(),
+    }
+
+
+def prune_expired_tokens(batch_size=None, pause=0.0) -> dict:
+    """
+    Deletes expired outstanding tokens together with their blacklist entries.
+
+    Expired tokens are rejected by signature verification anyway,
+    so their rows are only dead weight for blacklist lookups.
+    Rows are deleted in batches of `batch_size`, each in its own
+    short transaction, walking the primary key index from the last
+    deleted ID, so locks are never held for long and every row
+    is visited once.
+
+    :param batch_size: Maximum number of tokens deleted per transaction,
+        `TOKEN_PRUNING['BATCH_SIZE']` by default.
+    :param pause: Seconds to sleep between batches to leave room
+        for other writers.
+    :return: A report with numbers of deleted rows, rows per second
+        and table sizes before and after pruning.
+    """
+    batch_size = batch_size or settings.TOKEN_PRUNING['BATCH_SIZE']
+    now = timezone.now()
+    before = token_table_sizes()
+    started = time.monotonic()
+    deleted = {'outstanding': 0, 'blacklisted': 0}
+    last_id = 0
+
+    while True:
+        with transaction.atomic():
+            token_ids = list(
+                OutstandingToken.objects.filter(
+                    id__gt=last_id, expires_at__lte=now
+                ).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not token_ids:
+                break
+            deleted['blacklisted'] += BlacklistedToken.objects.filter(token_id__in=token_ids).delete()[0]
+            # Blacklist entries are already gone, so the cascade
+            # collector (which loads every token row) is not needed.
+            deleted['outstanding'] += OutstandingToken.objects.filter(id__in=token_ids)._raw_delete(
+                OutstandingToken.objects.db
+            )
+        last_id = token_ids[-1]
+        if pause:
+            time.sleep(pause)
+
+    elapsed = time.monotonic() - started
+    total = deleted['outstanding'] + deleted['blacklisted']
+    return {
+        'deleted': deleted,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(total / elapsed) if elapsed else total,
+        'before': before,
+        'after': token_table_sizes(),
+    }
+
+
+class TokenPruningScheduler(threading.Thread):
+    """
+    Daemon thread pruning expired tokens every `interval` seconds.
+
+    Started in `ApiConfig.ready()` when `TOKEN_PRUNING['INTERVAL']` is set,
+    for deployments without an external scheduler (cron) for
+    the `prune_tokens` management command.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__(name='token-pruning', daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                report = prune_expired_tokens()
+                logger.info('Pruned expired tokens: %s', report)
+            except Exception:
+                logger.exception('Pruning of expired tokens failed')
+            finally:
+                # The thread owns its own database connection.
+                connection.close()
+
+    def stop(self):
+        self.stopped.set()
@@ -2,51 +2,197 @@
 The module represents VIEWS (API resources) used in the project.
 """
 
+import hashlib
+import json
+from datetime import date
+
 from django.db import transaction
-from django.db.models import Prefetch, Q
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
 from rest_framework import viewsets, views, generics, status
-from rest_framework.filters import SearchFilter
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.token_blacklist.models import (
-    OutstandingToken,
-    BlacklistedToken
-)
 
-from ..models import Team, TeamMembership, MemberPosition
-from .mixins import MemberMixin
+from ..db.routers import primary_reads
+from .. import history, outbox, stats
+from ..models import ChangeEvent, Member, PositionCount, Team, TeamMembership, MemberPosition
+from ..tenants import current_organization, scoped
+from .cache import team_rosters
+from .export import DEFAULT_CHUNK_SIZE, FORMATS, async_chunks
+from .fastpath import TeamValuesSerializer, fast_serialization_enabled
+from .filters import IndexedSearchFilter
+from .mixins import (
+    AsyncMemberMixin,
+    AsyncReadMixin,
+    ConditionalGetMixin,
+    MemberMixin,
+    ReplicaReadMixin,
+    SparseFieldsetMixin
+)
+from .pagination import MemberCursorPagination, TeamCursorPagination
+from .renderers import FastJSONRenderer, NDJSONRenderer
 from .permissions import (
     IsManager,
     IsManagerOrReadOnlyOwnProfile,
     IsManagerOrReadOnlyOwnTeam
 )
 from .serializers import (
+    ChangeFeedQuerySerializer,
+    MemberInTeamSerializer,
     MembersViewSerializer,
+    MemberTenureSerializer,
+    TeamHistoryQuerySerializer,
     TeamViewSerializer,
     TeamMembershipEditSerializer,
+    TeamMembershipBulkEditSerializer,
 )
+from .tokens import FilteredRefreshToken, blacklist_outstanding_tokens
 
 
-class TeamViewSet(viewsets.ModelViewSet):
+class TeamViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     Viewset for managing teams, including creation, retrieval,
     updating, and deletion of teams.
 
     Provides endpoints to perform CRUD operations on teams
-    and includes filtering.
+    and includes filtering, sparse fieldsets and conditional requests.
+    Teams are listed and retrieved from a replica database,
+    a team is retrieved with its roster on a past date
+    with `?as_of=YYYY-MM-DD` (see `api.history`).
     """
     permission_classes = (IsAuthenticated, IsManagerOrReadOnlyOwnTeam)
     serializer_class = TeamViewSerializer
-    filter_backends = (SearchFilter,)
+    pagination_class = TeamCursorPagination
+    filter_backends = (IndexedSearchFilter,)
     search_fields = ('name',)
+    change_models = (Team, TeamMembership, Member)
     queryset = Team.objects.prefetch_related(
         Prefetch(
             'memberships',
-            queryset=TeamMembership.objects.select_related('member')
+            queryset=TeamMembership.objects.select_related('member').only(
+                'date_joined', 'team', 'member',
+                *(f'member__{field}' for field in MemberInTeamSerializer.Meta.fields)
+            ).order_by('team_id', 'pk')
         )
     )
 
+    def get_queryset(self):
+        """
+        Rosters of listed and retrieved teams are read from the cache,
+        so these actions select bare teams and memberships are prefetched
+        only for cache misses (see `load_rosters()`), or as bare member IDs
+        if members are not expanded. Past rosters are read from the history.
+        """
+        if self.action in ('list', 'retrieve'):
+            queryset = Team.objects.only('id', 'name')
+            if self.get_as_of() is None and self.is_selected('members') and not self.is_expanded('members'):
+                queryset = queryset.prefetch_related(
+                    Prefetch('memberships', queryset=TeamMembership.objects.only('team', 'member'))
+                )
+            return queryset
+        # `queryset` is created on import, before any organization is known
+        return scoped(super().get_queryset())
+
+    def load_rosters(self, team_ids) -> dict:
+        """
+        Serializes rosters of the teams missing from the cache.
+
+        Rosters are read from the primary database: a roster read
+        from a lagging replica would be cached under the current version.
+
+        :param team_ids: IDs of the teams to serialize.
+        :return: A dictionary mapping team IDs to serialized teams.
+        """
+        with primary_reads():
+            if fast_serialization_enabled():
+                return TeamValuesSerializer().serialize(team_ids)
+            teams = super().get_queryset().filter(pk__in=team_ids)
+            # Cached rosters are always complete, whatever the requested fieldset.
+            serializer = self.get_serializer_class()(teams, many=True, context=self.get_serializer_context())
+            return {team['id']: team for team in serializer.data}
+
+    def represent(self, teams) -> list:
+        """
+        Serializes the teams in the requested fieldset.
+
+        Expanded rosters are read from the cache and trimmed,
+        other fieldsets are serialized from the loaded teams.
+
+        :param teams: Teams selected by `get_queryset()`.
+        :return: A list of serialized teams.
+        """
+        if not self.is_expanded('members'):
+            return self.get_serializer(teams, many=True).data
+
+        team_ids = [team.id for team in teams]
+        return self.trim_rosters(team_ids, team_rosters.get_many(team_ids, self.load_rosters))
+
+    def trim_rosters(self, team_ids, rosters) -> list:
+        """
+        Returns rosters of the teams in order, trimmed to the requested fields.
+        """
+        fields = self.get_fieldset()[0]
+        if fields is None:
+            return [rosters[team_id] for team_id in team_ids]
+        return [
+            {field: value for field, value in rosters[team_id].items() if field in fields}
+            for team_id in team_ids
+        ]
+
+    def get_as_of(self):
+        """
+        Returns the date of `?as_of=` of a retrieved team, None if not given.
+        """
+        if self.action != 'retrieve':
+            return None
+        query = TeamHistoryQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        return query.validated_data.get('as_of')
+
+    def represent_as_of(self, team, rows) -> dict:
+        """
+        Serializes the team in the requested fieldset
+        with the roster of `history.roster_query()`.
+        """
+        if self.is_expanded('members'):
+            members = [history.roster_entry(row) for row in rows]
+        else:
+            members = [row['member_id'] for row in rows]
+        data = {'id': team.id, 'name': team.name, 'members': members}
+        fields = self.get_fieldset()[0]
+        return data if fields is None else {field: value for field, value in data.items() if field in fields}
+
+    def perform_update(self, serializer):
+        """
+        Saves the team and selects it again with its roster prefetched:
+        `UpdateModelMixin` drops prefetched memberships of the saved instance,
+        which would load members of the response one by one.
+        """
+        super().perform_update(serializer)
+        serializer.instance = self.get_queryset().get(pk=serializer.instance.pk)
+
+    def list(self, request, *args, **kwargs):
+        if not_modified := self.not_modified(request):
+            return not_modified
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        data = self.represent(queryset if page is None else page)
+
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        if not_modified := self.not_modified(request):
+            return not_modified
+        if (as_of := self.get_as_of()) is not None:
+            rows = history.roster_query(instance.id, as_of) if self.is_selected('members') else []
+            return Response(self.represent_as_of(instance, rows))
+        return Response(self.represent([instance])[0])
+
 
 class MembersAvailableView(MemberMixin, generics.ListAPIView):
     """
@@ -57,6 +203,7 @@ class MembersAvailableView(MemberMixin, generics.ListAPIView):
     """
     permission_classes = (IsAuthenticated, IsManager)
     serializer_class = MembersViewSerializer
+    pagination_class = MemberCursorPagination
 
     def get_queryset(self):
         """
@@ -68,28 +215,39 @@ class MembersAvailableView(MemberMixin, generics.ListAPIView):
             it can be used for a situation where there are no managers,
             but as such it is not a member).
 
+        Availability is kept in the `Member.is_available` flag
+        (see `MemberManager.availability()`), so this is a lookup
+        on the partial `members_available_idx` index.
         """
-        queryset = super().get_queryset()
-
-        return queryset.exclude(
-            Q(position__in=MemberPosition.only_one_team(), team_memberships__isnull=False)
-            | ~Q(position__in=list(map(lambda choice: choice[0], MemberPosition.choices)))
-        )
+        return super().get_queryset().filter(is_available=True)
 
 
-class MembersAllViewSet(MemberMixin, viewsets.ModelViewSet):
+class MembersAllViewSet(ReplicaReadMixin, MemberMixin, viewsets.ModelViewSet):
     """
     Viewset for managing members, including creation, retrieval,
     updating, and deletion of members.
 
     Provides endpoints to perform CRUD operations on teams
-    and includes filtering.
+    and includes filtering. Members are listed and retrieved
+    from a replica database. Tenures of a member in teams
+    are served from the membership history.
     """
     permission_classes = (IsAuthenticated, IsManagerOrReadOnlyOwnProfile)
     serializer_class = MembersViewSerializer
-    filter_backends = (SearchFilter,)
+    pagination_class = MemberCursorPagination
+    filter_backends = (IndexedSearchFilter,)
     search_fields = ('username', 'first_name', 'last_name', 'position')
 
+    @action(detail=True)
+    def tenures(self, request, pk=None):
+        """
+        Handles GET requests for tenures of the member in teams up to today,
+        including teams that have been deleted (see `api.history`).
+        """
+        member = self.get_object()
+        tenures = history.tenures(member.id)
+        return Response(MemberTenureSerializer(tenures, many=True).data)
+
 
 class TeamMemberAddAPIView(generics.CreateAPIView):
     """
@@ -98,17 +256,40 @@ class TeamMemberAddAPIView(generics.CreateAPIView):
     Allows adding members to teams by creating `TeamMembership` records.
     It enforces permission checks to ensure only authenticated member
     with 'is_manager' access can add members to teams.
+    It never reads from replicas: members are checked against
+    the primary database, which enforces the one-team rule
+    (see create() TeamMembershipEditSerializer).
     """
     permission_classes = (IsAuthenticated, IsManager)
     serializer_class = TeamMembershipEditSerializer
 
     @transaction.atomic
     def create(self, request, *args, **kwargs):
-        # In validation serializers is select_for_update()
-        # see validate() TeamMembershipEditSerializer
         return super().create(request, *args, **kwargs)
 
 
+class TeamMemberBulkEditAPIView(generics.GenericAPIView):
+    """
+    A view for adding and removing members to teams in bulk.
+
+    Accepts lists of (member, team) pairs to `add` and to `remove`
+    and responds with the per-pair result of the operation.
+    It enforces permission checks to ensure only authenticated member
+    with 'is_manager' access can edit teams.
+    """
+    permission_classes = (IsAuthenticated, IsManager)
+    serializer_class = TeamMembershipBulkEditSerializer
+
+    @transaction.atomic
+    def post(self, request, *args, **kwargs):
+        """
+        Handles POST requests to add and remove members to teams.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save())
+
+
 class TeamMemberDeleteView(generics.DestroyAPIView):
     """
     A view for deleting members to teams.
@@ -117,22 +298,32 @@ class TeamMemberDeleteView(generics.DestroyAPIView):
     It enforces permission checks to ensure only authenticated member
     with 'is_manager' access can add members to teams.
     """
-    queryset = TeamMembership.objects.only('id')
+    queryset = TeamMembership.objects.only('id', 'team_id', 'member_id', 'organization_id', 'member_position')
     serializer_class = TeamMembershipEditSerializer
     permission_classes = (IsAuthenticated, IsManager)
 
+    def get_queryset(self):
+        # `queryset` is created on import, before any organization is known
+        return scoped(super().get_queryset())
+
 
 class MemberPositionView(views.APIView):
     """
     A view for retrieving the available member positions.
+
+    Positions never change at runtime, so they and their ETag
+    are computed once.
     """
+    positions = dict(MemberPosition.choices)
+    etag = '"{}"'.format(hashlib.blake2b(json.dumps(positions).encode(), digest_size=16).hexdigest())
 
     def get(self, request):
         """
         Handled GET requests to retrieve member positions.
         """
-        data = dict(MemberPosition.choices)
-        return Response(data)
+        response = get_conditional_response(request, etag=self.etag) or Response(self.positions)
+        response['ETag'] = self.etag
+        return response
 
 
 class LogoutView(views.APIView):
@@ -146,7 +337,7 @@ class LogoutView(views.APIView):
         """
         try:
             refresh_token = request.data["refresh_token"]
-            token = RefreshToken(refresh_token)
+            token = FilteredRefreshToken(refresh_token)
             token.blacklist()
             return Response(status=status.HTTP_205_RESET_CONTENT)
         except Exception:
@@ -162,7 +353,185 @@ class LogoutAllView(views.APIView):
         """
         Handles POST requests for user logout from all sessions and token blacklisting.
         """
-        tokens = OutstandingToken.objects.filter(user_id=request.user.id)
-        for token in tokens:
-            BlacklistedToken.objects.get_or_create(token=token)
+        blacklist_outstanding_tokens([request.user.id])
         return Response(status=status.HTTP_205_RESET_CONTENT)
+
+
+class OrganizationExportView(views.APIView):
+    """
+    A view streaming the whole organization directory:
+    members, teams and memberships of the organization of the request.
+
+    Responds with a single JSON object by default and with newline
+    delimited JSON for `?format=ndjson` or `Accept: application/x-ndjson`.
+    Rows are streamed chunk by chunk (see `api.API.export`),
+    so memory use does not depend on the size of the organization.
+    """
+    permission_classes = (IsAuthenticated, IsManager)
+    renderer_classes = (FastJSONRenderer, NDJSONRenderer)
+    chunk_size = DEFAULT_CHUNK_SIZE
+
+    def get(self, request):
+        """
+        Handles GET requests for the organization export.
+        """
+        renderer = request.accepted_renderer
+        # Taken before the rows are read, so no change made after the export is missed.
+        cursor = outbox.latest_cursor()
+        # Rows are read while the response is streamed, after the request is scoped.
+        chunks = FORMATS[renderer.format](self.chunk_size, organization_id=current_organization.get())
+        response = StreamingHttpResponse(self.stream(chunks), content_type=renderer.media_type)
+        response['Content-Disposition'] = f'attachment; filename="organization.{renderer.format}"'
+        response['X-Change-Cursor'] = str(cursor)
+        return response
+
+    def stream(self, chunks):
+        """
+        Returns the iterator of the response content.
+        """
+        return chunks
+
+
+class ChangeFeedView(views.APIView):
+    """
+    A view serving change events of members, teams and memberships
+    of the organization of the request (see `api.outbox`).
+
+    Events are paged by their IDs: `?since=<cursor>` returns up to
+    `?limit=` events following the cursor, in order, with the `next`
+    cursor to continue from and whether there are more events.
+    Consumers start from the `X-Change-Cursor` header of an organization
+    export and apply events to their copy, so they sync incrementally.
+    Pages end at the last settled event (see `api.outbox.settled()`),
+    so no event of a transaction in flight is skipped.
+    Each page is a single query on the `(organization, id)` index.
+    """
+    permission_classes = (IsAuthenticated, IsManager)
+    fields = ('id', 'model', 'object_id', 'action', 'data', 'created_at')
+
+    def get(self, request):
+        """
+        Handles GET requests for change events following the cursor.
+        """
+        query = ChangeFeedQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        since, limit = query.validated_data['since'], query.validated_data['limit']
+
+        events = outbox.settled_page(list(
+            ChangeEvent.objects.filter(id__gt=since).annotate(settled=outbox.settled())
+            .order_by('id').values(*self.fields, 'settled')[:limit + 1]
+        ))
+        return Response({
+            'next': events[:limit][-1]['id'] if events else since,
+            'has_more': len(events) > limit,
+            'results': events[:limit],
+        })
+
+
+class OrganizationStatsView(ConditionalGetMixin, views.APIView):
+    """
+    A view serving statistics of the organization of the request
+    for management dashboards (see `api.stats`): the size of every team
+    and positions of its members, and one-team members in no team.
+
+    Statistics are read from counts maintained on every change,
+    so the response grows with the number of teams, not of members,
+    and conditional requests are answered without querying the database.
+    """
+    permission_classes = (IsAuthenticated, IsManager)
+    change_models = (Team, TeamMembership, Member, PositionCount)
+
+    def get(self, request):
+        """
+        Handles GET requests for statistics of the organization.
+        """
+        if not_modified := self.not_modified(request):
+            return not_modified
+        return Response(stats.organization_stats())
+
+
+class AsyncTeamViewSet(AsyncReadMixin, TeamViewSet):
+    """
+    `TeamViewSet` serving reads asynchronously, see `AsyncReadMixin`.
+    """
+
+    async def aload_rosters(self, team_ids) -> dict:
+        """
+        Async counterpart of `load_rosters()`.
+        """
+        with primary_reads():
+            if fast_serialization_enabled():
+                return await TeamValuesSerializer().aserialize(team_ids)
+            teams = [team async for team in scoped(self.queryset).filter(pk__in=team_ids)]
+        serializer = self.get_serializer_class()(teams, many=True, context=self.get_serializer_context())
+        return {team['id']: team for team in serializer.data}
+
+    async def arepresent(self, teams) -> list:
+        """
+        Async counterpart of `represent()`.
+        """
+        if not self.is_expanded('members'):
+            return self.get_serializer(teams, many=True).data
+
+        team_ids = [team.id for team in teams]
+        return self.trim_rosters(team_ids, await team_rosters.aget_many(team_ids, self.aload_rosters))
+
+    async def list(self, request, *args, **kwargs):
+        if not_modified := await self.anot_modified(request):
+            return not_modified
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        data = await self.arepresent([team async for team in queryset] if page is None else page)
+
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    async def retrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        if not_modified := await self.anot_modified(request):
+            return not_modified
+        if (as_of := self.get_as_of()) is not None:
+            rows = []
+            if self.is_selected('members'):
+                rows = [row async for row in history.roster_query(instance.id, as_of)]
+            return Response(self.represent_as_of(instance, rows))
+        return Response((await self.arepresent([instance]))[0])
+
+
+class AsyncMembersAvailableView(AsyncMemberMixin, MembersAvailableView):
+    """
+    `MembersAvailableView` serving reads asynchronously, see `AsyncReadMixin`.
+    """
+
+
+class AsyncMembersAllViewSet(AsyncMemberMixin, MembersAllViewSet):
+    """
+    `MembersAllViewSet` serving reads asynchronously, see `AsyncReadMixin`.
+    """
+
+    @action(detail=True)
+    async def tenures(self, request, pk=None):
+        """
+        Async counterpart of `MembersAllViewSet.tenures()`.
+        """
+        member = await self.aget_object()
+        day = date.today()
+        tenures = [history.tenure_entry(row, day) async for row in history.tenure_query(member.id, day)]
+        return Response(MemberTenureSerializer(tenures, many=True).data)
+
+
+class AsyncMemberPositionView(AsyncReadMixin, MemberPositionView):
+    """
+    `MemberPositionView` with async authentication, see `AsyncReadMixin`.
+    """
+
+
+class AsyncOrganizationExportView(OrganizationExportView):
+    """
+    `OrganizationExportView` streaming the export by an async iterator,
+    which ASGI servers send chunk by chunk (see `api.API.export.async_chunks()`).
+    """
+
+    def stream(self, chunks):
+        return async_chunks(chunks)
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .API.blacklist import blacklist_filter
+
+        blacklist_filter.check()
+
+        if interval := settings.TOKEN_PRUNING['INTERVAL']:
+            from .API.tokens import TokenPruningScheduler
+            TokenPruningScheduler(interval).start()
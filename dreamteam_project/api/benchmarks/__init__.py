@@ -0,0 +1,259 @@
+"""
+The package represents BENCHMARK suites of the project.
+
+Every module of the package is a suite exposing
+`run(scale: float, repeat: int) -> list[dict]`; suites are run by
+the `benchmark` management command against a throwaway test database,
+so the project database is never touched:
+
+    python manage.py benchmark token_refresh --repeat 500
+
+Query counts of a suite can be checked against the baseline
+checked in to `baselines/<suite>.json`:
+
+    python manage.py benchmark endpoints --check
+"""
+
+import json
+import random
+import statistics
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment
+)
+
+from ..history import open_periods
+from ..stats import add, drift
+from ..models import Member, MemberPosition, Organization, Team, TeamMembership
+from ..tenants import organization_scope
+
+BASELINES_DIR = Path(__file__).resolve().parent / 'baselines'
+
+# Relative frequency of positions among seeded members
+POSITION_WEIGHTS = {
+    MemberPosition.INTERN: 10,
+    MemberPosition.JUNIOR: 25,
+    MemberPosition.MIDDLE: 25,
+    MemberPosition.SENIOR: 15,
+    MemberPosition.TECH_LEAD: 5,
+    MemberPosition.TEAM_LEAD: 4,
+    MemberPosition.PM: 4,
+    MemberPosition.ARCHITECT: 2,
+    MemberPosition.DBA: 2,
+    MemberPosition.QA: 5,
+    MemberPosition.DEV: 2,
+    MemberPosition.UI_UX: 1,
+}
+
+SEED_PASSWORD = 'benchmark-password'
+
+
+def derived(instance):
+    """
+    Sets derived fields of an instance created by `bulk_create()`.
+    """
+    instance.set_derived_fields()
+    return instance
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Creates a test database for the duration of a benchmark
+    and destroys it afterwards.
+    """
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def seed_organization(scale=1.0, seed=0, organization=None) -> dict:
+    """
+    Seeds a realistic organization: `10000 * scale` members
+    and `500 * scale` teams with skewed (Zipf-like) team sizes.
+
+    About 60% of one-team members are spread over the teams,
+    the rest stay available; every team also gets a few members
+    with positions allowed in many teams. Memberships get their
+    history periods, as if the members joined today, and are counted
+    in the statistics.
+    All members share the password `SEED_PASSWORD`.
+
+    :param scale: Multiplier of the data volume.
+    :param seed: Seed of the random generator.
+    :param organization: The seeded organization, the default one if not given;
+        usernames of members of other organizations start with its slug.
+    :return: A dictionary with `members` and `teams` IDs,
+        teams are ordered from the largest to the smallest.
+    """
+    rng = random.Random(seed)
+    member_count = max(int(10000 * scale), 50)
+    team_count = max(int(500 * scale), 5)
+    password = make_password(SEED_PASSWORD)
+    organization_id = organization.pk if organization else Organization.objects.default_id()
+    prefix = f'{organization.slug}-' if organization else ''
+    positions = rng.choices(list(POSITION_WEIGHTS), weights=list(POSITION_WEIGHTS.values()), k=member_count)
+
+    Member.objects.bulk_create(
+        [
+            derived(Member(
+                username=f'{prefix}member{i:06d}',
+                first_name=rng.choice(('Anna', 'Bohdan', 'Iryna', 'Oleh', 'Olena', 'Taras')),
+                last_name=rng.choice(('Bondar', 'Kovalenko', 'Melnyk', 'Shevchenko', 'Tkachenko')),
+                email=f'{prefix}member{i:06d}@example.com',
+                password=password,
+                position=position,
+                organization_id=organization_id,
+            ))
+            for i, position in enumerate(positions)
+        ],
+        batch_size=2000,
+    )
+    Team.objects.bulk_create(
+        [derived(Team(name=f'Team {i:04d}', organization_id=organization_id)) for i in range(team_count)],
+        batch_size=2000,
+    )
+
+    members = list(Member.objects.filter(organization_id=organization_id).order_by('id').values_list('id', 'position'))
+    member_positions = dict(members)
+    one_team = [pk for pk, position in members if position in MemberPosition.only_one_team()]
+    many_teams = [pk for pk, position in members if position not in MemberPosition.only_one_team()]
+    rng.shuffle(one_team)
+    teams = list(Team.objects.filter(organization_id=organization_id).order_by('id').values_list('id', flat=True))
+
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(team_count)]
+    assigned = int(len(one_team) * 0.6)
+    memberships = []
+    for team_id, weight in zip(teams, weights):
+        size = max(round(assigned * weight / sum(weights)), 1)
+        memberships.extend(
+            TeamMembership(
+                member_id=member_id, team_id=team_id,
+                member_position=member_positions[member_id], organization_id=organization_id
+            )
+            for member_id in (one_team.pop() for _ in range(size) if one_team)
+        )
+        memberships.extend(
+            TeamMembership(
+                member_id=member_id, team_id=team_id,
+                member_position=member_positions[member_id], organization_id=organization_id
+            )
+            for member_id in rng.sample(many_teams, min(len(many_teams), rng.randint(1, 3)))
+        )
+    open_periods(TeamMembership.objects.bulk_create(memberships, batch_size=2000))
+    with organization_scope(organization_id):
+        Member.objects.update_availability()
+    # Counts of statistics, as `rebuild_stats` command
+    add(drift(organization_id))
+
+    return {'members': [pk for pk, _ in members], 'teams': teams}
+
+
+def percentile(samples, percent) -> float:
+    """
+    Returns the percentile of the samples (nearest-rank method).
+    """
+    ordered = sorted(samples)
+    index = max(round(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def measure(name, func, repeat, **extra) -> dict:
+    """
+    Calls `func` `repeat` times and collects its latency and query count.
+
+    :param name: The name of the benchmark case.
+    :param func: A callable to benchmark, called with the iteration number.
+        If it returns an HTTP response, its status and size are recorded too
+        (a streaming response is consumed within the measured time).
+    :param repeat: The number of calls.
+    :param extra: Additional columns of the result.
+    :return: A result row with p50/p95 latency in milliseconds,
+        the median and the maximum number of queries per call (the maximum
+        catches queries of first calls and cache misses) and, for responses,
+        the most common status and the median size in bytes.
+    """
+    timings, queries, statuses, sizes = [], [], Counter(), []
+    for i in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = func(i)
+            if hasattr(response, 'status_code'):
+                sizes.append(len(response.getvalue()))
+                statuses[response.status_code] += 1
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(context))
+
+    result = {
+        'name': name,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'queries': round(statistics.median(queries)),
+        'max_queries': max(queries),
+    }
+    if statuses:
+        result['status'] = statuses.most_common(1)[0][0]
+        result['bytes'] = round(statistics.median(sizes))
+    return {**result, **extra}
+
+
+def load_baseline(suite) -> dict:
+    """
+    Returns the checked in query counts of the suite (empty if none).
+    """
+    path = BASELINES_DIR / f'{suite}.json'
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def write_baseline(suite, results):
+    """
+    Writes maximum query counts of the results as the baseline of the suite.
+    """
+    baseline = {result['name']: result['max_queries'] for result in results}
+    BASELINES_DIR.mkdir(exist_ok=True)
+    (BASELINES_DIR / f'{suite}.json').write_text(json.dumps(baseline, indent=4) + '\n')
+
+
+def query_regressions(results, baseline) -> list:
+    """
+    Returns descriptions of results whose call with the most queries
+    exceeds the baseline, so a query added to a cold path is not hidden
+    by warm calls.
+    """
+    return [
+        f"{result['name']}: {result['max_queries']} queries, baseline {baseline[result['name']]}"
+        for result in results
+        if result['name'] in baseline and result['max_queries'] > baseline[result['name']]
+    ]
+
+
+def format_table(rows) -> str:
+    """
+    Formats result rows as a plain text table.
+    """
+    if not rows:
+        return ''
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    widths = {
+        column: max(len(column), *(len(str(row.get(column, ''))) for row in rows))
+        for column in columns
+    }
+    lines = ['  '.join(column.ljust(widths[column]) for column in columns)]
+    lines.extend(
+        '  '.join(str(row.get(column, '')).ljust(widths[column]) for column in columns)
+        for row in rows
+    )
+    return '\n'.join(lines)
@@ -0,0 +1,95 @@
+"""
+Benchmark of organization statistics (`/api/stats/`)
+as the number of members grows while the number of teams does not.
+
+Seeds an organization (see `seed_organization()`) at `--scale`, then grows it
+to `SIZES` times its members, spreading new one-team members over the existing
+teams, and at every size measures the statistics endpoint, a conditional
+request for it and, for comparison, counting the same statistics from
+memberships and members, as the endpoint would have to without maintained counts.
+"""
+
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+
+from api import stats
+from api.history import open_periods
+from api.models import Member, MemberPosition, Organization, Team, TeamMembership
+from api.tenants import organization_scope
+from . import POSITION_WEIGHTS, SEED_PASSWORD, derived, measure, seed_organization
+from .endpoints import client_for
+
+# Multipliers of the seeded members the statistics are measured at
+SIZES = (1, 4, 16)
+
+
+def grow(organization, count, rng):
+    """
+    Adds `count` members to the organization, about 60% of one-team
+    members join random existing teams, and counts them in the statistics.
+    """
+    start = Member._base_manager.filter(organization=organization).count()
+    password = make_password(SEED_PASSWORD)
+    positions = rng.choices(list(POSITION_WEIGHTS), weights=list(POSITION_WEIGHTS.values()), k=count)
+    members = Member.objects.bulk_create(
+        [
+            derived(Member(
+                username=f'{organization.slug}-member{start + i:06d}',
+                email=f'{organization.slug}-member{start + i:06d}@example.com',
+                password=password,
+                position=position,
+                organization=organization,
+            ))
+            for i, position in enumerate(positions)
+        ],
+        batch_size=2000,
+    )
+    teams = list(Team._base_manager.filter(organization=organization).values_list('id', flat=True))
+    open_periods(TeamMembership.objects.bulk_create(
+        [
+            TeamMembership(
+                member_id=member.pk, team_id=rng.choice(teams),
+                member_position=member.position, organization=organization
+            )
+            for member in members
+            if member.position in MemberPosition.only_one_team() and rng.random() < 0.6
+        ],
+        batch_size=2000,
+    ))
+    with organization_scope(organization.pk):
+        Member.objects.update_availability()
+    stats.add(stats.drift(organization.pk))
+
+
+def run(scale=1.0, repeat=100) -> list:
+    rng = random.Random(0)
+    organization = Organization.objects.create(name='Growing', slug='growing')
+    seed_organization(scale, organization=organization)
+    seeded = Member._base_manager.filter(organization=organization).count()
+    client = client_for(Member._base_manager.filter(organization=organization, is_manager=True).first())
+
+    results = []
+    for size in SIZES:
+        grow(organization, seeded * size - Member._base_manager.filter(organization=organization).count(), rng)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cache.clear()
+
+        members = seeded * size
+        response = client.get('/api/stats/')
+        teams = len(response.data['teams'])
+
+        results.append(measure(
+            f'stats@{size}', lambda i: client.get('/api/stats/'), repeat, members=members, teams=teams
+        ))
+        results.append(measure(
+            f'stats-not-modified@{size}', lambda i: client.get('/api/stats/', HTTP_IF_NONE_MATCH=response['ETag']),
+            repeat, members=members, teams=teams
+        ))
+        results.append(measure(
+            f'counted@{size}', lambda i: stats.expected_counts(organization.pk), repeat, members=members, teams=teams
+        ))
+    return results
@@ -0,0 +1,61 @@
+"""
+Benchmark of the change feed (`/api/changes/`), in events per second.
+
+Seeds an organization (see `seed_organization()`) and records
+an event for each of its members, teams and memberships, as if they
+had just been created. A consumer then follows the feed page by page
+with different page sizes and finally drains the whole feed.
+"""
+
+from api.models import ChangeAction, ChangeEvent, Member, Team, TeamMembership
+from api.outbox import change_events
+from . import measure, seed_organization
+from .endpoints import client_for
+
+PAGE_SIZES = (100, 500, 2000)
+
+
+def seed_events() -> int:
+    """
+    Records a created event for every member, team and membership.
+
+    :return: The number of recorded events.
+    """
+    count = 0
+    for model in (Member, Team, TeamMembership):
+        events = change_events(model, model.objects.order_by('pk'), ChangeAction.CREATED)
+        count += len(ChangeEvent.objects.bulk_create(events, batch_size=2000))
+    return count
+
+
+def run(scale=1.0, repeat=100) -> list:
+    seed_organization(scale)
+    events = seed_events()
+    client = client_for(Member.objects.filter(is_manager=True).first())
+
+    def follow(page_size):
+        cursor = {'since': 0}
+
+        def next_page(i):
+            response = client.get('/api/changes/', {'since': cursor['since'], 'limit': page_size})
+            # Starts over at the end of the feed
+            cursor['since'] = response.data['next'] if response.data['has_more'] else 0
+            return response
+        return next_page
+
+    def drain(i):
+        since, has_more = 0, True
+        while has_more:
+            response = client.get('/api/changes/', {'since': since, 'limit': PAGE_SIZES[-1]})
+            since, has_more = response.data['next'], response.data['has_more']
+        return response
+
+    results = []
+    for page_size in PAGE_SIZES:
+        result = measure(f'page of {page_size}', follow(page_size), repeat, events=page_size)
+        result['events_per_s'] = round(page_size / result['p50_ms'] * 1000)
+        results.append(result)
+    result = measure(f'drain {events} events', drain, max(repeat // 20, 1), events=events)
+    result['events_per_s'] = round(events / result['p50_ms'] * 1000)
+    results.append(result)
+    return results
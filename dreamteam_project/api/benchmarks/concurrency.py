@@ -0,0 +1,134 @@
+"""
+Load test of the read endpoints served by WSGI (sync views)
+and by ASGI (async views, see `AsyncReadMixin`).
+
+Seeds an organization (see `seed_organization()`) and for every
+concurrency level lets that many clients send requests back to back,
+`--repeat` requests in total:
+— WSGI requests go through the WSGI handler (the test `Client`) and are
+    served by `WSGI_THREADS` threads at once, like a threaded worker;
+— ASGI requests go through the ASGI handler (the test `AsyncClient`)
+    on a single event loop, like one ASGI worker.
+
+Reports throughput and p50/p99 latency as seen by the clients.
+Both run in one process, so the numbers compare the cost of serving
+many concurrent clients by one worker, not multi-core scaling.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import Counter
+from types import ModuleType
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from django.urls import include, path
+
+from api.API.tokens import MemberRefreshToken
+from api.models import Member
+from api.urls import resource_urls
+from . import percentile, seed_organization
+
+ENDPOINTS = ('member-positions/', 'available-members/', 'all-members/', 'teams/')
+
+CONCURRENCY = (1, 16, 64, 256)
+
+# Requests a threaded WSGI worker serves at once
+WSGI_THREADS = 8
+
+
+def urlconf(async_views) -> ModuleType:
+    """
+    Returns a URL configuration with the API resources served by sync or async views.
+    """
+    module = ModuleType(f'api.benchmarks.concurrency.urls_{"asgi" if async_views else "wsgi"}')
+    module.urlpatterns = [path('api/', include(resource_urls(async_views)))]
+    return module
+
+
+def run_wsgi(url, headers, concurrency, per_client) -> tuple:
+    """
+    Sends requests of `concurrency` client threads, served by `WSGI_THREADS` at once.
+
+    :return: Latencies in milliseconds, response statuses and the elapsed time in seconds.
+    """
+    workers = threading.Semaphore(WSGI_THREADS)
+    timings, statuses = [], Counter()
+
+    def client():
+        http = Client()
+        try:
+            for _ in range(per_client):
+                started = time.perf_counter()
+                with workers:
+                    response = http.get(url, headers=headers)
+                timings.append((time.perf_counter() - started) * 1000)
+                statuses[response.status_code] += 1
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings, statuses, time.perf_counter() - started
+
+
+async def run_asgi(url, headers, concurrency, per_client) -> tuple:
+    """
+    Sends requests of `concurrency` client tasks on the event loop.
+
+    :return: Latencies in milliseconds, response statuses and the elapsed time in seconds.
+    """
+    timings, statuses = [], Counter()
+
+    async def client():
+        http = AsyncClient()
+        for _ in range(per_client):
+            started = time.perf_counter()
+            response = await http.get(url, headers=headers)
+            timings.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await sync_to_async(connections.close_all)()
+    return timings, statuses, elapsed
+
+
+def result(name, timings, statuses, elapsed) -> dict:
+    return {
+        'name': name,
+        'requests': len(timings),
+        'req_per_s': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'status': statuses.most_common(1)[0][0],
+    }
+
+
+def run(scale=1.0, repeat=100) -> list:
+    seed_organization(scale)
+    manager = Member.objects.filter(is_manager=True).first()
+    headers = {'Authorization': f'Bearer {MemberRefreshToken.for_user(manager).access_token}'}
+
+    results = []
+    for endpoint in ENDPOINTS:
+        url = f'/api/{endpoint}'
+        for concurrency in CONCURRENCY:
+            per_client = math.ceil(repeat / concurrency)
+            with override_settings(ROOT_URLCONF=urlconf(async_views=False)):
+                results.append(result(
+                    f'{endpoint}, wsgi, c={concurrency}', *run_wsgi(url, headers, concurrency, per_client)
+                ))
+            with override_settings(ROOT_URLCONF=urlconf(async_views=True)):
+                results.append(result(
+                    f'{endpoint}, asgi, c={concurrency}', *asyncio.run(run_asgi(url, headers, concurrency, per_client))
+                ))
+    return results
@@ -0,0 +1,140 @@
+"""
+Benchmark of every route in `api/urls.py`.
+
+Seeds a realistic organization (see `seed_organization()`) and measures
+query count, p50/p95 latency and response size of each endpoint,
+authenticated with real JWT access tokens. Write endpoints work on
+objects reserved for them, so every call does the same amount of work.
+"""
+
+from datetime import date
+
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api import history, stats
+from api.API.tokens import MemberRefreshToken
+from api.models import Member, MemberPosition, Team, TeamMembership
+from . import SEED_PASSWORD, derived, measure, seed_organization
+
+
+def client_for(member) -> APIClient:
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {MemberRefreshToken.for_user(member).access_token}')
+    return client
+
+
+def reserve_members(prefix, count, position=MemberPosition.JUNIOR) -> list:
+    """
+    Creates members used up by write endpoints.
+    """
+    seeded = Member.objects.only('password', 'organization_id').first()
+    return Member.objects.bulk_create([
+        derived(Member(
+            username=f'{prefix}{i:06d}', email=f'{prefix}{i:06d}@example.com', password=seeded.password,
+            position=position, organization_id=seeded.organization_id,
+        ))
+        for i in range(count)
+    ])
+
+
+def cases(data, repeat) -> list:
+    """
+    Returns (name, callable) pairs, one per endpoint and method.
+    """
+    manager = Member.objects.filter(is_manager=True).first()
+    manager_client = client_for(manager)
+    member = Member.objects.filter(
+        position=MemberPosition.JUNIOR, team_memberships__isnull=False
+    ).first()
+    member_client = client_for(member)
+    own_team = member.team_memberships.first().team_id
+    teams = data['teams']
+    # Members in a team, so every call also loads and invalidates teams.
+    members = list(
+        TeamMembership.objects.order_by('member_id').values_list('member_id', flat=True).distinct()[:repeat]
+    )
+
+    spare_teams = Team.objects.bulk_create([derived(Team(name=f'Spare Team {i:04d}')) for i in range(repeat)])
+    to_delete = reserve_members('delete', repeat)
+    to_add = reserve_members('add', repeat)
+    to_add_in_bulk = reserve_members('bulk', repeat * 20)
+    to_login = reserve_members('login', repeat)
+    memberships = TeamMembership.objects.bulk_create(
+        [
+            TeamMembership(
+                member=spare, team=spare_teams[0],
+                member_position=spare.position, organization_id=spare.organization_id
+            )
+            for spare in reserve_members('leave', repeat)
+        ]
+    )
+    history.open_periods(memberships)
+    Member.objects.update_availability(membership.member_id for membership in memberships)
+    stats.add(stats.drift())
+    refresh_tokens = [str(MemberRefreshToken.for_user(member)) for _ in range(repeat)]
+    logout_tokens = [str(MemberRefreshToken.for_user(member)) for _ in range(repeat)]
+    for _ in range(20):
+        MemberRefreshToken.for_user(manager)
+
+    return [
+        ('member-positions', lambda i: member_client.get('/api/member-positions/')),
+        ('available-members', lambda i: manager_client.get('/api/available-members/')),
+        ('members-list', lambda i: manager_client.get('/api/all-members/')),
+        ('members-list-sparse', lambda i: manager_client.get('/api/all-members/', {'fields': 'id,username'})),
+        ('members-search', lambda i: manager_client.get('/api/all-members/', {'search': f'member{i:04d}'})),
+        ('members-retrieve', lambda i: manager_client.get(f'/api/all-members/{members[i % len(members)]}/')),
+        ('members-retrieve-own', lambda i: member_client.get(f'/api/all-members/{member.id}/')),
+        ('members-tenures', lambda i: manager_client.get(f'/api/all-members/{members[i % len(members)]}/tenures/')),
+        ('members-create', lambda i: manager_client.post('/api/all-members/', {
+            'username': f'created{i:06d}', 'email': f'created{i:06d}@example.com',
+            'password': SEED_PASSWORD, 'position': MemberPosition.JUNIOR,
+        })),
+        ('members-update', lambda i: manager_client.patch(f'/api/all-members/{members[i % len(members)]}/', {
+            'first_name': f'Renamed{i}',
+        })),
+        ('members-delete', lambda i: manager_client.delete(f'/api/all-members/{to_delete[i].id}/')),
+        ('teams-list', lambda i: manager_client.get('/api/teams/')),
+        ('teams-list-sparse', lambda i: manager_client.get('/api/teams/', {'fields': 'id,name'})),
+        ('teams-list-member-ids', lambda i: manager_client.get('/api/teams/', {'fields': 'id,members'})),
+        ('teams-search', lambda i: manager_client.get('/api/teams/', {'search': f'Team 00{i % 10}'})),
+        ('teams-retrieve-largest', lambda i: manager_client.get(f'/api/teams/{teams[0]}/')),
+        ('teams-retrieve', lambda i: manager_client.get(f'/api/teams/{teams[i % len(teams)]}/')),
+        ('teams-retrieve-own', lambda i: member_client.get(f'/api/teams/{own_team}/')),
+        ('teams-retrieve-as-of', lambda i: manager_client.get(f'/api/teams/{teams[0]}/', {
+            'as_of': date.today().isoformat(),
+        })),
+        ('teams-create', lambda i: manager_client.post('/api/teams/', {'name': f'Created Team {i:04d}'})),
+        ('teams-update', lambda i: manager_client.patch(f'/api/teams/{spare_teams[i].id}/', {
+            'name': f'Renamed Team {i:04d}',
+        })),
+        ('team-add-member', lambda i: manager_client.post('/api/team-add-member/', {
+            'member': to_add[i].id, 'team': spare_teams[i].id,
+        })),
+        ('team-bulk-edit-members', lambda i: manager_client.post('/api/team-bulk-edit-members/', {
+            'add': [
+                {'member': spare.id, 'team': spare_teams[i].id}
+                for spare in to_add_in_bulk[i * 20:(i + 1) * 20]
+            ],
+        }, format='json')),
+        ('team-delete-member', lambda i: manager_client.delete(f'/api/team-delete-member/{memberships[i].id}/')),
+        ('teams-delete', lambda i: manager_client.delete(f'/api/teams/{spare_teams[i].id}/')),
+        ('export-ndjson', lambda i: manager_client.get('/api/export/', {'format': 'ndjson'})),
+        ('export-json', lambda i: manager_client.get('/api/export/')),
+        ('changes', lambda i: manager_client.get('/api/changes/', {'limit': 100})),
+        ('stats', lambda i: manager_client.get('/api/stats/')),
+        ('login', lambda i: APIClient().post('/api/login/token/', {
+            'username': to_login[i].username, 'password': SEED_PASSWORD,
+        })),
+        ('token-refresh', lambda i: APIClient().post('/api/login/token/refresh/', {
+            'refresh': refresh_tokens[i],
+        })),
+        ('logout', lambda i: member_client.post('/api/logout/', {'refresh_token': logout_tokens[i]})),
+        ('logout-all', lambda i: manager_client.post('/api/logout-all/')),
+    ]
+
+
+def run(scale=1.0, repeat=100) -> list:
+    data = seed_organization(scale)
+    cache.clear()
+    return [measure(name, func, repeat) for name, func in cases(data, repeat)]
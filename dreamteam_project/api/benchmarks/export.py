@@ -0,0 +1,43 @@
+"""
+Benchmark of the streaming organization export (`api.API.export`).
+
+Seeds an organization (see `seed_organization()`) and consumes
+the export in each format, reporting latency and the peak of memory
+allocated while streaming, which should not grow with `--scale`.
+"""
+
+import tracemalloc
+
+from api.API.export import FORMATS
+from . import measure, seed_organization
+
+
+def consume(chunks) -> int:
+    return sum(len(chunk) for chunk in chunks)
+
+
+def peak_memory(export_format) -> int:
+    """
+    Returns the peak of memory allocated while streaming the export, in KiB.
+    """
+    tracemalloc.start()
+    try:
+        consume(FORMATS[export_format]())
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run(scale=1.0, repeat=100) -> list:
+    data = seed_organization(scale)
+    return [
+        measure(
+            f'export, {export_format}',
+            lambda i: consume(FORMATS[export_format]()),
+            repeat,
+            members=len(data['members']),
+            bytes=consume(FORMATS[export_format]()),
+            peak_kib=peak_memory(export_format),
+        )
+        for export_format in FORMATS
+    ]
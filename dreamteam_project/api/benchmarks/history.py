@@ -0,0 +1,89 @@
+"""
+Benchmark of team rosters on past dates (`/api/teams/<id>/?as_of=`)
+and tenures of members, over a long membership history.
+
+Seeds an organization (see `seed_organization()`) and `1000000 * scale`
+closed history periods over the last ten years, as if members had kept
+moving between teams for assignments of up to two months; larger teams
+get more periods, so past rosters are about as large as current ones.
+Rosters of the largest and of a median team are then retrieved as of
+dates from today back to ten years ago, and tenures of members are read.
+"""
+
+import random
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db import connection
+
+from api import history
+from api.models import Member, MembershipPeriod, Organization, TeamMembership
+from . import measure, seed_organization
+from .endpoints import client_for
+
+ROWS = 1_000_000
+
+YEARS = 10
+
+# Dates the rosters are retrieved as of, in days before today
+DAYS_AGO = (0, 365, 5 * 365, YEARS * 365)
+
+
+def seed_history(data, scale=1.0, seed=0, batch_size=5000) -> int:
+    """
+    Seeds closed history periods of the seeded members and teams.
+
+    :param data: The result of `seed_organization()`.
+    :return: The number of seeded periods.
+    """
+    rng = random.Random(seed)
+    count = max(int(ROWS * scale), 1000)
+    teams, members = data['teams'], data['members']
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(len(teams))]
+    organization_id = Organization.objects.default_id()
+    today = date.today()
+    # Periods of deleted memberships, their IDs follow the current ones
+    membership_id = TeamMembership.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        periods = []
+        for team_id in rng.choices(teams, weights=weights, k=size):
+            membership_id += 1
+            joined = today - timedelta(days=rng.randint(1, YEARS * 365))
+            left = min(joined + timedelta(days=rng.randint(1, 60)), today)
+            periods.append(MembershipPeriod(
+                organization_id=organization_id, member_id=rng.choice(members), team_id=team_id,
+                membership_id=membership_id, date_joined=joined, date_left=left,
+            ))
+        MembershipPeriod.objects.bulk_create(periods)
+    return count
+
+
+def run(scale=1.0, repeat=100) -> list:
+    data = seed_organization(scale)
+    seed_history(data, scale)
+    rows = MembershipPeriod.objects.count()
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    cache.clear()
+
+    client = client_for(Member.objects.filter(is_manager=True).first())
+    teams = {'largest': data['teams'][0], 'median': data['teams'][len(data['teams']) // 2]}
+    today = date.today()
+    results = []
+    for name, team_id in teams.items():
+        team_rows = MembershipPeriod.objects.filter(team_id=team_id).count()
+        for days in DAYS_AGO:
+            as_of = (today - timedelta(days=days)).isoformat()
+            results.append(measure(
+                f'{name} team as of -{days}d',
+                lambda i: client.get(f'/api/teams/{team_id}/', {'as_of': as_of}),
+                repeat, rows=rows, team_rows=team_rows,
+            ))
+
+    members = data['members']
+    results.append(measure(
+        'member tenures', lambda i: history.tenures(members[i % len(members)]), repeat, rows=rows
+    ))
+    return results
@@ -0,0 +1,50 @@
+"""
+Benchmark of member and team search
+with DRF `SearchFilter` and with `IndexedSearchFilter`.
+
+Seeds an organization (`10000 * scale` members, use `--scale 10`
+for 100k members) and requests the first page of search results
+for typical directory searches in each mode.
+"""
+
+from unittest import mock
+
+from django.core.cache import cache
+from rest_framework.filters import SearchFilter
+from rest_framework.test import APIClient
+
+from api.API.filters import IndexedSearchFilter
+from api.API.tokens import MemberRefreshToken
+from api.API.views import MembersAllViewSet, TeamViewSet
+from api.models import Member
+from . import measure, seed_organization
+
+# (name, URL, search terms)
+SEARCHES = [
+    ('members, common prefix', '/api/all-members/', 'mel'),
+    ('members, username', '/api/all-members/', 'member00999'),
+    ('members, first and last name', '/api/all-members/', 'taras shevchenko'),
+    ('members, no match', '/api/all-members/', 'nobody'),
+    ('teams, name', '/api/teams/', 'team 01'),
+]
+
+
+def run(scale=1.0, repeat=100) -> list:
+    seed_organization(scale)
+    cache.clear()
+    manager = Member.objects.filter(is_manager=True).first()
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {MemberRefreshToken.for_user(manager).access_token}')
+    results = []
+
+    for backend in (SearchFilter, IndexedSearchFilter):
+        with mock.patch.object(MembersAllViewSet, 'filter_backends', (backend,)), \
+                mock.patch.object(TeamViewSet, 'filter_backends', (backend,)):
+            for name, url, terms in SEARCHES:
+                results.append(measure(
+                    f'{name}, {backend.__name__}',
+                    lambda i: client.get(url, {'search': terms}),
+                    repeat,
+                    found=len(client.get(url, {'search': terms}).data['results']),
+                ))
+    return results
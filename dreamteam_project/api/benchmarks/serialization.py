@@ -0,0 +1,56 @@
+"""
+Microbenchmark of member and team serialization, in rows per second,
+with DRF serializers and `JSONRenderer` and with the fast path
+(`api.API.fastpath` and `FastJSONRenderer`).
+
+Seeds an organization (see `seed_organization()`) and serializes
+and renders all its members and team rosters in each mode.
+"""
+
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from api.API.fastpath import MemberValuesSerializer, TeamValuesSerializer
+from api.API.renderers import FastJSONRenderer
+from api.API.serializers import MembersViewSerializer, TeamViewSerializer
+from api.API.views import TeamViewSet
+from api.models import Member, TeamMembership
+from . import measure, seed_organization
+
+
+def drf_members():
+    members = Member.objects.only('username', 'first_name', 'last_name', 'position', 'email').prefetch_related(
+        Prefetch('team_memberships', queryset=TeamMembership.objects.select_related('team').order_by('pk'))
+    )
+    return JSONRenderer().render(MembersViewSerializer(members, many=True).data)
+
+
+def fast_members():
+    fast_serializer = MemberValuesSerializer()
+    return FastJSONRenderer().render(fast_serializer.serialize(fast_serializer.values(Member.objects.all())))
+
+
+def drf_teams(team_ids):
+    teams = TeamViewSet.queryset.filter(pk__in=team_ids)
+    return JSONRenderer().render(TeamViewSerializer(teams, many=True).data)
+
+
+def fast_teams(team_ids):
+    return FastJSONRenderer().render(list(TeamValuesSerializer().serialize(team_ids).values()))
+
+
+def run(scale=1.0, repeat=100) -> list:
+    data = seed_organization(scale)
+    member_count, team_count = len(data['members']), len(data['teams'])
+    cases = [
+        ('members, DRF', lambda i: drf_members(), member_count),
+        ('members, fast path', lambda i: fast_members(), member_count),
+        ('team rosters, DRF', lambda i: drf_teams(data['teams']), team_count),
+        ('team rosters, fast path', lambda i: fast_teams(data['teams']), team_count),
+    ]
+    results = []
+    for name, func, rows in cases:
+        result = measure(name, func, repeat, rows=rows)
+        result['rows_per_s'] = round(rows / result['p50_ms'] * 1000)
+        results.append(result)
+    return results
@@ -0,0 +1,47 @@
+"""
+Benchmark of read endpoints of one organization
+as more organizations are hosted by the deployment.
+
+Seeds the measured organization (see `seed_organization()`), measures
+its read endpoints, then seeds more organizations of the same size
+and measures them again. Queries of a request only touch the rows
+of its organization (see `api.tenants`), so query count and latency
+should not grow with the number of organizations.
+"""
+
+from django.core.cache import cache
+from django.db import connection
+
+from api.models import Organization
+from . import endpoints, measure, seed_organization
+
+# Numbers of organizations the endpoints are measured at
+TENANTS = (1, 5, 20)
+
+READS = (
+    'available-members',
+    'members-list',
+    'members-search',
+    'members-retrieve',
+    'teams-list',
+    'teams-search',
+    'teams-retrieve-largest',
+    'export-ndjson',
+)
+
+
+def run(scale=1.0, repeat=100) -> list:
+    data = seed_organization(scale)
+    cases = [(name, func) for name, func in endpoints.cases(data, repeat) if name in READS]
+    results = []
+    seeded = 1
+    for tenants in TENANTS:
+        for i in range(seeded, tenants):
+            organization = Organization.objects.create(name=f'Tenant {i:02d}', slug=f'tenant{i:02d}')
+            seed_organization(scale, seed=i, organization=organization)
+        seeded = tenants
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cache.clear()
+        results.extend(measure(f'{name}@{tenants}', func, repeat, tenants=tenants) for name, func in cases)
+    return results
@@ -0,0 +1,55 @@
+"""
+Benchmark of `login/token/refresh/` latency
+with and without the in-memory blacklist filter.
+
+Seeds `20000 * scale` blacklisted tokens, then refreshes `repeat`
+valid tokens in each mode.
+"""
+
+import datetime as dt
+import uuid
+
+from django.conf import settings
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.API.blacklist import blacklist_filter
+from api.models import Member
+from . import measure
+
+
+def seed(scale):
+    member = Member.objects.create(username='benchmark', position='PM')
+    expires_at = timezone.now() + dt.timedelta(days=1)
+    tokens = OutstandingToken.objects.bulk_create(
+        [
+            OutstandingToken(user=member, jti=uuid.uuid4().hex, token='', expires_at=expires_at)
+            for _ in range(int(20000 * scale))
+        ],
+        batch_size=1000,
+    )
+    BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in tokens], batch_size=1000)
+    return member
+
+
+def run(scale=1.0, repeat=100) -> list:
+    member = seed(scale)
+    client = APIClient()
+    results = []
+
+    for enabled in (False, True):
+        config = {**settings.TOKEN_BLACKLIST_FILTER, 'ENABLED': enabled}
+        with override_settings(TOKEN_BLACKLIST_FILTER=config):
+            blacklist_filter.bloom = None
+            blacklist_filter.might_contain('warm-up')
+            tokens = [str(RefreshToken.for_user(member)) for _ in range(repeat)]
+            results.append(measure(
+                f"refresh, filter {'on' if enabled else 'off'}",
+                lambda i: client.post('/api/login/token/refresh/', {'refresh': tokens[i]}),
+                repeat,
+                blacklisted=BlacklistedToken.objects.count(),
+            ))
+    return results
@@ -0,0 +1,6 @@
+"""
+The package represents DATABASE connection management used in the project:
+the read replica router (`routers`) and the pooled PostgreSQL backend
+(`postgresql_pool`), both configured by `DATABASES_*` environment variables,
+and inspection of query plans (`explain`).
+"""
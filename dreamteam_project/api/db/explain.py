@@ -0,0 +1,75 @@
+"""
+The module represents QUERY PLAN inspection used in the project.
+
+Statements are explained with the database's own `EXPLAIN`
+and full scans of tables are picked out of the plans:
+
+— PostgreSQL: `Seq Scan` nodes of `EXPLAIN (FORMAT JSON)`;
+— SQLite: `SCAN <table>` steps of `EXPLAIN QUERY PLAN`
+    that use no index (scans of FTS5 tables and subqueries are skipped).
+"""
+
+import json
+import re
+
+# Statements with a plan worth checking
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE')
+
+# Tables and their aliases in SQL generated by Django: "members" U0
+TABLE_ALIAS = re.compile(r'"(\w+)" (?:AS )?"?([A-Z]\d+)\b')
+
+SQLITE_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def explain(connection, sql) -> list:
+    """
+    Returns the plan of the statement as lines of text.
+
+    :param connection: The database connection to explain the statement with.
+    :param sql: The statement with interpolated parameters.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}')
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def sequential_scans(connection, sql) -> list:
+    """
+    Returns names of the tables the statement reads with a full scan.
+
+    :param connection: The database connection to explain the statement with.
+    :param sql: The statement with interpolated parameters.
+    :return: Table names, one per scan, empty if the database is not supported.
+    """
+    if not sql.lstrip().upper().startswith(EXPLAINED):
+        return []
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return list(postgresql_scans(plan[0]['Plan']))
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            aliases = {alias: table for table, alias in TABLE_ALIAS.findall(sql)}
+            return [
+                aliases.get(match[1], match[1])
+                for match in (SQLITE_SCAN.match(row[-1]) for row in cursor.fetchall())
+                if match
+            ]
+    return []
+
+
+def postgresql_scans(node):
+    """
+    Yields relations of the `Seq Scan` nodes of a PostgreSQL plan.
+    """
+    if node['Node Type'] == 'Seq Scan':
+        yield node['Relation Name']
+    for child in node.get('Plans', ()):
+        yield from postgresql_scans(child)
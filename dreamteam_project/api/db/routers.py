@@ -0,0 +1,64 @@
+"""
+The module represents DATABASE ROUTERS used in the project.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Alias of the database reads of the current request are sent to,
+# `None` stands for the primary database.
+read_alias = ContextVar('read_alias', default=None)
+
+
+def read_from_replica():
+    """
+    Sends reads of the current context to a replica chosen at random
+    (the primary database if no replica is configured).
+
+    :return: A token restoring the previous state with `read_alias.reset()`.
+    """
+    replicas = settings.DATABASE_REPLICAS
+    return read_alias.set(random.choice(replicas) if replicas else None)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Sends reads within the block to the primary database.
+    """
+    token = read_alias.set(None)
+    try:
+        yield
+    finally:
+        read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Database router sending reads to the replica chosen by `read_from_replica()`
+    (see `ReplicaReadMixin`) and everything else to the primary database.
+
+    Reads within a transaction of the primary database stay on it,
+    so `select_for_update()` and reads after writes see the written rows.
+    Replicas are configured by `DATABASE_REPLICAS` setting.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary database.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
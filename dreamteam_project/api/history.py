@@ -0,0 +1,135 @@
+"""
+The module represents the TEAM MEMBERSHIP HISTORY used in the project.
+
+Every membership has a `MembershipPeriod` opened when the member
+is added to the team and closed when the membership is deleted
+(see receivers in `api.signals`), so past rosters of a team
+(`/api/teams/<id>/?as_of=YYYY-MM-DD`) and tenures of a member
+(`/api/all-members/<id>/tenures/`) are answered from the history
+with a single query on its indexes. Periods outlive deleted members
+and teams, see `detach_periods()`.
+"""
+
+from datetime import date
+
+from django.db.models import Q, Value
+from django.db.models.functions import Coalesce
+
+from .models import Member, MembershipPeriod
+
+# Fields of members in rosters, as in `MemberInTeamSerializer`
+MEMBER_FIELDS = ('username', 'first_name', 'last_name', 'position')
+
+
+def open_periods(memberships):
+    """
+    Opens periods of the created memberships with a single query.
+    """
+    MembershipPeriod.objects.bulk_create([
+        MembershipPeriod(
+            organization_id=membership.organization_id,
+            member_id=membership.member_id,
+            team_id=membership.team_id,
+            membership_id=membership.pk,
+            date_joined=membership.date_joined or date.today(),
+        )
+        for membership in memberships
+    ])
+
+
+def close_periods(memberships, date_left=None):
+    """
+    Closes open periods of the deleted memberships with a single query.
+
+    :param memberships: The deleted memberships, with their primary keys.
+    :param date_left: The date the members left, today by default.
+    """
+    if membership_ids := [membership.pk for membership in memberships]:
+        MembershipPeriod._base_manager.filter(membership_id__in=membership_ids, date_left__isnull=True).update(
+            date_left=date_left or date.today()
+        )
+
+
+def detach_periods(instance):
+    """
+    Prepares periods of a member or team being deleted to outlive it
+    with a single query: closes its open periods and keeps its username
+    or name, the foreign key is then set to NULL by the deletion.
+    """
+    if isinstance(instance, Member):
+        periods, kept = {'member': instance}, {'member_username': instance.username}
+    else:
+        periods, kept = {'team': instance}, {'team_name': instance.name}
+    MembershipPeriod._base_manager.filter(**periods).update(
+        date_left=Coalesce('date_left', Value(date.today())), **kept
+    )
+
+
+def periods_on(day):
+    """
+    Returns a queryset of periods of the current organization
+    the members were in their teams on the date.
+    """
+    return MembershipPeriod.objects.filter(Q(date_left__isnull=True) | Q(date_left__gt=day), date_joined__lte=day)
+
+
+def roster_query(team_id, day):
+    """
+    Returns a queryset of the roster of the team on the date, ordered
+    as current rosters, in the shape of `TeamMembershipSerializer`
+    (see `roster_entry()`); members are shown as they are now,
+    deleted members by their username without an ID.
+    """
+    return periods_on(day).filter(team_id=team_id).order_by('membership_id').values(
+        'membership_id', 'member_id', 'member_username', 'date_joined',
+        *(f'member__{field}' for field in MEMBER_FIELDS)
+    )
+
+
+def roster_entry(row) -> dict:
+    """
+    Returns a row of `roster_query()` as a serialized membership.
+    """
+    member = {field: row[f'member__{field}'] for field in MEMBER_FIELDS}
+    if row['member_id'] is None:
+        member['username'] = row['member_username']
+    return {
+        'id': row['membership_id'],
+        'date_joined': row['date_joined'].isoformat(),
+        'member': member,
+    }
+
+
+def tenure_query(member_id, day):
+    """
+    Returns a queryset of periods of the member up to the date,
+    from the earliest, in the shape `tenure_entry()` takes.
+    """
+    return MembershipPeriod.objects.filter(member_id=member_id, date_joined__lte=day).order_by('date_joined').values(
+        'team_id', 'team__name', 'team_name', 'date_joined', 'date_left'
+    )
+
+
+def tenure_entry(row, day) -> dict:
+    """
+    Returns a row of `tenure_query()` as a tenure up to the date, with the number
+    of days the member was in the team within it. A deleted team has no ID
+    and is named as it was when it was deleted.
+    """
+    return {
+        'team_id': row['team_id'],
+        'team_name': row['team__name'] or row['team_name'],
+        'date_joined': row['date_joined'],
+        'date_left': row['date_left'],
+        'days': (min(row['date_left'] or day, day) - row['date_joined']).days,
+    }
+
+
+def tenures(member_id, day=None) -> list:
+    """
+    Returns tenures of the member in teams up to the date (today by default), from the earliest.
+
+    :return: A list of dictionaries with `team_id`, `team_name`, `date_joined`, `date_left` and `days`.
+    """
+    day = day or date.today()
+    return [tenure_entry(row, day) for row in tenure_query(member_id, day)]
@@ -0,0 +1,60 @@
+"""
+Management command to run a benchmark suite from `api.benchmarks`.
+
+    python manage.py benchmark token_refresh --scale 5 --repeat 500
+    python manage.py benchmark endpoints --scale 0.1 --check
+"""
+
+import importlib
+import pkgutil
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import benchmarks
+from api.benchmarks import (
+    benchmark_database,
+    format_table,
+    load_baseline,
+    query_regressions,
+    write_baseline
+)
+
+SUITES = sorted(module.name for module in pkgutil.iter_modules(benchmarks.__path__))
+
+
+class Command(BaseCommand):
+    help = 'Runs a benchmark suite against a throwaway test database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('suite', choices=SUITES, help='The benchmark suite to run.')
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help='Multiplier of the seeded data volume.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=100,
+            help='Number of measured calls per benchmark case.'
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Fail if query counts exceed the checked in baseline.'
+        )
+        parser.add_argument(
+            '--write-baseline', action='store_true',
+            help='Save query counts as the new baseline of the suite.'
+        )
+
+    def handle(self, *args, **options):
+        suite = importlib.import_module(f"api.benchmarks.{options['suite']}")
+        with benchmark_database():
+            results = suite.run(scale=options['scale'], repeat=options['repeat'])
+        self.stdout.write(format_table(results))
+
+        if options['write_baseline']:
+            write_baseline(options['suite'], results)
+            self.stdout.write(self.style.SUCCESS('Baseline written.'))
+
+        if options['check']:
+            if regressions := query_regressions(results, load_baseline(options['suite'])):
+                raise CommandError('Query count regressions:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('Query counts are within the baseline.'))
@@ -0,0 +1,47 @@
+"""
+Management command to compact the change event outbox (see `api.outbox`).
+
+Of the events older than the retention period only the latest event
+of each object is kept, deleted events older than the tombstone period
+are removed. Meant to be run periodically (e.g. daily by cron):
+
+    python manage.py compact_changes --days 7 --tombstone-days 30
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.outbox import compact
+
+
+class Command(BaseCommand):
+    help = 'Compacts change events older than the retention period to the latest event of each object.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.CHANGE_FEED['RETENTION_DAYS'],
+            help='Events older than this are compacted.'
+        )
+        parser.add_argument(
+            '--tombstone-days', type=int, default=settings.CHANGE_FEED['TOMBSTONE_DAYS'],
+            help='Deleted events older than this are removed.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of events checked per query.'
+        )
+
+    def handle(self, *args, **options):
+        if options['tombstone_days'] < options['days']:
+            raise CommandError('--tombstone-days must not be shorter than --days.')
+
+        now = timezone.now()
+        removed = compact(
+            older_than=now - timedelta(days=options['days']),
+            tombstones_older_than=now - timedelta(days=options['tombstone_days']),
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} change events.'))
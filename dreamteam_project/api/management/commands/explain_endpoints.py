@@ -0,0 +1,95 @@
+"""
+Management command to explain the queries of every API endpoint
+and flag full scans of large tables.
+
+Seeds an organization in a throwaway test database (as the `endpoints`
+benchmark does), calls every endpoint once and runs `EXPLAIN` on each
+of its queries (see `api.db.explain`):
+
+    python manage.py explain_endpoints --scale 1
+    python manage.py explain_endpoints --check --verbosity 2
+"""
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.benchmarks import benchmark_database, endpoints, format_table, seed_organization
+from api.db.explain import explain, sequential_scans
+
+# Endpoints reading whole tables by design
+FULL_READS = ('export-ndjson', 'export-json')
+
+
+class Command(BaseCommand):
+    help = 'Explains queries of every API endpoint on seeded data and flags sequential scans.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help='Multiplier of the seeded data volume.'
+        )
+        parser.add_argument(
+            '--min-rows', type=int, default=1000,
+            help='Scans of tables with fewer rows are not flagged.'
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Fail if any endpoint scans a large table.'
+        )
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            data = seed_organization(options['scale'])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            rows = self.explain_endpoints(data, options['min_rows'], options['verbosity'])
+        self.stdout.write(format_table(rows))
+
+        flagged = [row['name'] for row in rows if row['scans'] and row['name'] not in FULL_READS]
+        if options['check']:
+            if flagged:
+                raise CommandError('Sequential scans in: ' + ', '.join(flagged))
+            self.stdout.write(self.style.SUCCESS('No sequential scans of large tables.'))
+
+    def explain_endpoints(self, data, min_rows, verbosity) -> list:
+        """
+        Calls every endpoint once and explains its queries.
+
+        :param data: The seeded organization, see `seed_organization()`.
+        :param min_rows: Size from which a scanned table is flagged.
+        :param verbosity: Plans of queries with flagged scans are written
+            from 2, plans of all queries from 3.
+        :return: A row per endpoint with its query count and flagged scans.
+        """
+        table_sizes = {}
+
+        def size(table):
+            if table not in table_sizes:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                    table_sizes[table] = cursor.fetchone()[0]
+            return table_sizes[table]
+
+        rows = []
+        for name, func in endpoints.cases(data, repeat=1):
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                func(0)
+
+            scans = []
+            for query in context.captured_queries:
+                tables = [table for table in sequential_scans(connection, query['sql']) if size(table) >= min_rows]
+                scans.extend(tables)
+                if verbosity >= 3 or (verbosity == 2 and tables):
+                    self.stdout.write(f"{name}: {query['sql']}")
+                    for line in explain(connection, query['sql']):
+                        self.stdout.write(f'    {line}')
+
+            rows.append({
+                'name': name,
+                'queries': len(context),
+                'scans': ', '.join(f'{table} ({size(table)} rows)' for table in dict.fromkeys(scans)),
+            })
+        return rows
@@ -0,0 +1,59 @@
+"""
+Management command to export the organization directory
+(members, teams and memberships) as NDJSON or JSON.
+
+Rows are streamed chunk by chunk, so memory use does not depend
+on the size of the organization; meant for nightly syncs:
+
+    python manage.py export_directory --format ndjson --output directory.ndjson --organization acme
+"""
+
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.API.export import DEFAULT_CHUNK_SIZE, FORMATS
+from api.tenants import organization_id_by_slug
+
+
+class Command(BaseCommand):
+    help = 'Streams members, teams and memberships to a file or standard output.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=FORMATS, default='ndjson',
+            help='Format of the export.'
+        )
+        parser.add_argument(
+            '--output', type=Path, default=None,
+            help='The file to write, standard output by default.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Number of rows fetched and encoded at once.'
+        )
+        parser.add_argument(
+            '--organization', default=None, metavar='SLUG',
+            help='The exported organization, all organizations by default.'
+        )
+
+    def handle(self, *args, **options):
+        organization_id = None
+        if options['organization']:
+            organization_id = organization_id_by_slug(options['organization'])
+            if organization_id is None:
+                raise CommandError(f"Organization \"{options['organization']}\" does not exist.")
+
+        chunks = FORMATS[options['format']](options['chunk_size'], organization_id=organization_id)
+        if options['output'] is None:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        size = 0
+        with options['output'].open('wb') as file:
+            for chunk in chunks:
+                size += file.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Exported {size} bytes to {options['output']}."))
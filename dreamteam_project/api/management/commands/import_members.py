@@ -0,0 +1,151 @@
+"""
+Management command to import members in bulk from a CSV or JSON file.
+
+The file has `username`, `password`, `first_name`, `last_name`,
+`email` and `position` columns (keys); only `username` is required.
+Passwords are hashed in parallel in a pool of processes
+and members are inserted with `bulk_create` into an organization
+(the default one unless given), with their change events (see `api.outbox`):
+
+    python manage.py import_members members.csv --workers 8 --organization acme
+"""
+
+import csv
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Q
+
+from api import stats
+from api.models import ChangeAction, ChangeEvent, Member, MemberPosition
+from api.outbox import change_events
+from api.signals import invalidate_tables
+from api.tenants import organization_id_by_slug
+
+FIELDS = ('username', 'first_name', 'last_name', 'email', 'position')
+
+
+def init_worker():
+    """
+    Sets up Django in worker processes started with `spawn`.
+    """
+    if not apps.ready:
+        django.setup()
+
+
+def read_records(path: Path, file_format: str) -> list:
+    with path.open(newline='', encoding='utf-8') as file:
+        if file_format == 'json':
+            return json.load(file)
+        return list(csv.DictReader(file))
+
+
+class Command(BaseCommand):
+    help = 'Imports members from a CSV or JSON file, hashing passwords in parallel.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path, help='The CSV or JSON file to import.')
+        parser.add_argument(
+            '--format', choices=('csv', 'json'), default=None,
+            help='Format of the file, guessed from its extension by default.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Number of processes hashing passwords (the number of CPUs by default).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of members inserted per query.'
+        )
+        parser.add_argument(
+            '--organization', default=settings.TENANCY['DEFAULT'], metavar='SLUG',
+            help='The organization members are imported into.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in ('csv', 'json'):
+            raise CommandError('Specify --format, it cannot be guessed from the file extension.')
+        organization_id = organization_id_by_slug(options['organization'])
+        if organization_id is None:
+            raise CommandError(f"Organization \"{options['organization']}\" does not exist.")
+        started = time.monotonic()
+
+        records, skipped = self.validate(read_records(path, file_format), organization_id)
+
+        # Workers are forked, they must not share database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=init_worker) as executor:
+            passwords = executor.map(
+                make_password,
+                [record.get('password') or None for record in records],
+                chunksize=max(len(records) // 64, 1),
+            )
+            members = []
+            for record, password in zip(records, passwords):
+                member = Member(
+                    password=password, organization_id=organization_id,
+                    **{field: record.get(field) or '' for field in FIELDS}
+                )
+                member.set_derived_fields()
+                members.append(member)
+
+        with transaction.atomic():
+            Member.objects.bulk_create(members, batch_size=options['batch_size'])
+            ChangeEvent.objects.bulk_create(
+                change_events(Member, members, ChangeAction.CREATED), batch_size=options['batch_size']
+            )
+            stats.members_added(members)
+            invalidate_tables(Member, organization_ids=[organization_id])
+
+        for error in skipped:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {len(members)} members, skipped {len(skipped)} '
+            f'in {time.monotonic() - started:.2f}s.'
+        ))
+
+    @staticmethod
+    def validate(records, organization_id) -> tuple:
+        """
+        Splits records into valid ones and errors of invalid ones.
+
+        Usernames (unique across organizations) and emails (unique
+        in the organization) already taken are found with a single query.
+        """
+        usernames = {record.get('username') for record in records}
+        emails = {record.get('email') for record in records if record.get('email')}
+        taken_usernames, taken_emails = set(), set()
+        for username, email, member_organization_id in Member._base_manager.filter(
+            Q(username__in=usernames) | Q(email__in=emails, organization_id=organization_id)
+        ).values_list('username', 'email', 'organization_id'):
+            taken_usernames.add(username)
+            if email and member_organization_id == organization_id:
+                taken_emails.add(email)
+
+        valid, errors = [], []
+        for number, record in enumerate(records, start=1):
+            username, email = record.get('username'), record.get('email')
+            if not username:
+                errors.append(f'Record {number}: username is required.')
+            elif username in taken_usernames:
+                errors.append(f'Record {number}: username "{username}" is already taken.')
+            elif email and email in taken_emails:
+                errors.append(f'Record {number}: email "{email}" is already taken.')
+            elif record.get('position') and record['position'] not in MemberPosition.values:
+                errors.append(f'Record {number}: unknown position "{record["position"]}".')
+            else:
+                taken_usernames.add(username)
+                if email:
+                    taken_emails.add(email)
+                valid.append(record)
+        return valid, errors
@@ -0,0 +1,38 @@
+"""
+Management command to delete expired refresh tokens from the blacklist tables.
+
+Meant to be run periodically (e.g. by cron):
+
+    python manage.py prune_tokens --batch-size 5000
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.API.tokens import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired outstanding and blacklisted tokens in bounded batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Maximum number of tokens deleted per transaction.'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.0,
+            help='Seconds to sleep between batches.'
+        )
+
+    def handle(self, *args, **options):
+        report = prune_expired_tokens(batch_size=options['batch_size'], pause=options['pause'])
+        deleted, before, after = report['deleted'], report['before'], report['after']
+
+        self.stdout.write(
+            f"Outstanding tokens: {before['outstanding']} -> {after['outstanding']}\n"
+            f"Blacklisted tokens: {before['blacklisted']} -> {after['blacklisted']}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted['outstanding']} outstanding and {deleted['blacklisted']} blacklisted "
+            f"tokens in {report['seconds']}s ({report['rows_per_second']} rows/sec)."
+        ))
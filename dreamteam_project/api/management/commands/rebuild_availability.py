@@ -0,0 +1,45 @@
+"""
+Management command to check and rebuild the `Member.is_available` flag.
+
+Members whose stored flag differs from the one computed
+from their position and team memberships are reported and fixed:
+
+    python manage.py rebuild_availability
+    python manage.py rebuild_availability --check
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.models import Member
+from api.signals import invalidate_tables
+
+
+class Command(BaseCommand):
+    help = 'Finds members with an out of date availability flag and fixes them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only report inconsistent members and fail if there are any.'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            inconsistent = list(
+                Member.objects.inconsistent_availability().select_for_update().values_list(
+                    'id', 'username', 'organization_id'
+                )
+            )
+            for _, username, _ in inconsistent:
+                self.stderr.write(f'Member "{username}" has an out of date availability flag.')
+
+            if options['check']:
+                if inconsistent:
+                    raise CommandError(f'{len(inconsistent)} members have an out of date availability flag.')
+                self.stdout.write(self.style.SUCCESS('Availability flags are consistent.'))
+                return
+
+            updated = Member.objects.update_availability([pk for pk, _, _ in inconsistent])
+            invalidate_tables(Member, organization_ids={organization_id for _, _, organization_id in inconsistent})
+        self.stdout.write(self.style.SUCCESS(f'Fixed availability of {updated} members.'))
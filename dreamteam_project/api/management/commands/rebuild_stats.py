@@ -0,0 +1,59 @@
+"""
+Management command to check and rebuild counts of organization statistics (see `api.stats`).
+
+Counts that differ from the ones computed from team memberships
+and positions of members are reported and fixed:
+
+    python manage.py rebuild_stats
+    python manage.py rebuild_stats --check --organization acme
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api import stats
+from api.models import PositionCount
+from api.signals import invalidate_tables
+from api.tenants import organization_id_by_slug
+
+
+class Command(BaseCommand):
+    help = 'Finds drifted counts of organization statistics and fixes them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only report drifted counts and fail if there are any.'
+        )
+        parser.add_argument(
+            '--organization', default=None, metavar='SLUG',
+            help='The checked organization, all organizations by default.'
+        )
+
+    def handle(self, *args, **options):
+        organization_id = None
+        if options['organization']:
+            organization_id = organization_id_by_slug(options['organization'])
+            if organization_id is None:
+                raise CommandError(f'Organization "{options["organization"]}" does not exist.')
+
+        with transaction.atomic():
+            counts = PositionCount._base_manager.all()
+            if organization_id is not None:
+                counts = counts.filter(organization_id=organization_id)
+            # Changes of the counts wait for the rebuild to finish
+            list(counts.select_for_update().values_list('id', flat=True))
+            deltas = stats.drift(organization_id)
+            for (organization, team, position), delta in sorted(deltas.items(), key=lambda item: str(item[0])):
+                where = f'team {team}' if team is not None else 'no team'
+                self.stderr.write(f'Count of {position} in {where} of organization {organization} is off by {-delta}.')
+
+            if options['check']:
+                if deltas:
+                    raise CommandError(f'{len(deltas)} counts have drifted.')
+                self.stdout.write(self.style.SUCCESS('Statistics are consistent.'))
+                return
+
+            stats.add(deltas)
+            invalidate_tables(PositionCount, organization_ids={organization for organization, _, _ in deltas})
+        self.stdout.write(self.style.SUCCESS(f'Fixed {len(deltas)} counts.'))
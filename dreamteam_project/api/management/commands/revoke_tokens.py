@@ -0,0 +1,67 @@
+"""
+Management command to revoke (blacklist) refresh tokens of many members at once.
+
+Intended for incident response, e.g. when credentials of a whole team
+may have leaked:
+
+    python manage.py revoke_tokens --team Backend --position INT JUN --organization acme
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from api.API.tokens import blacklist_outstanding_tokens
+from api.models import Member, MemberPosition, Team
+from api.tenants import organization_id_by_slug, organization_scope
+
+
+class Command(BaseCommand):
+    help = 'Blacklists outstanding refresh tokens of all members of the given teams or positions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--team', nargs='+', default=[],
+            help='IDs or names of teams whose members lose their tokens.'
+        )
+        parser.add_argument(
+            '--position', nargs='+', default=[], choices=MemberPosition.values,
+            help='Positions whose members lose their tokens.'
+        )
+        parser.add_argument(
+            '--organization', default=None, metavar='SLUG',
+            help='Only revoke tokens of members of the organization.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['team'] and not options['position']:
+            raise CommandError('Specify at least one --team or --position.')
+
+        organization_id = None
+        if options['organization']:
+            organization_id = organization_id_by_slug(options['organization'])
+            if organization_id is None:
+                raise CommandError(f"Organization \"{options['organization']}\" does not exist.")
+
+        with organization_scope(organization_id):
+            count = self.revoke(options['team'], options['position'])
+        self.stdout.write(self.style.SUCCESS(f'Found {count} outstanding tokens, all of them are blacklisted.'))
+
+    @staticmethod
+    def revoke(teams, positions) -> int:
+        """
+        Blacklists tokens of members of the teams or positions.
+
+        :return: The number of outstanding tokens found, see `blacklist_outstanding_tokens()`.
+        """
+        team_ids = set()
+        for team in teams:
+            lookup = Q(name=team) | Q(pk=team) if team.isdigit() else Q(name=team)
+            found = Team.objects.filter(lookup).values_list('id', flat=True)
+            if not found:
+                raise CommandError(f'Team "{team}" does not exist.')
+            team_ids.update(found)
+
+        members = Member.objects.filter(
+            Q(team_memberships__team_id__in=team_ids) | Q(position__in=positions)
+        ).values('id')
+        return blacklist_outstanding_tokens(members)
@@ -0,0 +1,245 @@
+"""
+The module represents MIDDLEWARE used in the project.
+"""
+
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+
+from .tenants import organization_id_by_slug, organization_scope
+
+logger = logging.getLogger('api.profiling')
+
+
+class QueryProfile:
+    """
+    Database execute wrapper collecting executed queries and their duration.
+
+    Installed with `connection.execute_wrapper()`, so it works
+    with `DEBUG = False` and does not depend on `connection.queries`.
+    """
+    literals = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+    in_lists = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+    spaces = re.compile(r'\s+')
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            self.queries.append((sql, repr(params), duration))
+
+    @classmethod
+    def fingerprint(cls, sql: str) -> str:
+        """
+        Returns the query with literals and lists of parameters collapsed,
+        so queries differing only in values have the same fingerprint.
+        """
+        sql = cls.literals.sub('?', sql)
+        sql = cls.in_lists.sub('IN (...)', sql)
+        return cls.spaces.sub(' ', sql).strip()
+
+    @property
+    def db_time(self) -> float:
+        return sum(duration for _, _, duration in self.queries)
+
+    def duplicates(self) -> list:
+        """
+        Returns queries executed more than once with the same parameters.
+        """
+        counts = Counter((sql, params) for sql, params, _ in self.queries)
+        return [
+            {'fingerprint': self.fingerprint(sql), 'count': count}
+            for (sql, _), count in counts.most_common() if count > 1
+        ]
+
+    def repeated(self, threshold) -> list:
+        """
+        Returns fingerprints executed at least `threshold` times,
+        which usually means an N+1 query pattern.
+        """
+        counts = Counter(self.fingerprint(sql) for sql, _, _ in self.queries)
+        return [
+            {'fingerprint': fingerprint, 'count': count}
+            for fingerprint, count in counts.most_common() if count >= threshold
+        ]
+
+    def slowest(self, limit) -> list:
+        """
+        Returns the slowest queries.
+        """
+        queries = sorted(self.queries, key=lambda query: query[2], reverse=True)[:limit]
+        return [{'sql': sql, 'ms': round(duration, 3)} for sql, _, duration in queries]
+
+
+class QueryProfilingMiddleware:
+    """
+    Middleware profiling database queries of selected requests.
+
+    A request is profiled if it carries the profiling header
+    (`X-Profile-Queries` by default) or is picked by the sampling rate.
+    For a profiled request it adds a `Server-Timing` header with
+    the total and database time and the number of queries, and logs
+    a structured (JSON) line to the `api.profiling` logger with
+    duplicate queries, repeated (N+1) query fingerprints
+    and the slowest statements.
+    Works in both sync (WSGI) and async (ASGI) request handling.
+
+    Configured by `QUERY_PROFILING` setting.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @property
+    def config(self) -> dict:
+        return settings.QUERY_PROFILING
+
+    def should_profile(self, request) -> bool:
+        return (
+            self.config['HEADER'] in request.META
+            or random.random() < self.config['SAMPLE_RATE']
+        )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profile = QueryProfile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            self.install(stack, profile)
+            response = self.get_response(request)
+        return self.report(request, response, profile, started)
+
+    async def __acall__(self, request):
+        if not self.should_profile(request):
+            return await self.get_response(request)
+
+        # Queries of async views run in a thread, where the wrappers are installed.
+        profile = QueryProfile()
+        started = time.perf_counter()
+        stack = ExitStack()
+        await sync_to_async(self.install)(stack, profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.report(request, response, profile, started)
+
+    @staticmethod
+    def install(stack, profile):
+        """
+        Installs the profile as an execute wrapper of every connection.
+        """
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile))
+
+    def report(self, request, response, profile, started):
+        """
+        Adds the `Server-Timing` header to the response and logs the profile.
+        """
+        total_time = (time.perf_counter() - started) * 1000
+
+        repeated = profile.repeated(self.config['REPEATED_THRESHOLD'])
+        metrics = [
+            f'total;dur={total_time:.3f}',
+            f'db;dur={profile.db_time:.3f};desc="{len(profile.queries)} queries"',
+        ]
+        if repeated:
+            metrics.append(f'repeated;desc="{len(repeated)} repeated queries"')
+        response['Server-Timing'] = ', '.join(metrics)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'total_ms': round(total_time, 3),
+            'db_ms': round(profile.db_time, 3),
+            'queries': len(profile.queries),
+            'duplicates': profile.duplicates(),
+            'repeated': repeated,
+            'slowest': profile.slowest(self.config['SLOWEST']),
+        }))
+        return response
+
+
+class TenantMiddleware:
+    """
+    Middleware resolving the organization (tenant) of a request.
+
+    The organization is named by its slug in the `X-Organization` header
+    or by the subdomain of `TENANCY['DOMAIN']` (`<slug>.<domain>`), a request
+    naming an unknown organization is answered with `404 Not Found`.
+    Its ID is set as `request.organization_id` (None if the request names
+    no organization, the organization of the authenticated member is used then)
+    and queries of the request are scoped to it (see `api.tenants`).
+    Works in both sync (WSGI) and async (ASGI) request handling.
+
+    Configured by `TENANCY` setting.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def slug(request):
+        """
+        Returns the slug of the organization named by the request, if any.
+        """
+        config = settings.TENANCY
+        if slug := request.META.get(config['HEADER']):
+            return slug
+        if config['DOMAIN']:
+            subdomain, _, domain = request.get_host().partition(':')[0].partition('.')
+            if domain == config['DOMAIN']:
+                return subdomain
+        return None
+
+    @staticmethod
+    def not_found():
+        return JsonResponse({'detail': 'Organization not found.'}, status=404)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        slug = self.slug(request)
+        request.organization_id = organization_id_by_slug(slug) if slug else None
+        if slug and request.organization_id is None:
+            return self.not_found()
+
+        with organization_scope(request.organization_id):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        slug = self.slug(request)
+        request.organization_id = await sync_to_async(organization_id_by_slug)(slug) if slug else None
+        if slug and request.organization_id is None:
+            return self.not_found()
+
+        with organization_scope(request.organization_id):
+            return await self.get_response(request)
@@ -0,0 +1,57 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+from api.search import create_search_indexes, drop_search_indexes
+
+
+def search_text(*values):
+    return ' '.join(value for value in values if value).lower()
+
+
+def fill_search_text(apps, schema_editor):
+    Member = apps.get_model('api', 'Member')
+    Team = apps.get_model('api', 'Team')
+    db_alias = schema_editor.connection.alias
+
+    members = []
+    for member in Member.objects.using(db_alias).only('username', 'first_name', 'last_name', 'position'):
+        member.search_text = search_text(member.username, member.first_name, member.last_name, member.position)
+        members.append(member)
+    Member.objects.using(db_alias).bulk_update(members, ['search_text'], batch_size=1000)
+
+    teams = []
+    for team in Team.objects.using(db_alias).only('name'):
+        team.search_text = search_text(team.name)
+        teams.append(team)
+    Team.objects.using(db_alias).bulk_update(teams, ['search_text'], batch_size=1000)
+
+
+def create_indexes(apps, schema_editor):
+    create_search_indexes(schema_editor)
+
+
+def drop_indexes(apps, schema_editor):
+    drop_search_indexes(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='search_text',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='search_text',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        TrigramExtension(),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,54 @@
+import api.models
+from django.db import migrations, models
+from django.db.models import Case, Exists, OuterRef, Q, When
+
+from api.search import create_search_indexes
+
+POSITIONS = ['INT', 'JUN', 'MID', 'SEN', 'TCH', 'TML', 'PM', 'ARC', 'DBA', 'QAE', 'DEV', 'UI', 'CEO']
+ONLY_ONE_TEAM = ['INT', 'JUN', 'SEN', 'MID', 'TCH']
+
+
+def fill_is_available(apps, schema_editor):
+    Member = apps.get_model('api', 'Member')
+    TeamMembership = apps.get_model('api', 'TeamMembership')
+    Member.objects.using(schema_editor.connection.alias).update(is_available=Case(
+        When(~Q(position__in=POSITIONS), then=False),
+        When(
+            Q(position__in=ONLY_ONE_TEAM) & Exists(TeamMembership.objects.filter(member_id=OuterRef('pk'))),
+            then=False
+        ),
+        default=True,
+        output_field=models.BooleanField(),
+    ))
+
+
+def repair_search_index(apps, schema_editor):
+    # SQLite rebuilds the table to add a column, dropping its triggers.
+    create_search_indexes(schema_editor, tables=('members',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_search_text'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='member',
+            managers=[
+                ('objects', api.models.MemberManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='is_available',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.RunPython(fill_is_available, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['username'], name='members_available_idx'),
+        ),
+        migrations.RunPython(repair_search_index, migrations.RunPython.noop),
+    ]
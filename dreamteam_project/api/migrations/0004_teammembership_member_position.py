@@ -0,0 +1,55 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+ONLY_ONE_TEAM = ['INT', 'JUN', 'SEN', 'MID', 'TCH']
+
+
+def fill_member_position(apps, schema_editor):
+    Member = apps.get_model('api', 'Member')
+    TeamMembership = apps.get_model('api', 'TeamMembership')
+    alias = schema_editor.connection.alias
+    TeamMembership.objects.using(alias).update(member_position=Subquery(
+        Member.objects.using(alias).filter(pk=OuterRef('member_id')).values('position')[:1]
+    ))
+
+
+def check_one_team_members(apps, schema_editor):
+    # The unique index cannot be created while the rule is violated,
+    # such memberships must be resolved by hand.
+    TeamMembership = apps.get_model('api', 'TeamMembership')
+    duplicated = list(
+        TeamMembership.objects.using(schema_editor.connection.alias)
+        .filter(member_position__in=ONLY_ONE_TEAM)
+        .values('member_id').annotate(teams=Count('id')).filter(teams__gt=1)
+        .values_list('member_id', flat=True)
+    )
+    if duplicated:
+        raise RuntimeError(
+            'Members with one-team positions are in several teams, '
+            f'remove their extra memberships first: {duplicated}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_member_is_available'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teammembership',
+            name='member_position',
+            field=models.CharField(default='', editable=False, max_length=3),
+        ),
+        migrations.RunPython(fill_member_position, migrations.RunPython.noop),
+        migrations.RunPython(check_one_team_members, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='teammembership',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('member_position__in', ONLY_ONE_TEAM)),
+                fields=('member',),
+                name='team_memberships_one_team_uniq',
+            ),
+        ),
+    ]
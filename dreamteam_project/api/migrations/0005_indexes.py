@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+from api.search import create_search_indexes
+
+# Unique columns declared by the models, but never created in the database
+UNIQUE = [
+    ('Team', ['name']),
+    ('TeamMembership', ['member_id', 'team_id']),
+]
+
+
+def check_duplicates(apps, schema_editor):
+    # Unique indexes cannot be created over duplicated values,
+    # such rows must be resolved by hand.
+    for model_name, fields in UNIQUE:
+        model = apps.get_model('api', model_name)
+        duplicated = list(
+            model.objects.using(schema_editor.connection.alias)
+            .values(*fields).annotate(rows=Count('pk')).filter(rows__gt=1)
+            .values_list(*fields)
+        )
+        if duplicated:
+            raise RuntimeError(f'Duplicated {model_name} {", ".join(fields)}, resolve them first: {duplicated}')
+
+
+def repair_search_index(apps, schema_editor):
+    # SQLite rebuilds the table to alter a column, dropping its triggers.
+    create_search_indexes(schema_editor, tables=('teams',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_teammembership_member_position'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='team',
+            name='name',
+            field=models.CharField(db_index=True, max_length=40, unique=True, verbose_name='Team Name'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['position', 'id'], name='members_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['email'], name='members_email_idx'),
+        ),
+        # Indexes replacing the ones of the foreign keys are created first
+        migrations.AlterUniqueTogether(
+            name='teammembership',
+            unique_together={('member', 'team')},
+        ),
+        migrations.AddIndex(
+            model_name='teammembership',
+            index=models.Index(fields=['team', 'member', 'date_joined'], name='team_memberships_team_idx'),
+        ),
+        migrations.AlterField(
+            model_name='teammembership',
+            name='member',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='team_memberships', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='teammembership',
+            name='team',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='api.team'),
+        ),
+        migrations.RunPython(repair_search_index, migrations.RunPython.noop),
+    ]
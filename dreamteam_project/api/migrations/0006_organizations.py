@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import OuterRef, Subquery
+
+from api.search import create_search_indexes
+
+
+def create_default_organization(apps, schema_editor):
+    # Existing members and teams move to the default organization.
+    Organization = apps.get_model('api', 'Organization')
+    alias = schema_editor.connection.alias
+    slug = settings.TENANCY['DEFAULT']
+    organization, _ = Organization.objects.using(alias).get_or_create(slug=slug, defaults={'name': slug.title()})
+    apps.get_model('api', 'Member').objects.using(alias).update(organization=organization)
+    apps.get_model('api', 'Team').objects.using(alias).update(organization=organization)
+
+
+def fill_membership_organization(apps, schema_editor):
+    Team = apps.get_model('api', 'Team')
+    TeamMembership = apps.get_model('api', 'TeamMembership')
+    alias = schema_editor.connection.alias
+    TeamMembership.objects.using(alias).update(organization=Subquery(
+        Team.objects.using(alias).filter(pk=OuterRef('team_id')).values('organization_id')[:1]
+    ))
+
+
+def repair_search_indexes(apps, schema_editor):
+    # SQLite rebuilds the tables to alter their columns, dropping their triggers.
+    create_search_indexes(schema_editor, tables=('members', 'teams'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Organization',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Organization Name')),
+                ('slug', models.SlugField(unique=True)),
+            ],
+            options={
+                'verbose_name': 'organization',
+                'verbose_name_plural': 'all organizations',
+                'db_table': 'organizations',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='organization',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='members', to='api.organization'),
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='organization',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='teams', to='api.organization'),
+        ),
+        migrations.AddField(
+            model_name='teammembership',
+            name='organization',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='api.organization'),
+        ),
+        migrations.RunPython(create_default_organization, migrations.RunPython.noop),
+        migrations.RunPython(fill_membership_organization, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='member',
+            name='organization',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='members', to='api.organization'),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='organization',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='teams', to='api.organization'),
+        ),
+        migrations.AlterField(
+            model_name='teammembership',
+            name='organization',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='api.organization'),
+        ),
+        # Indexes of members lead with the organization
+        migrations.RemoveIndex(
+            model_name='member',
+            name='members_available_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='member',
+            name='members_position_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='member',
+            name='members_email_idx',
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['organization', 'username'], name='members_organization_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['organization', 'username'], name='members_available_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['organization', 'position', 'id'], name='members_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['organization', 'email'], name='members_email_idx'),
+        ),
+        # Team names are unique within an organization
+        migrations.AlterField(
+            model_name='team',
+            name='name',
+            field=models.CharField(max_length=40, verbose_name='Team Name'),
+        ),
+        migrations.AddConstraint(
+            model_name='team',
+            constraint=models.UniqueConstraint(fields=('organization', 'name'), name='teams_organization_name_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='teammembership',
+            index=models.Index(fields=['organization', 'id'], name='team_memberships_org_idx'),
+        ),
+        migrations.RunPython(repair_search_indexes, migrations.RunPython.noop),
+    ]
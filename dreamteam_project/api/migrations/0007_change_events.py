@@ -0,0 +1,32 @@
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_organizations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=7)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('organization', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='change_events', to='api.organization')),
+            ],
+            options={
+                'verbose_name': 'change event',
+                'verbose_name_plural': 'all change events',
+                'db_table': 'change_events',
+                'indexes': [models.Index(fields=['organization', 'id'], name='change_events_feed_idx'), models.Index(fields=['model', 'object_id', 'id'], name='change_events_object_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def open_current_periods(apps, schema_editor):
+    # Current memberships become open periods of the history.
+    TeamMembership = apps.get_model('api', 'TeamMembership')
+    MembershipPeriod = apps.get_model('api', 'MembershipPeriod')
+    alias = schema_editor.connection.alias
+    memberships = TeamMembership.objects.using(alias).values_list(
+        'id', 'organization_id', 'member_id', 'team_id', 'date_joined'
+    )
+    MembershipPeriod.objects.using(alias).bulk_create(
+        (
+            MembershipPeriod(
+                membership_id=pk, organization_id=organization_id,
+                member_id=member_id, team_id=team_id, date_joined=date_joined,
+            )
+            for pk, organization_id, member_id, team_id, date_joined in memberships.iterator(chunk_size=2000)
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_change_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MembershipPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('membership_id', models.BigIntegerField()),
+                ('date_joined', models.DateField()),
+                ('date_left', models.DateField(null=True)),
+                ('member', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='membership_periods', to=settings.AUTH_USER_MODEL)),
+                ('organization', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='membership_periods', to='api.organization')),
+                ('team', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='membership_periods', to='api.team')),
+            ],
+            options={
+                'verbose_name': 'membership period',
+                'verbose_name_plural': 'all membership periods',
+                'db_table': 'team_membership_history',
+                'indexes': [models.Index(fields=['team', 'date_left', 'date_joined', 'member'], name='membership_history_team_idx'), models.Index(fields=['member', 'date_joined'], name='membership_history_member_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='membershipperiod',
+            constraint=models.UniqueConstraint(condition=models.Q(('date_left__isnull', True)), fields=('membership_id',), name='membership_history_open_uniq'),
+        ),
+        migrations.RunPython(open_current_periods, migrations.RunPython.noop),
+    ]
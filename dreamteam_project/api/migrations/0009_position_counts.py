@@ -0,0 +1,66 @@
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Exists, OuterRef
+
+# Positions of members allowed in one team only, see `MemberPosition.only_one_team()`
+ONE_TEAM_POSITIONS = ['INT', 'JUN', 'SEN', 'MID', 'TCH']
+
+
+def count_positions(apps, schema_editor):
+    Member = apps.get_model('api', 'Member')
+    TeamMembership = apps.get_model('api', 'TeamMembership')
+    PositionCount = apps.get_model('api', 'PositionCount')
+    alias = schema_editor.connection.alias
+    in_teams = TeamMembership.objects.using(alias).values(
+        'organization_id', 'team_id', 'member_position'
+    ).annotate(count=Count('id'))
+    unassigned = Member.objects.using(alias).filter(position__in=ONE_TEAM_POSITIONS).exclude(
+        Exists(TeamMembership.objects.using(alias).filter(member_id=OuterRef('pk')))
+    ).values('organization_id', 'position').annotate(count=Count('id'))
+    PositionCount.objects.using(alias).bulk_create(
+        [
+            PositionCount(
+                organization_id=row['organization_id'], team_id=row['team_id'],
+                position=row['member_position'], count=row['count'],
+            )
+            for row in in_teams
+        ] + [
+            PositionCount(organization_id=row['organization_id'], position=row['position'], count=row['count'])
+            for row in unassigned
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_membership_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PositionCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.CharField(choices=[('INT', 'Intern'), ('JUN', 'Junior'), ('MID', 'Middle'), ('SEN', 'Senior'), ('TCH', 'Tech Lead'), ('TML', 'Team Lead'), ('PM', 'Project Manager'), ('ARC', 'Architect'), ('DBA', 'Database Administrator'), ('QAE', 'Quality Assurance Engineer'), ('DEV', 'DevOps Engineer'), ('UI', 'UI/UX Designer'), ('CEO', 'Chief Executive Officer')], max_length=3)),
+                ('count', models.IntegerField(default=0)),
+                ('organization', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='position_counts', to='api.organization')),
+                ('team', models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='position_counts', to='api.team')),
+            ],
+            options={
+                'verbose_name': 'position count',
+                'verbose_name_plural': 'all position counts',
+                'db_table': 'position_counts',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='positioncount',
+            constraint=models.UniqueConstraint(condition=models.Q(('team__isnull', False)), fields=('team', 'position'), name='position_counts_team_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='positioncount',
+            constraint=models.UniqueConstraint(condition=models.Q(('team__isnull', True)), fields=('organization', 'position'), name='position_counts_unassigned_uniq'),
+        ),
+        migrations.RunPython(count_positions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+from django.db import migrations, models
+
+# The statement trigger assigns the transaction ID before any event gets its ID,
+# the row trigger then records the first transaction ID not yet assigned
+# (plpgsql evaluates it with a new snapshot, taken after the event got its ID).
+# Requires Postgres 13 for `pg_current_xact_id()` and `pg_current_snapshot()`.
+CREATE_TRIGGERS = [
+    """
+    CREATE FUNCTION change_events_assign_xid() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_current_xact_id();
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER change_events_assign_xid BEFORE INSERT ON change_events
+    FOR EACH STATEMENT EXECUTE FUNCTION change_events_assign_xid()
+    """,
+    """
+    CREATE FUNCTION change_events_xid_horizon() RETURNS trigger AS $$
+    BEGIN
+        NEW.xid_horizon := pg_snapshot_xmax(pg_current_snapshot())::text::bigint;
+        RETURN NEW;
+    END $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER change_events_xid_horizon BEFORE INSERT ON change_events
+    FOR EACH ROW EXECUTE FUNCTION change_events_xid_horizon()
+    """,
+]
+
+DROP_TRIGGERS = [
+    'DROP TRIGGER IF EXISTS change_events_xid_horizon ON change_events',
+    'DROP FUNCTION IF EXISTS change_events_xid_horizon()',
+    'DROP TRIGGER IF EXISTS change_events_assign_xid ON change_events',
+    'DROP FUNCTION IF EXISTS change_events_assign_xid()',
+]
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in CREATE_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in DROP_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_position_counts'),
+    ]
+
+    operations = [
+        # Existing events are settled
+        migrations.AddField(
+            model_name='changeevent',
+            name='xid_horizon',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
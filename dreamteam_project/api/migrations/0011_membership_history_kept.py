@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_change_events_xid_horizon'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='membershipperiod',
+            name='member_username',
+            field=models.CharField(blank=True, default='', max_length=150),
+        ),
+        migrations.AddField(
+            model_name='membershipperiod',
+            name='team_name',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AlterField(
+            model_name='membershipperiod',
+            name='member',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='membership_periods', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='membershipperiod',
+            name='team',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='membership_periods', to='api.team'),
+        ),
+    ]
@@ -1,8 +1,21 @@
 from django.contrib.auth.hashers import make_password
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
+from django.db.models import Case, Exists, OuterRef, Q, When
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
+from .tenants import current_organization, scoped
+
+
+def search_text(*values) -> str:
+    """
+    Returns the lowercased text the search index is built on.
+    """
+    return ' '.join(value for value in values if value).lower()
+
 
 class MemberPosition(models.TextChoices):
     """
@@ -40,7 +53,147 @@ class MemberPosition(models.TextChoices):
         return ['CEO', 'TML', 'PM']
 
 
-class Member(AbstractUser):
+class TenantManagerMixin:
+    """
+    Scopes querysets of the manager to the current organization,
+    see `api.tenants`.
+    """
+
+    def get_queryset(self):
+        return scoped(super().get_queryset())
+
+
+class TenantManager(TenantManagerMixin, models.Manager):
+    """
+    Default manager of the models belonging to an organization.
+    """
+
+
+class RecordedChangesMixin:
+    """
+    Saves instances in a transaction, so change events recorded
+    by `post_save` receivers (see `api.outbox`) are committed
+    or rolled back together with the change; saves that do not touch
+    `CHANGE_FIELDS` (e.g. of `last_login`) are not recorded.
+
+    Deletions are already atomic with their `post_delete` signals.
+    """
+    # Fields in snapshots of change events, as in the organization export
+    CHANGE_FIELDS = ()
+
+    @classmethod
+    def tracked_fields_changed(cls, update_fields) -> bool:
+        """
+        Returns whether a save with `update_fields` may change the snapshot.
+        """
+        return update_fields is None or bool(set(cls.CHANGE_FIELDS).intersection(update_fields))
+
+    def save_base(self, *args, using=None, update_fields=None, **kwargs):
+        using = using or router.db_for_write(self.__class__, instance=self)
+        if not self.tracked_fields_changed(update_fields):
+            return super().save_base(*args, using=using, update_fields=update_fields, **kwargs)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save_base(*args, using=using, update_fields=update_fields, **kwargs)
+
+
+class OrganizationManager(models.Manager):
+    """
+    Manager of the Organization model.
+    """
+
+    def default_id(self):
+        """
+        Returns the ID of the default organization (`TENANCY['DEFAULT']` slug),
+        which members and teams created outside of requests belong to.
+        """
+        slug = settings.TENANCY['DEFAULT']
+        return self.get_or_create(slug=slug, defaults={'name': slug.title()})[0].pk
+
+
+class Organization(models.Model):
+    """
+    Represents an organization (tenant) hosted by the deployment.
+
+    Members, teams and team memberships belong to one organization,
+    requests only work with the rows of their organization (see `api.tenants`).
+    """
+    name = models.CharField(_('Organization Name'), max_length=100)
+    slug = models.SlugField(unique=True)
+
+    objects = OrganizationManager()
+
+    class Meta:
+        db_table = 'organizations'
+        verbose_name = _('organization')
+        verbose_name_plural = _('all organizations')
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class MemberManager(TenantManagerMixin, UserManager):
+    """
+    Manager of the Member model maintaining the `is_available` flag.
+    """
+
+    @staticmethod
+    def availability():
+        """
+        Returns the expression computing whether a member can be added to a team:
+        the member has a position and, if the position allows only one team,
+        is not in a team yet.
+        """
+        return Case(
+            When(~Q(position__in=MemberPosition.values), then=False),
+            When(
+                Q(position__in=MemberPosition.only_one_team())
+                & Exists(TeamMembership.objects.filter(member_id=OuterRef('pk'))),
+                then=False
+            ),
+            default=True,
+            output_field=models.BooleanField(),
+        )
+
+    def _create_user(self, username, email, password, **extra_fields):
+        """
+        Creates a member with the password hashed by `set_password()`;
+        `UserManager` assigns a hash, which `Member.save()` would hash again.
+        """
+        if not username:
+            raise ValueError('The given username must be set')
+        member = self.model(
+            username=self.model.normalize_username(username), email=self.normalize_email(email), **extra_fields
+        )
+        member.set_password(password)
+        member.save(using=self._db)
+        return member
+
+    def update_availability(self, member_ids=None) -> int:
+        """
+        Recomputes the `is_available` flag with a single query.
+
+        :param member_ids: IDs of the members to update, all members by default.
+        :return: The number of updated members.
+        """
+        queryset = self.all()
+        if member_ids is not None:
+            member_ids = set(member_ids)
+            if not member_ids:
+                return 0
+            queryset = queryset.filter(pk__in=member_ids)
+        return queryset.update(is_available=self.availability())
+
+    def inconsistent_availability(self):
+        """
+        Returns members whose stored `is_available` flag is out of date.
+        """
+        return self.annotate(expected_availability=self.availability()).exclude(
+            is_available=models.F('expected_availability')
+        )
+
+
+class Member(RecordedChangesMixin, AbstractUser):
     """
     User model representing a member of the organization.
     This model extends Django's built-in AbstractUser.
@@ -48,30 +201,134 @@ class Member(AbstractUser):
     A member of an organization has a specific position
     and may have managerial access.
     """
+    # Indexes of members lead with the organization (see Meta), usernames are unique
+    # across organizations, as members log in with them.
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='members', db_index=False)
     email = models.EmailField(_('Email address'), unique=True, blank=True)
     position = models.CharField(_('Position'), max_length=3, choices=MemberPosition.choices)
     is_manager = models.BooleanField(default=False)
+    search_text = models.TextField(default='', editable=False)
+
+    # Whether the member can be added to a team,
+    # maintained on save and on changes of team memberships
+    is_available = models.BooleanField(default=True, editable=False)
+
+    # Fields the `search_text` is derived from
+    SEARCH_FIELDS = ('username', 'first_name', 'last_name', 'position')
+
+    CHANGE_FIELDS = ('username', 'first_name', 'last_name', 'email', 'position', 'is_manager', 'is_active')
+
+    objects = MemberManager()
 
     class Meta:
         db_table = 'members'
         verbose_name = _('member')
         verbose_name_plural = _('all members')
         ordering = ['username']
+        indexes = [
+            models.Index(fields=['organization', 'username'], name='members_organization_idx'),
+            models.Index(
+                fields=['organization', 'username'], condition=Q(is_available=True), name='members_available_idx'
+            ),
+            models.Index(fields=['organization', 'position', 'id'], name='members_position_idx'),
+            # Email uniqueness is validated by the serializers, members without
+            # an email share the blank one, so the index is not unique.
+            models.Index(fields=['organization', 'email'], name='members_email_idx'),
+        ]
+
+    # The password known to be hashed (loaded from the database, set by `set_password()`
+    # or hashed on save) and the position as loaded from the database,
+    # see `password_changed()` and `set_derived_fields()`
+    _hashed_password = None
+    _loaded_position = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._hashed_password = instance.__dict__.get('password')
+        instance._loaded_position = instance.__dict__.get('position')
+        return instance
+
+    def set_password(self, raw_password):
+        super().set_password(raw_password)
+        self._hashed_password = self.password
+
+    def set_unusable_password(self):
+        super().set_unusable_password()
+        self._hashed_password = self.password
 
     def save(self, *args, **kwargs):
         """
         Method is overridden to automatically set the `is_manager` flag for superusers
         and members with positions that allow management.
 
-        It also hashes the member's password.
+        It also hashes the member's password, if it has been changed,
+        and keeps the `search_text` and `is_available` fields up to date.
+        A changed position is copied to team memberships of the member
+        in the same transaction, which fails with `IntegrityError` if the member
+        takes a one-team position while being in several teams.
+        """
+        self.set_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if update_fields & set(self.SEARCH_FIELDS):
+                update_fields.add('search_text')
+            if 'position' in update_fields:
+                update_fields.add('is_available')
+            kwargs['update_fields'] = update_fields
+
+        if self.password_changed():
+            self.password = make_password(self.password)
+
+        if self.position_changed(update_fields):
+            with transaction.atomic(using=kwargs.get('using') or router.db_for_write(Member, instance=self)):
+                super().save(*args, **kwargs)
+                TeamMembership.objects.filter(member=self).update(member_position=self.position)
+        else:
+            super().save(*args, **kwargs)
+        self._hashed_password = self.__dict__.get('password')
+        self._loaded_position = self.__dict__.get('position')
+
+    def set_derived_fields(self):
+        """
+        Sets fields derived from other fields of the member.
+
+        Called on save and by bulk operations that bypass `save()`.
         """
+        if self.organization_id is None:
+            self.organization_id = current_organization.get() or Organization.objects.default_id()
         if self.is_superuser or self.position in MemberPosition.allow_manage():
             self.is_manager = True
+        self.search_text = search_text(*(getattr(self, field) for field in self.SEARCH_FIELDS))
 
-        if password := self.password:
-            self.password = make_password(password)
+        if self._state.adding or self.position not in MemberPosition.only_one_team():
+            self.is_available = self.position in MemberPosition.values
+        elif self.position != self._loaded_position:
+            # Became a one-team member, available only if not in a team yet
+            self.is_available = not self.team_memberships.exists()
 
-        super().save(*args, **kwargs)
+    def position_changed(self, update_fields=None) -> bool:
+        """
+        Checks if a saved member is changing its position,
+        which is still the one loaded until `save()` returns.
+        """
+        return (
+            not self._state.adding
+            and (update_fields is None or 'position' in update_fields)
+            and self.position != self._loaded_position
+        )
+
+    def password_changed(self) -> bool:
+        """
+        Checks if a raw (not yet hashed) password has been set.
+
+        Any password other than the one known to be hashed is raw,
+        whatever it looks like. A deferred password (e.g. the member
+        was loaded with `only()`) has not been touched.
+        """
+        password = self.__dict__.get('password')
+        return bool(password) and password != self._hashed_password
 
     def __str__(self):
         """
@@ -81,20 +338,49 @@ class Member(AbstractUser):
         return self.username
 
 
-class Team(models.Model):
+class Team(RecordedChangesMixin, models.Model):
     """
     Represents a team within the organization.
 
     Has Many-to-many relationship with Member through TeamMembership.
     """
-    name = models.CharField(_('Team Name'), max_length=40, unique=True, db_index=True)
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='teams', db_index=False)
+    name = models.CharField(_('Team Name'), max_length=40)
     members = models.ManyToManyField(Member, through='TeamMembership')
+    search_text = models.TextField(default='', editable=False)
+
+    CHANGE_FIELDS = ('name',)
+
+    objects = TenantManager()
 
     class Meta:
         db_table = 'teams'
         verbose_name = _('team')
         verbose_name_plural = _('all teams')
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['organization', 'name'], name='teams_organization_name_uniq'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Method is overridden to keep the `search_text` up to date.
+        """
+        self.set_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'search_text'}
+        super().save(*args, **kwargs)
+
+    def set_derived_fields(self):
+        """
+        Sets fields derived from other fields of the team.
+
+        Called on save and by bulk operations that bypass `save()`.
+        """
+        if self.organization_id is None:
+            self.organization_id = current_organization.get() or Organization.objects.default_id()
+        self.search_text = search_text(self.name)
 
     def __str__(self):
         """
@@ -104,16 +390,206 @@ class Team(models.Model):
         return self.name
 
 
-class TeamMembership(models.Model):
+class TeamMembership(RecordedChangesMixin, models.Model):
     """
     Model representing the membership of a member in a team.
 
     This model establishes a many-to-many relationship between Member and Team models.
+
+    The position of the member is copied to `member_position` (see `Member.save()`),
+    so the database enforces that members with one-team positions
+    are in one team only, with a partial unique index.
+    The organization is copied from the team.
     """
-    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='team_memberships')
-    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='memberships')
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name='memberships', db_index=False
+    )
+    # Lookups by member use `unique_together` and by team `team_memberships_team_idx`,
+    # so the foreign keys need no indexes of their own.
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='team_memberships', db_index=False)
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='memberships', db_index=False)
     date_joined = models.DateField(auto_now_add=True)
+    member_position = models.CharField(max_length=3, default='', editable=False)
+
+    CHANGE_FIELDS = ('member_id', 'team_id', 'date_joined')
+
+    objects = TenantManager()
 
     class Meta:
         db_table = 'team_memberships'
         unique_together = ('member', 'team')
+        indexes = [
+            # Covers rosters (members of teams) without reading the table
+            models.Index(fields=['team', 'member', 'date_joined'], name='team_memberships_team_idx'),
+            models.Index(fields=['organization', 'id'], name='team_memberships_org_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['member'],
+                condition=Q(member_position__in=MemberPosition.only_one_team()),
+                name='team_memberships_one_team_uniq',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Method is overridden to copy the position of the member
+        and the organization of the team on creation.
+        """
+        if self._state.adding:
+            self.set_derived_fields()
+        super().save(*args, **kwargs)
+
+    def set_derived_fields(self):
+        """
+        Sets fields derived from the member and the team.
+
+        Called on creation; bulk operations that bypass `save()`
+        should set `member_position` and `organization` themselves
+        to avoid a query per row.
+        """
+        self.member_position = self.member.position
+        self.organization_id = self.team.organization_id
+
+
+class MembershipPeriod(models.Model):
+    """
+    Represents a period a member was in a team (see `api.history`).
+
+    A period is opened when the member is added to the team and closed
+    (`date_left` is set) when the membership is deleted, so rosters
+    of past dates and tenures of members stay queryable. The member
+    was in the team on the dates of `[date_joined, date_left)`.
+
+    Periods outlive their member or team: when either is deleted,
+    its open periods are closed, the username of the member or the name
+    of the team is kept and the foreign key is set to NULL
+    (see `api.history.detach_periods()`).
+    """
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name='membership_periods', db_index=False
+    )
+    # Lookups by team and by member use the indexes below.
+    member = models.ForeignKey(
+        Member, on_delete=models.SET_NULL, null=True, related_name='membership_periods', db_index=False
+    )
+    team = models.ForeignKey(
+        Team, on_delete=models.SET_NULL, null=True, related_name='membership_periods', db_index=False
+    )
+    # Set when the member or the team is deleted
+    member_username = models.CharField(max_length=150, blank=True, default='')
+    team_name = models.CharField(max_length=40, blank=True, default='')
+    # ID of the membership, kept after it is deleted
+    membership_id = models.BigIntegerField()
+    date_joined = models.DateField()
+    date_left = models.DateField(null=True)
+
+    objects = TenantManager()
+
+    class Meta:
+        db_table = 'team_membership_history'
+        verbose_name = _('membership period')
+        verbose_name_plural = _('all membership periods')
+        indexes = [
+            # Periods of a team on a date: open periods and periods left after
+            # the date, so recent dates are the cheapest. The roster query reads
+            # membership IDs from the table, the index does not cover it.
+            models.Index(
+                fields=['team', 'date_left', 'date_joined', 'member'], name='membership_history_team_idx'
+            ),
+            # Periods of a member in the order of tenures, read from the table
+            models.Index(fields=['member', 'date_joined'], name='membership_history_member_idx'),
+        ]
+        constraints = [
+            # A membership has one open period, which is closed when it is deleted
+            models.UniqueConstraint(
+                fields=['membership_id'], condition=Q(date_left__isnull=True), name='membership_history_open_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.member_id} in {self.team_id} {self.date_joined}..{self.date_left or ""}'
+
+
+class PositionCount(models.Model):
+    """
+    Represents the number of members with a position in a team,
+    or of one-team members in no team if `team` is not set
+    (see `api.stats`).
+
+    Counts are maintained on changes of team memberships and positions
+    of members, so organization statistics are read without counting
+    members; `rebuild_stats` command reconciles drifted counts.
+    """
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name='position_counts', db_index=False
+    )
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='position_counts', null=True, db_index=False)
+    position = models.CharField(max_length=3, choices=MemberPosition.choices)
+    count = models.IntegerField(default=0)
+
+    objects = TenantManager()
+
+    class Meta:
+        db_table = 'position_counts'
+        verbose_name = _('position count')
+        verbose_name_plural = _('all position counts')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['team', 'position'], condition=Q(team__isnull=False), name='position_counts_team_uniq'
+            ),
+            models.UniqueConstraint(
+                fields=['organization', 'position'], condition=Q(team__isnull=True),
+                name='position_counts_unassigned_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.position} in {self.team_id or "no team"}: {self.count}'
+
+
+class ChangeAction(models.TextChoices):
+    """
+    Enum-like class defines actions recorded by change events.
+    """
+    CREATED = 'created', _('Created')
+    UPDATED = 'updated', _('Updated')
+    DELETED = 'deleted', _('Deleted')
+
+
+class ChangeEvent(models.Model):
+    """
+    Represents a change of a member, team or team membership
+    in the append-only outbox (see `api.outbox`).
+
+    Events are written in the transaction of the change and served
+    by the change feed in the order of their IDs, which are the cursors
+    of the feed. Created and updated events carry a snapshot of the
+    exported fields of the object, deleted events carry none.
+    """
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name='change_events', db_index=False
+    )
+    model = models.CharField(max_length=16)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=7, choices=ChangeAction.choices)
+    data = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+    # Set by a trigger on Postgres, see `api.outbox.settled()`
+    xid_horizon = models.BigIntegerField(default=0, editable=False)
+
+    objects = TenantManager()
+
+    class Meta:
+        db_table = 'change_events'
+        verbose_name = _('change event')
+        verbose_name_plural = _('all change events')
+        indexes = [
+            # The feed of an organization
+            models.Index(fields=['organization', 'id'], name='change_events_feed_idx'),
+            # Later events of an object, see `compact_changes` command
+            models.Index(fields=['model', 'object_id', 'id'], name='change_events_object_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.model} {self.object_id} {self.action}'
@@ -0,0 +1,138 @@
+"""
+The module represents the CHANGE EVENT outbox used in the project.
+
+Every create, update and delete of a member, team or team membership
+is recorded as a `ChangeEvent` in the transaction of the change
+(see receivers in `api.signals`), so the outbox holds exactly
+the committed changes. Downstream systems follow the change feed
+(`/api/changes/?since=<cursor>`) instead of re-reading the whole
+directory; old events are compacted by the `compact_changes` command.
+
+Events get their IDs before their transactions commit, so a transaction
+in flight may commit an event after events with greater IDs are visible.
+The feed serves events up to the last settled one (see `settled()`),
+so consumers never move their cursors past such an event.
+"""
+
+from django.db import connection
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import ChangeAction, ChangeEvent, Member, Team, TeamMembership
+
+# Names of the models in events, as record types of the organization export
+# (see `api.API.export`); snapshots hold their `CHANGE_FIELDS`.
+MODEL_NAMES = {
+    Member: 'member',
+    Team: 'team',
+    TeamMembership: 'membership',
+}
+
+
+def snapshot(instance) -> dict:
+    """
+    Returns tracked fields of the instance; fields it was loaded
+    without (see `QuerySet.only()`) are read with a single query.
+    """
+    fields = instance.CHANGE_FIELDS
+    deferred = instance.get_deferred_fields()
+    data = {field: getattr(instance, field) for field in fields if field not in deferred}
+    if missing := [field for field in fields if field in deferred]:
+        data.update(type(instance)._base_manager.filter(pk=instance.pk).values(*missing).get())
+    return {field: data[field] for field in fields}
+
+
+def change_events(model, instances, action) -> list:
+    """
+    Returns unsaved events of the action for the instances of the model.
+
+    :param model: Member, Team or TeamMembership.
+    :param instances: The changed instances; deleted ones must still have their primary keys.
+    :param action: A `ChangeAction`.
+    """
+    name = MODEL_NAMES[model]
+    return [
+        ChangeEvent(
+            organization_id=instance.organization_id,
+            model=name,
+            object_id=instance.pk,
+            action=action,
+            data=None if action == ChangeAction.DELETED else snapshot(instance),
+        )
+        for instance in instances
+    ]
+
+
+def record(model, instances, action):
+    """
+    Records events of the action for the instances of the model with a single query.
+    """
+    if events := change_events(model, instances, action):
+        ChangeEvent.objects.bulk_create(events)
+
+
+def settled():
+    """
+    Returns a boolean expression telling if an event is settled:
+    no event with a lower ID can become visible any more.
+
+    On Postgres an event records the first transaction ID not yet assigned
+    right after it got its ID (`xid_horizon`, set by a trigger, see migration
+    `0010_change_events_xid_horizon`). Transactions that got lower event IDs
+    had their transaction IDs assigned by then, so once the oldest running
+    transaction (`pg_snapshot_xmin()`) is past the horizon they have all
+    finished. SQLite runs one write transaction at a time,
+    so its events are committed in the order of their IDs.
+    """
+    if connection.vendor != 'postgresql':
+        return Value(True)
+    oldest_running = RawSQL('pg_snapshot_xmin(pg_current_snapshot())::text::bigint', ())
+    return ExpressionWrapper(Q(xid_horizon__lte=oldest_running), output_field=BooleanField())
+
+
+def settled_page(rows) -> list:
+    """
+    Returns events up to the last settled one, the rows
+    of events ordered by ID with the `settled` flag.
+    """
+    last = max((i for i, row in enumerate(rows) if row['settled']), default=-1)
+    return [{key: value for key, value in row.items() if key != 'settled'} for row in rows[:last + 1]]
+
+
+def latest_cursor() -> int:
+    """
+    Returns the ID of the latest settled event of the current organization, 0 if there is none.
+    """
+    return ChangeEvent.objects.filter(settled()).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def compact(older_than, tombstones_older_than, batch_size=1000) -> int:
+    """
+    Compacts the outbox of all organizations.
+
+    Of the events created before `older_than` only the latest one
+    of each object is kept; deleted events created before
+    `tombstones_older_than` are removed too. Every kept event carries
+    the whole snapshot of its object, so a consumer with an older cursor
+    still ends up with the current state, except for deletions it missed
+    by lagging behind `tombstones_older_than` (it has to resync from the
+    organization export).
+
+    Events are checked in batches of `batch_size`, so every delete is short.
+
+    :return: The number of removed events.
+    """
+    events = ChangeEvent._base_manager
+    boundary = events.filter(created_at__lt=older_than).order_by('-id').values_list('id', flat=True).first()
+    if boundary is None:
+        return 0
+
+    superseded = Exists(events.filter(model=OuterRef('model'), object_id=OuterRef('object_id'), id__gt=OuterRef('id')))
+    expired = Q(action=ChangeAction.DELETED, created_at__lt=tombstones_older_than)
+    removed = last = 0
+    while ids := list(
+        events.filter(id__gt=last, id__lte=boundary).order_by('id').values_list('id', flat=True)[:batch_size]
+    ):
+        last = ids[-1]
+        removed += events.filter(id__gte=ids[0], id__lte=last).filter(superseded | expired).delete()[0]
+    return removed
@@ -0,0 +1,81 @@
+"""
+The module represents SEARCH indexes used in the project.
+
+Members and teams are searched on their precomputed, lowercased
+`search_text` column, which is indexed depending on the database:
+
+— PostgreSQL: a GIN trigram index (`pg_trgm`), used both by substring
+    (`LIKE '%term%'`) and fuzzy (word similarity) lookups;
+— SQLite: an external content FTS5 table `<table>_search` kept in sync
+    by triggers, used for word prefix lookups.
+
+Functions of the module are idempotent and are called from migrations.
+SQLite rebuilds a table on most schema changes, which drops its triggers,
+so migrations altering `members` or `teams` must call
+`create_search_indexes()` again.
+"""
+
+# Tables with a `search_text` column
+SEARCH_TABLES = ('members', 'teams')
+
+
+def fts_table(table: str) -> str:
+    """
+    Returns the name of the SQLite FTS5 table indexing the table.
+    """
+    return f'{table}_search'
+
+
+def postgresql_statements(table: str) -> list:
+    return [
+        f'CREATE INDEX IF NOT EXISTS {table}_search_trgm '
+        f'ON {table} USING gin (search_text gin_trgm_ops)',
+    ]
+
+
+def sqlite_statements(table: str) -> list:
+    fts = fts_table(table)
+    delete = f"INSERT INTO {fts}({fts}, rowid, search_text) VALUES ('delete', old.id, old.search_text);"
+    insert = f'INSERT INTO {fts}(rowid, search_text) VALUES (new.id, new.search_text);'
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"search_text, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN {insert} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN {delete} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF search_text ON {table} '
+        f'BEGIN {delete} {insert} END',
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def create_search_indexes(schema_editor, tables=SEARCH_TABLES):
+    """
+    Creates (or repairs) search indexes of the tables.
+
+    :param schema_editor: The schema editor of the running migration.
+    :param tables: Names of the indexed tables.
+    """
+    statements = {
+        'postgresql': postgresql_statements,
+        'sqlite': sqlite_statements,
+    }.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for table in tables:
+        for sql in statements(table):
+            schema_editor.execute(sql)
+
+
+def drop_search_indexes(schema_editor, tables=SEARCH_TABLES):
+    """
+    Drops search indexes of the tables.
+    """
+    vendor = schema_editor.connection.vendor
+    for table in tables:
+        if vendor == 'postgresql':
+            schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_trgm')
+        elif vendor == 'sqlite':
+            for trigger in ('insert', 'delete', 'update'):
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS {fts_table(table)}_{trigger}')
+            schema_editor.execute(f'DROP TABLE IF EXISTS {fts_table(table)}')
@@ -0,0 +1,351 @@
+"""
+The module represents SIGNAL receivers used in the project.
+
+Receivers are connected in `ApiConfig.ready()`.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from . import history, outbox, stats
+from .API.cache import member_claims, table_versions, team_rosters
+from .models import ChangeAction, ChangeEvent, Member, Team, TeamMembership
+
+# Member fields rendered in team rosters
+ROSTER_MEMBER_FIELDS = {'username', 'first_name', 'last_name', 'position'}
+
+# Member fields rendered in member lists (including availability)
+LISTED_MEMBER_FIELDS = ROSTER_MEMBER_FIELDS | {'email', 'is_available'}
+
+# Member fields of permission claims and cached authentication rows, see `AUTH_FIELDS`
+CLAIM_MEMBER_FIELDS = {'is_manager', 'is_active', 'position', 'organization'}
+
+# Sent after TeamMembership instances are inserted with `bulk_create()`,
+# which does not send `post_save`; provides `memberships` argument.
+memberships_bulk_created = Signal()
+
+# Sent after TeamMembership rows are deleted in bulk without
+# sending `post_delete`; provides `memberships` argument.
+memberships_bulk_deleted = Signal()
+
+
+def invalidate(versioned_cache, pks):
+    """
+    Bumps versions of the objects in the versioned cache.
+
+    Versions are bumped immediately and once more after commit:
+    a concurrent reader may cache an object as it was before
+    the current transaction in between.
+
+    :param versioned_cache: A `VersionedCache` instance.
+    :param pks: Primary keys of the changed objects.
+    """
+    pks = set(pks)
+    if not pks:
+        return
+    versioned_cache.bump(pks)
+    transaction.on_commit(lambda: versioned_cache.bump(pks))
+
+
+def invalidate_rosters(team_ids):
+    """
+    Bumps cached roster versions of the teams.
+
+    :param team_ids: IDs of teams whose rosters have changed.
+    """
+    invalidate(team_rosters, team_ids)
+
+
+def invalidate_claims(member_ids):
+    """
+    Bumps permission claims versions of the members,
+    so claims of their issued tokens are no longer trusted.
+
+    :param member_ids: IDs of members whose teams or access have changed.
+    """
+    invalidate(member_claims, member_ids)
+
+
+def invalidate_tables(*models, organization_ids):
+    """
+    Bumps versions of the tables of the models in the organizations
+    and across organizations, so conditional requests for their
+    representations miss.
+
+    :param models: Models whose tables have changed.
+    :param organization_ids: IDs of the organizations whose rows have changed.
+    """
+    tables = table_versions.table_keys(models)
+    for organization_id in set(organization_ids):
+        tables.extend(table_versions.table_keys(models, organization_id))
+    invalidate(table_versions, tables)
+
+
+@receiver([post_save, post_delete], sender=TeamMembership)
+def membership_changed(sender, instance, origin=None, **kwargs):
+    """
+    Invalidates the roster of the team a member was added to or removed from
+    and permission claims of the member, and updates availability of the member.
+
+    Availability of members of a deleted team is updated
+    by `team_deleted()` at once, a deleted member needs no update.
+    """
+    invalidate_rosters([instance.team_id])
+    invalidate_claims([instance.member_id])
+    invalidate_tables(TeamMembership, organization_ids=[instance.organization_id])
+    if not isinstance(origin, (Team, Member)):
+        Member.objects.update_availability([instance.member_id])
+
+
+@receiver([memberships_bulk_created, memberships_bulk_deleted], sender=TeamMembership)
+def memberships_changed_in_bulk(sender, memberships, **kwargs):
+    """
+    Invalidates rosters of the teams members were added to or removed from
+    in bulk and permission claims of the members,
+    and updates availability of the members.
+    """
+    member_ids = {membership.member_id for membership in memberships}
+    invalidate_rosters(membership.team_id for membership in memberships)
+    invalidate_claims(member_ids)
+    invalidate_tables(TeamMembership, organization_ids={membership.organization_id for membership in memberships})
+    Member.objects.update_availability(member_ids)
+
+
+@receiver([post_save, post_delete], sender=Team)
+def team_changed(sender, instance, **kwargs):
+    """
+    Invalidates the roster of a renamed or deleted team.
+    """
+    invalidate_rosters([instance.pk])
+    invalidate_tables(Team, organization_ids=[instance.organization_id])
+
+
+@receiver(pre_delete, sender=Team)
+def team_deleting(sender, instance, **kwargs):
+    """
+    Remembers members of a team being deleted, see `team_deleted()`.
+    """
+    instance._member_ids = list(
+        TeamMembership.objects.filter(team_id=instance.pk).values_list('member_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Team)
+def team_deleted(sender, instance, **kwargs):
+    """
+    Updates availability of members of a deleted team
+    with a single query, whatever the size of the team.
+    """
+    Member.objects.update_availability(getattr(instance, '_member_ids', ()))
+
+
+@receiver(post_save, sender=Member)
+def member_changed(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Invalidates member lists, rosters of all teams of a changed member
+    and permission claims of the member (and so its cached authentication
+    row, see `MemberAuthCache`).
+
+    A new member is not in any team yet and saves that
+    do not touch roster fields (e.g. `last_login`) are skipped.
+    Claims are kept by saves that do not touch claim fields, e.g. the `last_login`
+    save on login, which would outdate the claims of the token being issued.
+    """
+    if created or not update_fields or LISTED_MEMBER_FIELDS & set(update_fields):
+        invalidate_tables(Member, organization_ids=[instance.organization_id])
+    # A new member may reuse the ID of a deleted one
+    if created or not update_fields or CLAIM_MEMBER_FIELDS & set(update_fields):
+        invalidate_claims([instance.pk])
+    if created or (update_fields and not ROSTER_MEMBER_FIELDS & set(update_fields)):
+        return
+    invalidate_rosters(
+        TeamMembership.objects.filter(member_id=instance.pk).values_list('team_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Member)
+def member_deleted(sender, instance, **kwargs):
+    """
+    Invalidates member lists and the cached authentication row
+    of the member, memberships of the member are handled
+    by `membership_changed()`.
+    """
+    invalidate_tables(Member, organization_ids=[instance.organization_id])
+    invalidate_claims([instance.pk])
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_save, sender=Team)
+@receiver(post_save, sender=TeamMembership)
+def record_saved(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Records a change event of a created or updated member, team or membership
+    in the outbox; saves that do not touch tracked fields (e.g. `last_login`)
+    are skipped.
+    """
+    if created:
+        outbox.record(sender, [instance], ChangeAction.CREATED)
+    elif sender.tracked_fields_changed(update_fields):
+        outbox.record(sender, [instance], ChangeAction.UPDATED)
+
+
+@receiver(post_delete, sender=TeamMembership)
+def record_membership_deleted(sender, instance, origin=None, **kwargs):
+    """
+    Records a change event of a deleted membership in the outbox.
+
+    Memberships deleted with their team or member are recorded
+    together with it by `record_deleted()`, with a single query.
+    """
+    if isinstance(origin, (Team, Member)):
+        origin.__dict__.setdefault('_deleted_memberships', []).append(instance)
+    else:
+        outbox.record(sender, [instance], ChangeAction.DELETED)
+
+
+@receiver(post_delete, sender=Member)
+@receiver(post_delete, sender=Team)
+def record_deleted(sender, instance, **kwargs):
+    """
+    Records change events of a deleted member or team
+    and of its memberships in the outbox.
+    """
+    ChangeEvent.objects.bulk_create(
+        outbox.change_events(TeamMembership, instance.__dict__.pop('_deleted_memberships', []), ChangeAction.DELETED)
+        + outbox.change_events(sender, [instance], ChangeAction.DELETED)
+    )
+
+
+@receiver(memberships_bulk_created, sender=TeamMembership)
+def record_memberships_bulk_created(sender, memberships, **kwargs):
+    """
+    Records change events of memberships inserted in bulk in the outbox.
+    """
+    outbox.record(sender, memberships, ChangeAction.CREATED)
+
+
+@receiver(memberships_bulk_deleted, sender=TeamMembership)
+def record_memberships_bulk_deleted(sender, memberships, **kwargs):
+    """
+    Records change events of memberships deleted in bulk in the outbox.
+    """
+    outbox.record(sender, memberships, ChangeAction.DELETED)
+
+
+@receiver(post_save, sender=TeamMembership)
+def open_membership_period(sender, instance, created, **kwargs):
+    """
+    Opens the history period of a created membership.
+    """
+    if created:
+        history.open_periods([instance])
+
+
+@receiver(post_delete, sender=TeamMembership)
+def close_membership_period(sender, instance, origin=None, **kwargs):
+    """
+    Closes the history period of a deleted membership;
+    periods of memberships deleted with their team or member
+    are closed by `detach_membership_periods()`.
+    """
+    if not isinstance(origin, (Team, Member)):
+        history.close_periods([instance])
+
+
+@receiver(pre_delete, sender=Member)
+@receiver(pre_delete, sender=Team)
+def detach_membership_periods(sender, instance, **kwargs):
+    """
+    Keeps history periods of a deleted member or team, closed.
+    """
+    history.detach_periods(instance)
+
+
+@receiver(memberships_bulk_created, sender=TeamMembership)
+def open_membership_periods_in_bulk(sender, memberships, **kwargs):
+    """
+    Opens history periods of memberships inserted in bulk.
+    """
+    if memberships:
+        history.open_periods(memberships)
+
+
+@receiver(memberships_bulk_deleted, sender=TeamMembership)
+def close_membership_periods_in_bulk(sender, memberships, **kwargs):
+    """
+    Closes history periods of memberships deleted in bulk.
+    """
+    history.close_periods(memberships)
+
+
+@receiver(post_save, sender=TeamMembership)
+def count_membership_added(sender, instance, created, **kwargs):
+    """
+    Counts a created membership in the statistics.
+    """
+    if created:
+        stats.memberships_added([instance])
+
+
+@receiver(post_delete, sender=TeamMembership)
+def count_membership_removed(sender, instance, origin=None, **kwargs):
+    """
+    Uncounts a deleted membership from the statistics.
+
+    Memberships deleted with their team or member are uncounted
+    together by `count_deleted_memberships()`.
+    """
+    if isinstance(origin, (Team, Member)):
+        origin.__dict__.setdefault('_uncounted_memberships', []).append(instance)
+    else:
+        stats.memberships_removed([instance])
+
+
+@receiver(post_delete, sender=Member)
+@receiver(post_delete, sender=Team)
+def count_deleted_memberships(sender, instance, **kwargs):
+    """
+    Uncounts memberships of a deleted team or member at once.
+
+    Counts of a deleted team are deleted with it, a deleted member
+    does not become a member in no team.
+    """
+    if memberships := instance.__dict__.pop('_uncounted_memberships', None):
+        stats.memberships_removed(memberships, teams=sender is Member, unassigned=sender is Team)
+
+
+@receiver(memberships_bulk_created, sender=TeamMembership)
+def count_memberships_added_in_bulk(sender, memberships, **kwargs):
+    """
+    Counts memberships inserted in bulk in the statistics.
+    """
+    stats.memberships_added(memberships)
+
+
+@receiver(memberships_bulk_deleted, sender=TeamMembership)
+def count_memberships_removed_in_bulk(sender, memberships, **kwargs):
+    """
+    Uncounts memberships deleted in bulk from the statistics.
+    """
+    stats.memberships_removed(memberships)
+
+
+@receiver(post_save, sender=Member)
+def count_member_saved(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Counts a created member or moves a member whose position
+    has changed in the statistics.
+    """
+    if created:
+        stats.members_added([instance])
+    elif instance.position_changed(update_fields):
+        stats.position_changed(instance, instance._loaded_position)
+
+
+@receiver(pre_delete, sender=Member)
+def count_member_removed(sender, instance, **kwargs):
+    """
+    Uncounts a member being deleted from the statistics.
+    """
+    stats.member_removed(instance)
@@ -0,0 +1,196 @@
+"""
+The module represents ORGANIZATION STATISTICS used in the project.
+
+Statistics of an organization (`/api/stats/`) are read from `PositionCount`
+rows: the number of members of every position in every team and of one-team
+members in no team. Counts are adjusted in the transaction of every change
+of team memberships and positions of members (see receivers in `api.signals`),
+so statistics cost two queries of O(number of teams) rows whatever the number
+of members. Counts of changes that bypass signals (e.g. raw SQL) drift
+and are reconciled by the `rebuild_stats` command.
+"""
+
+from collections import Counter
+
+from django.db import connections, router
+from django.db.models import Count, Exists, OuterRef
+
+from .models import Member, MemberPosition, PositionCount, Team, TeamMembership
+
+
+# Conflict targets of the unique indexes of counts, see `PositionCount.Meta`
+CONFLICT_TARGETS = {
+    'team': '(team_id, position) WHERE team_id IS NOT NULL',
+    'unassigned': '(organization_id, position) WHERE team_id IS NULL',
+}
+
+
+def add(deltas):
+    """
+    Adds deltas to the counts with at most two queries, whatever
+    the number of changed counts: counts of teams and of members
+    in no team are each upserted with a single
+    `INSERT ... ON CONFLICT DO UPDATE` (Postgres and SQLite 3.24+).
+
+    Counts are changed in the order of their keys,
+    so concurrent transactions lock them in the same order.
+
+    :param deltas: A mapping of `(organization_id, team_id, position)` to deltas,
+        `team_id` is None for one-team members in no team.
+    """
+    rows = {'team': [], 'unassigned': []}
+    for key, delta in sorted(deltas.items(), key=lambda item: str(item[0])):
+        if delta:
+            rows['unassigned' if key[1] is None else 'team'].append((*key, delta))
+
+    connection = connections[router.db_for_write(PositionCount)]
+    table = connection.ops.quote_name(PositionCount._meta.db_table)
+    count = connection.ops.quote_name('count')
+    with connection.cursor() as cursor:
+        for kind, values in rows.items():
+            if not values:
+                continue
+            cursor.execute(
+                f'INSERT INTO {table} (organization_id, team_id, position, {count}) '
+                f'VALUES {", ".join(["(%s, %s, %s, %s)"] * len(values))} '
+                f'ON CONFLICT {CONFLICT_TARGETS[kind]} DO UPDATE SET {count} = {table}.{count} + excluded.{count}',
+                [value for row in values for value in row]
+            )
+
+
+def membership_deltas(memberships, sign, teams=True, unassigned=True) -> Counter:
+    """
+    Returns deltas of the counts for added (`sign` 1) or removed (-1) memberships.
+
+    A one-team member is in no team without its membership.
+
+    :param teams: Change counts of the teams.
+    :param unassigned: Change counts of one-team members in no team.
+    """
+    deltas = Counter()
+    one_team = MemberPosition.only_one_team()
+    for membership in memberships:
+        if teams:
+            deltas[(membership.organization_id, membership.team_id, membership.member_position)] += sign
+        if unassigned and membership.member_position in one_team:
+            deltas[(membership.organization_id, None, membership.member_position)] -= sign
+    return deltas
+
+
+def memberships_added(memberships):
+    """
+    Counts added memberships, see `membership_deltas()`.
+    """
+    add(membership_deltas(memberships, 1))
+
+
+def memberships_removed(memberships, teams=True, unassigned=True):
+    """
+    Counts removed memberships, see `membership_deltas()`.
+    """
+    add(membership_deltas(memberships, -1, teams=teams, unassigned=unassigned))
+
+
+def members_added(members):
+    """
+    Counts new one-team members as members in no team.
+    """
+    one_team = MemberPosition.only_one_team()
+    add(Counter(
+        (member.organization_id, None, member.position) for member in members if member.position in one_team
+    ))
+
+
+def member_removed(member):
+    """
+    Uncounts a deleted one-team member in no team;
+    memberships of the member are uncounted with them.
+    """
+    if deferred := {'position', 'is_available'} & member.get_deferred_fields():
+        member.refresh_from_db(fields=deferred)
+    if member.position in MemberPosition.only_one_team() and member.is_available:
+        add({(member.organization_id, None, member.position): -1})
+
+
+def position_changed(member, old_position):
+    """
+    Moves the member from its old position to the new one
+    in the counts of its teams, or of members in no team.
+    """
+    one_team = MemberPosition.only_one_team()
+    team_ids = TeamMembership._base_manager.filter(member_id=member.pk).values_list('team_id', flat=True)
+    deltas = Counter()
+    for team_id in team_ids:
+        deltas[(member.organization_id, team_id, old_position)] -= 1
+        deltas[(member.organization_id, team_id, member.position)] += 1
+    if not deltas:
+        if old_position in one_team:
+            deltas[(member.organization_id, None, old_position)] -= 1
+        if member.position in one_team:
+            deltas[(member.organization_id, None, member.position)] += 1
+    add(deltas)
+
+
+def ordered(counts) -> dict:
+    """
+    Returns the counts of positions in the order of `MemberPosition`.
+    """
+    return {position: counts[position] for position in MemberPosition.values if counts.get(position)}
+
+
+def organization_stats() -> dict:
+    """
+    Returns statistics of the current organization: teams with their size
+    and positions of their members, and one-team members in no team by position.
+    """
+    teams = {}
+    rows = Team.objects.order_by('name', 'id').values(
+        'id', 'name', 'position_counts__position', 'position_counts__count'
+    )
+    for row in rows:
+        team = teams.setdefault(row['id'], {'id': row['id'], 'name': row['name'], 'size': 0, 'positions': {}})
+        if row['position_counts__count']:
+            team['positions'][row['position_counts__position']] = row['position_counts__count']
+            team['size'] += row['position_counts__count']
+    for team in teams.values():
+        team['positions'] = ordered(team['positions'])
+
+    unassigned = dict(PositionCount.objects.filter(team__isnull=True).values_list('position', 'count'))
+    return {
+        'teams': list(teams.values()),
+        'unassigned': {'total': sum(unassigned.values()), 'positions': ordered(unassigned)},
+    }
+
+
+def expected_counts(organization_id=None) -> Counter:
+    """
+    Returns counts computed from memberships and members,
+    of all organizations if `organization_id` is not given.
+    """
+    memberships = TeamMembership._base_manager.all()
+    members = Member._base_manager.filter(position__in=MemberPosition.only_one_team())
+    if organization_id is not None:
+        memberships = memberships.filter(organization_id=organization_id)
+        members = members.filter(organization_id=organization_id)
+
+    counts = Counter()
+    for row in memberships.values('organization_id', 'team_id', 'member_position').annotate(count=Count('id')):
+        counts[(row['organization_id'], row['team_id'], row['member_position'])] = row['count']
+    unassigned = members.exclude(Exists(TeamMembership._base_manager.filter(member_id=OuterRef('pk'))))
+    for row in unassigned.values('organization_id', 'position').annotate(count=Count('id')):
+        counts[(row['organization_id'], None, row['position'])] = row['count']
+    return counts
+
+
+def drift(organization_id=None) -> dict:
+    """
+    Returns deltas turning the stored counts into the expected ones,
+    of all organizations if `organization_id` is not given.
+    """
+    stored = PositionCount._base_manager.all()
+    if organization_id is not None:
+        stored = stored.filter(organization_id=organization_id)
+    deltas = Counter(expected_counts(organization_id))
+    for organization, team, position, count in stored.values_list('organization_id', 'team_id', 'position', 'count'):
+        deltas[(organization, team, position)] -= count
+    return {key: delta for key, delta in deltas.items() if delta}
@@ -0,0 +1,77 @@
+"""
+The module represents TENANT (organization) scoping used in the project.
+
+Every request works with the members and teams of one organization:
+`TenantMiddleware` resolves it from the `X-Organization` header
+or the subdomain, otherwise it is the organization of the authenticated
+member (see `AsyncJWTAuthentication`). The organization is kept in
+a context variable, which the default managers of `Member`, `Team`
+and `TeamMembership` filter by (see `TenantManagerMixin`), so queries
+of a request touch only the rows of its organization.
+
+Outside of requests (management commands, shell) queries are not
+scoped unless run within `organization_scope()`.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+# ID of the organization queries of the current context are scoped to,
+# `None` leaves them unscoped.
+current_organization = ContextVar('current_organization', default=None)
+
+
+@contextmanager
+def organization_scope(organization_id):
+    """
+    Scopes queries within the block to the organization.
+    """
+    token = current_organization.set(organization_id)
+    try:
+        yield
+    finally:
+        current_organization.reset(token)
+
+
+def scoped(queryset, organization_id=None):
+    """
+    Returns the queryset filtered by the organization,
+    the current one by default (unchanged if there is none).
+    """
+    if organization_id is None:
+        organization_id = current_organization.get()
+    if organization_id is None:
+        return queryset
+    return queryset.filter(organization_id=organization_id)
+
+
+def slug_key(slug) -> str:
+    return f'organization:{slug}'
+
+
+def organization_id_by_slug(slug):
+    """
+    Returns the ID of the organization with the slug, cached.
+
+    :param slug: The slug of the organization.
+    :return: The ID of the organization or None if there is no such organization.
+    """
+    from .models import Organization
+
+    cache = caches[settings.TENANCY['ALIAS']]
+    organization_id = cache.get(slug_key(slug))
+    if organization_id is None:
+        organization_id = Organization.objects.filter(slug=slug).values_list('id', flat=True).first()
+        if organization_id is not None:
+            cache.set(slug_key(slug), organization_id, timeout=settings.TENANCY['TIMEOUT'])
+    return organization_id
+
+
+def forget_slug(slug):
+    """
+    Removes the cached ID of the organization with the slug.
+    """
+    caches[settings.TENANCY['ALIAS']].delete(slug_key(slug))
@@ -0,0 +1,198 @@
+import datetime as dt
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api import stats
+from api.models import ChangeEvent, Member, Organization, PositionCount, Team, TeamMembership
+
+
+class RevokeTokensCommandTest(TestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name="Test Team")
+        self.in_team = Member.objects.create(username="inteam", position="SEN")
+        self.intern = Member.objects.create(username="intern", position="INT")
+        self.outsider = Member.objects.create(username="outsider", position="SEN")
+        TeamMembership.objects.create(member=self.in_team, team=self.team)
+        for member in (self.in_team, self.intern, self.outsider):
+            RefreshToken.for_user(member)
+            RefreshToken.for_user(member)
+
+    def test_revoke_by_team_and_position(self):
+        out = StringIO()
+        call_command("revoke_tokens", "--team", "Test Team", "--position", "INT", stdout=out)
+        self.assertIn("Found 4 outstanding tokens", out.getvalue())
+        revoked = set(BlacklistedToken.objects.values_list("token__user", flat=True))
+        self.assertEqual(revoked, {self.in_team.id, self.intern.id})
+
+    def test_revoke_requires_filter(self):
+        with self.assertRaises(CommandError):
+            call_command("revoke_tokens")
+
+
+class PruneTokensCommandTest(TestCase):
+    def setUp(self):
+        member = Member.objects.create(username="testmember", position="SEN")
+        expired = timezone.now() - dt.timedelta(days=1)
+        for i in range(5):
+            token = OutstandingToken.objects.create(user=member, jti=f"expired{i}", token="", expires_at=expired)
+            if i % 2:
+                BlacklistedToken.objects.create(token=token)
+        self.active = RefreshToken.for_user(member)
+        self.active.blacklist()
+
+    def test_prune_deletes_only_expired_tokens(self):
+        out = StringIO()
+        call_command("prune_tokens", "--batch-size", "2", stdout=out)
+        self.assertIn("Deleted 5 outstanding and 2 blacklisted tokens", out.getvalue())
+        self.assertIn("Outstanding tokens: 6 -> 1", out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), [self.active["jti"]])
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+
+class ImportMembersCommandTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        Member.objects.create(username="existing", position="SEN")
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = Path(self.directory.name) / name
+        path.write_text(content)
+        return str(path)
+
+    def test_import_csv(self):
+        path = self.write("members.csv", (
+            "username,password,first_name,last_name,email,position\n"
+            "junior,secret-1,Anna,Melnyk,anna@example.com,JUN\n"
+            "lead,secret-2,Oleh,Bondar,oleh@example.com,TML\n"
+            "existing,secret-3,,,,SEN\n"
+            "unknown,secret-4,,,,XXX\n"
+        ))
+        out, err = StringIO(), StringIO()
+        call_command("import_members", path, "--workers", "2", stdout=out, stderr=err)
+        self.assertIn("Imported 2 members, skipped 2", out.getvalue())
+        self.assertIn('unknown position "XXX"', err.getvalue())
+        junior = Member.objects.get(username="junior")
+        self.assertTrue(junior.check_password("secret-1"))
+        self.assertFalse(junior.is_manager)
+        self.assertTrue(Member.objects.get(username="lead").is_manager)
+
+    def test_import_json_without_password(self):
+        path = self.write("members.json", json.dumps([{"username": "nopassword", "position": "MID"}]))
+        call_command("import_members", path, "--workers", "1", stdout=StringIO())
+        self.assertFalse(Member.objects.get(username="nopassword").has_usable_password())
+
+    def test_import_into_organization(self):
+        acme = Organization.objects.create(name="Acme", slug="acme")
+        Member.objects.create(username="taken", email="taken@example.com", position="SEN")
+        path = self.write("members.json", json.dumps([
+            {"username": "acme", "email": "taken@example.com", "position": "MID"},
+            {"username": "existing", "position": "MID"},
+        ]))
+        out = StringIO()
+        call_command("import_members", path, "--organization", "acme", stdout=out, stderr=StringIO())
+        self.assertIn("Imported 1 members, skipped 1", out.getvalue())
+        self.assertEqual(Member.objects.get(username="acme").organization, acme)
+        with self.assertRaises(CommandError):
+            call_command("import_members", path, "--organization", "unknown")
+
+    def test_usernames_and_emails_are_checked_separately(self):
+        Member.objects.create(username="anna@example.com", email="oleh", position="SEN")
+        path = self.write("members.json", json.dumps([
+            {"username": "oleh", "email": "anna@example.com", "position": "MID"},
+            {"username": "anna", "email": "anna@example.com", "position": "MID"},
+        ]))
+        out, err = StringIO(), StringIO()
+        call_command("import_members", path, stdout=out, stderr=err)
+        self.assertIn("Imported 1 members, skipped 1", out.getvalue())
+        self.assertIn('Record 2: email "anna@example.com" is already taken.', err.getvalue())
+        self.assertTrue(Member.objects.filter(username="oleh").exists())
+
+
+class RebuildAvailabilityCommandTest(TestCase):
+    def setUp(self):
+        self.junior = Member.objects.create(username="junior", position="JUN")
+        team = Team.objects.create(name="Test Team")
+        TeamMembership.objects.create(member=self.junior, team=team)
+        Member.objects.filter(pk=self.junior.pk).update(is_available=True)
+
+    def test_check_reports_inconsistent_members(self):
+        with self.assertRaises(CommandError):
+            call_command("rebuild_availability", "--check", stdout=StringIO(), stderr=StringIO())
+
+    def test_rebuild_fixes_flags(self):
+        out = StringIO()
+        call_command("rebuild_availability", stdout=out, stderr=StringIO())
+        self.assertIn("Fixed availability of 1 members", out.getvalue())
+        self.junior.refresh_from_db()
+        self.assertFalse(self.junior.is_available)
+
+
+class RebuildStatsCommandTest(TestCase):
+    def setUp(self):
+        junior = Member.objects.create(username="junior", position="JUN")
+        TeamMembership.objects.create(member=junior, team=Team.objects.create(name="Test Team"))
+        PositionCount.objects.filter(team__isnull=False).update(count=5)
+
+    def test_check_reports_drifted_counts(self):
+        with self.assertRaises(CommandError):
+            call_command("rebuild_stats", "--check", stdout=StringIO(), stderr=StringIO())
+
+    def test_rebuild_fixes_counts(self):
+        out = StringIO()
+        call_command("rebuild_stats", stdout=out, stderr=StringIO())
+        self.assertIn("Fixed 1 counts", out.getvalue())
+        self.assertEqual(stats.drift(), {})
+
+
+class ExportDirectoryCommandTest(TestCase):
+    def test_export_to_file(self):
+        member = Member.objects.create(username="junior", position="JUN")
+        TeamMembership.objects.create(member=member, team=Team.objects.create(name="Test Team"))
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "directory.json"
+            call_command("export_directory", "--format", "json", "--output", path, "--chunk-size", "1", stdout=StringIO())
+            data = json.loads(path.read_text())
+        self.assertEqual([member["username"] for member in data["members"]], ["junior"])
+        self.assertEqual(data["memberships"][0]["member_id"], member.id)
+
+
+class CompactChangesCommandTest(TestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name="Test Team")
+        for name in ("First Name", "Second Name", "Latest Name"):
+            self.team.name = name
+            self.team.save()
+        removed = Team.objects.create(name="Removed Team")
+        removed.delete()
+        ChangeEvent.objects.update(created_at=timezone.now() - dt.timedelta(days=10))
+        Member.objects.create(username="recent", position="JUN")
+
+    def test_compact_keeps_latest_event_of_each_object(self):
+        out = StringIO()
+        call_command("compact_changes", "--days", "7", "--tombstone-days", "30", "--batch-size", "2", stdout=out)
+        self.assertIn("Removed 4 change events", out.getvalue())
+        self.assertEqual(
+            list(ChangeEvent.objects.order_by("id").values_list("model", "action", "data")),
+            [
+                ("team", "updated", {"name": "Latest Name"}),
+                ("team", "deleted", None),
+                ("member", "created", ChangeEvent.objects.get(model="member").data),
+            ],
+        )
+
+    def test_compact_removes_old_tombstones(self):
+        call_command("compact_changes", "--days", "7", "--tombstone-days", "7", stdout=StringIO())
+        self.assertEqual(ChangeEvent.objects.filter(action="deleted").count(), 0)
+        self.assertEqual(ChangeEvent.objects.count(), 2)
@@ -0,0 +1,143 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.API.fastpath import TeamValuesSerializer
+from api.API.views import TeamViewSet
+from api.db.explain import sequential_scans
+from api.db.postgresql_pool import base as pool_backend
+from api.db.postgresql_pool.base import ConnectionPool
+from api.db.routers import ReplicaRouter, primary_reads, read_alias, read_from_replica
+from api.models import Member, Team, TeamMembership
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_go_to_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Member), DEFAULT_DB_ALIAS)
+
+    def test_replica_reads(self):
+        token = read_from_replica()
+        try:
+            self.assertEqual(self.router.db_for_read(Member), "replica_1")
+            self.assertEqual(self.router.db_for_write(Member), DEFAULT_DB_ALIAS)
+            with primary_reads():
+                self.assertEqual(self.router.db_for_read(Member), DEFAULT_DB_ALIAS)
+        finally:
+            read_alias.reset(token)
+
+    def test_migrations_run_on_primary_only(self):
+        self.assertTrue(self.router.allow_migrate(DEFAULT_DB_ALIAS, "api"))
+        self.assertFalse(self.router.allow_migrate("replica_1", "api"))
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class ReplicaReadViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(Member.objects.create(username="manager", position="PM"))
+        self.team = Team.objects.create(name="Test Team")
+
+    def test_lookup_reads_from_replica(self):
+        aliases = []
+        filter_queryset = TeamViewSet.filter_queryset
+
+        def record_alias(view, queryset):
+            aliases.append(read_alias.get())
+            return filter_queryset(view, queryset)
+
+        with mock.patch.object(TeamViewSet, "filter_queryset", record_alias):
+            self.client.get(reverse("team-detail", args=[self.team.id]))
+            self.client.patch(reverse("team-detail", args=[self.team.id]), {"name": "Renamed Team"})
+        self.assertEqual(aliases, ["replica_1", None])
+        self.assertIsNone(read_alias.get())
+
+    def test_replica_responses_carry_no_change_markers(self):
+        synced = self.team.id
+        filter_queryset = TeamViewSet.filter_queryset
+        aliases = []
+
+        def lagging_replica(view, queryset):
+            # The replica has not applied teams created after the first request yet
+            aliases.append(read_alias.get())
+            queryset = filter_queryset(view, queryset)
+            return queryset.filter(pk__lte=synced) if read_alias.get() == "replica_1" else queryset
+
+        url = reverse("team-list")
+        with mock.patch.object(TeamViewSet, "filter_queryset", lagging_replica):
+            with self.settings(DATABASE_REPLICAS=[]):
+                etag = self.client.get(url)["ETag"]
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+            Team.objects.create(name="New Team")
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([team["name"] for team in response.data["results"]], ["Test Team"])
+        self.assertNotIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+        self.assertEqual(aliases, [None, "replica_1"])
+        self.assertIsNone(read_alias.get())
+
+    def test_reads_in_transaction_go_to_primary(self):
+        token = read_from_replica()
+        try:
+            self.assertEqual(ReplicaRouter().db_for_read(Member), DEFAULT_DB_ALIAS)
+        finally:
+            read_alias.reset(token)
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def test_pool_keeps_open_connections_up_to_size(self):
+        pool = ConnectionPool(size=2)
+        first, second, third = (SimpleNamespace(closed=0) for _ in range(3))
+        self.assertTrue(pool.put(first))
+        self.assertTrue(pool.put(second))
+        self.assertFalse(pool.put(third))
+
+        second.closed = 1
+        self.assertIs(pool.get(), first)
+        self.assertIsNone(pool.get())
+
+    def test_pool_is_created_once_per_database(self):
+        wrapper = SimpleNamespace(settings_dict={
+            "HOST": "db", "PORT": "5432", "NAME": "dreamteam", "USER": "dreamteam", "POOL_SIZE": 2
+        })
+        with mock.patch.dict(pool_backend.pools, clear=True), \
+                mock.patch.object(pool_backend, "ConnectionPool", wraps=ConnectionPool) as pool_class:
+            pool = pool_backend.DatabaseWrapper.pool.fget(wrapper)
+            self.assertIs(pool_backend.DatabaseWrapper.pool.fget(wrapper), pool)
+        self.assertEqual(pool_class.call_count, 1)
+        self.assertEqual(pool.size, 2)
+
+
+class SequentialScansTest(TestCase):
+    def setUp(self):
+        self.member = Member.objects.create(username="junior", position="JUN", email="junior@example.com")
+        self.team = Team.objects.create(name="Test Team")
+        TeamMembership.objects.create(member=self.member, team=self.team)
+        if connection.vendor == "postgresql":
+            # Tiny tables are cheaper to scan, plans must show whether an index can be used.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def scans(self, queryset_or_rows) -> list:
+        with CaptureQueriesContext(connection) as context:
+            list(queryset_or_rows)
+        return [table for query in context.captured_queries for table in sequential_scans(connection, query["sql"])]
+
+    def test_unindexed_filter_is_flagged(self):
+        self.assertEqual(self.scans(Member.objects.filter(first_name="Taras").order_by()), ["members"])
+
+    def test_hot_lookups_use_indexes(self):
+        self.assertEqual(self.scans(Member.objects.filter(position="JUN").values_list("id", flat=True)), [])
+        self.assertEqual(self.scans(Member.objects.filter(email="junior@example.com")), [])
+        self.assertEqual(self.scans(TeamMembership.objects.filter(member=self.member)), [])
+        self.assertEqual(self.scans(TeamValuesSerializer().memberships([self.team.id])), [])
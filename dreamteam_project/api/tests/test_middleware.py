@@ -0,0 +1,94 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.API.tokens import MemberRefreshToken
+from api.middleware import QueryProfile
+from api.models import Member, Organization, Team, TeamMembership
+
+
+class QueryProfileTest(TestCase):
+    def test_fingerprint_collapses_values(self):
+        self.assertEqual(
+            QueryProfile.fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"),
+            "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?",
+        )
+
+    def test_repeated_and_duplicate_queries(self):
+        profile = QueryProfile()
+        profile.queries = [
+            ("SELECT * FROM t WHERE id = %s", "(1,)", 1.0),
+            ("SELECT * FROM t WHERE id = %s", "(2,)", 2.0),
+            ("SELECT * FROM t WHERE id = %s", "(2,)", 3.0),
+        ]
+        self.assertEqual(profile.repeated(3), [{"fingerprint": "SELECT * FROM t WHERE id = %s", "count": 3}])
+        self.assertEqual(profile.duplicates()[0]["count"], 2)
+        self.assertEqual(profile.slowest(1)[0]["ms"], 3.0)
+
+
+class QueryProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.member = Member.objects.create(username="testuser", position="PM")
+        team = Team.objects.create(name="Test Team")
+        TeamMembership.objects.create(member=self.member, team=team)
+        self.client.force_authenticate(user=self.member)
+
+    def test_request_with_header_is_profiled(self):
+        with self.assertLogs("api.profiling", level="INFO") as logs:
+            response = self.client.get(reverse("member-list"), HTTP_X_PROFILE_QUERIES="1")
+        self.assertIn("db;dur=", response["Server-Timing"])
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["queries"], 2)
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(len(record["slowest"]), 2)
+
+    def test_request_without_header_is_not_profiled(self):
+        response = self.client.get(reverse("member-list"))
+        self.assertFalse(response.has_header("Server-Timing"))
+
+
+class TenantMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.acme = Organization.objects.create(name="Acme", slug="acme")
+        self.member = Member.objects.create(username="member", position="PM")
+        self.acme_member = Member.objects.create(username="acmemember", position="PM", organization=self.acme)
+
+    def usernames(self, response):
+        return [member["username"] for member in response.data["results"]]
+
+    def test_header_scopes_request(self):
+        self.client.force_authenticate(user=self.acme_member)
+        response = self.client.get(reverse("member-list"), HTTP_X_ORGANIZATION="acme")
+        self.assertEqual(self.usernames(response), ["acmemember"])
+
+    def test_unknown_organization_is_not_found(self):
+        self.client.force_authenticate(user=self.member)
+        response = self.client.get(reverse("member-list"), HTTP_X_ORGANIZATION="unknown")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json(), {"detail": "Organization not found."})
+
+    @override_settings(TENANCY={**settings.TENANCY, "DOMAIN": "dreamteam.test"}, ALLOWED_HOSTS=[".dreamteam.test"])
+    def test_subdomain_scopes_request(self):
+        self.client.force_authenticate(user=self.acme_member)
+        response = self.client.get(reverse("member-list"), HTTP_HOST="acme.dreamteam.test")
+        self.assertEqual(self.usernames(response), ["acmemember"])
+
+    def test_token_scopes_request_to_organization_of_member(self):
+        token = MemberRefreshToken.for_user(self.acme_member).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(self.usernames(self.client.get(reverse("member-list"))), ["acmemember"])
+
+    def test_member_of_another_organization_is_not_authenticated(self):
+        token = MemberRefreshToken.for_user(self.member).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.get(reverse("member-list"), HTTP_X_ORGANIZATION="acme")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,106 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.API.authentication import AUTH_FIELDS, AsyncJWTAuthentication, member_auth_cache
+from api.API.tokens import MemberRefreshToken
+from api.models import Member, Team, TeamMembership
+
+CLAIMS_ENABLED = {"ENABLED": True, "ALIAS": "default", "TIMEOUT": None}
+
+
+@override_settings(TOKEN_PERMISSION_CLAIMS=CLAIMS_ENABLED)
+class TokenClaimsPermissionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.member = Member.objects.create(username="testmember", position="QAE")
+        self.team = Team.objects.create(name="Test Team")
+        self.membership = TeamMembership.objects.create(member=self.member, team=self.team)
+        self.url = reverse("team-detail", args=[self.team.id])
+
+    def authenticate(self, refresh):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+
+    def test_token_carries_claims(self):
+        access = MemberRefreshToken.for_user(self.member).access_token
+        self.assertFalse(access["is_manager"])
+        self.assertEqual(access["team_ids"], [self.team.id])
+
+    def test_own_team_access_without_membership_query(self):
+        self.authenticate(MemberRefreshToken.for_user(self.member))
+        self.client.get(self.url)
+        # The team itself; the member and the roster come from the caches.
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_login_issues_current_claims(self):
+        self.member.set_password("testpassword")
+        self.member.save()
+        response = self.client.post("/api/login/token/", {"username": "testmember", "password": "testpassword"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.client.get(self.url)
+        # The team itself; claims are trusted, so no member or membership query.
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_membership_change_invalidates_claims(self):
+        refresh = MemberRefreshToken.for_user(self.member)
+        self.authenticate(refresh)
+        self.membership.delete()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+        TeamMembership.objects.create(member=self.member, team=self.team)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+    def test_refresh_reissues_current_claims(self):
+        refresh = MemberRefreshToken.for_user(self.member)
+        other_team = Team.objects.create(name="Other Team")
+        TeamMembership.objects.create(member=self.member, team=other_team)
+        response = self.client.post("/api/login/token/refresh/", {"refresh": str(refresh)})
+        access = AccessToken(response.data["access"])
+        self.assertEqual(access["team_ids"], sorted([self.team.id, other_team.id]))
+
+
+class MemberAuthCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        member_auth_cache.clear()
+        self.client = APIClient()
+        self.member = Member.objects.create(username="testmember", position="QAE")
+        self.access = MemberRefreshToken.for_user(self.member).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+        self.url = reverse("member-detail", args=[self.member.id])
+
+    def test_authentication_loads_only_needed_columns_once(self):
+        authentication = AsyncJWTAuthentication()
+        with self.assertNumQueries(1) as context:
+            user = authentication.get_user(self.access)
+        select = context.captured_queries[0]["sql"].split(" FROM ")[0]
+        self.assertNotIn("password", select)
+        self.assertEqual({field: getattr(user, field) for field in AUTH_FIELDS},
+                         {field: getattr(self.member, field) for field in AUTH_FIELDS})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(authentication.get_user(self.access), self.member)
+
+    def test_own_profile_access(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deactivation_invalidates_cached_member(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        self.member.is_active = False
+        self.member.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_member_is_not_authenticated(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        self.member.delete()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
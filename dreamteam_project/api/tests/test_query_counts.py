@@ -0,0 +1,23 @@
+from django.test import TestCase
+
+from api.benchmarks import endpoints, load_baseline, measure, query_regressions
+from api.models import Member
+
+
+class EndpointQueryCountTest(TestCase):
+    def test_query_counts_do_not_exceed_baseline(self):
+        results = endpoints.run(scale=0.005, repeat=3)
+        baseline = load_baseline("endpoints")
+        self.assertEqual({result["name"] for result in results}, set(baseline))
+        self.assertEqual(query_regressions(results, baseline), [])
+        self.assertTrue(all(result["status"] < 300 for result in results))
+
+    def test_cold_call_queries_are_compared(self):
+        def cold_then_warm(i):
+            if i == 0:
+                Member.objects.exists()
+            Member.objects.exists()
+
+        result = measure("cold", cold_then_warm, 5)
+        self.assertEqual((result["queries"], result["max_queries"]), (1, 2))
+        self.assertEqual(query_regressions([result], {"cold": 1}), ["cold: 2 queries, baseline 1"])
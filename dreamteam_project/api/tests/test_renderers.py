@@ -0,0 +1,54 @@
+import datetime as dt
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from api.API.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTest(SimpleTestCase):
+    data = {
+        "results": [{"id": 1, "name": "Команда\u2028", "date_joined": dt.date(2023, 10, 18)}],
+        "created": dt.datetime(2023, 10, 18, 16, 37, 1, 123456, tzinfo=dt.timezone.utc),
+        "price": Decimal("1.50"),
+        "label": gettext_lazy("Intern"),
+        1: None,
+    }
+
+    def test_output_without_floats_is_identical_to_json_renderer(self):
+        expected = JSONRenderer().render(self.data)
+        with mock.patch.object(JSONRenderer, "render", side_effect=AssertionError("fell back to JSONRenderer")):
+            self.assertEqual(FastJSONRenderer().render(self.data), expected)
+
+    def test_floats_and_datetimes_decode_to_the_same_data(self):
+        data = {
+            "floats": [0.1, 1.0, -0.0, 1e16, 2.5e-7, 123456789.123456789],
+            "created": dt.datetime(2023, 10, 18, 16, 37, 1, tzinfo=dt.timezone.utc),
+            "start": dt.time(9, 30, 0, 400),
+        }
+        fast, expected = FastJSONRenderer().render(data), JSONRenderer().render(data)
+        self.assertEqual(json.loads(fast), json.loads(expected))
+        self.assertIn(b'"created":"2023-10-18T16:37:01Z","start":"09:30:00.000400"', fast)
+        # Only exponents are formatted differently
+        self.assertEqual(fast.replace(b"e16", b"e+16").replace(b"e-7", b"e-07"), expected)
+
+    def test_out_of_range_floats_are_rendered_as_null(self):
+        for value in (float("nan"), float("inf"), float("-inf")):
+            self.assertEqual(FastJSONRenderer().render({"value": value}), b'{"value":null}')
+            with self.assertRaises(ValueError):
+                JSONRenderer().render({"value": value})
+
+    def test_falls_back_without_orjson(self):
+        with mock.patch("api.API.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_indented_output_falls_back(self):
+        context = {"indent": 2}
+        self.assertEqual(
+            FastJSONRenderer().render({"id": 1}, renderer_context=context),
+            JSONRenderer().render({"id": 1}, renderer_context=context),
+        )
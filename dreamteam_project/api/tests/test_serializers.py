@@ -1,9 +1,11 @@
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 from rest_framework.exceptions import ValidationError
 
 from api.models import Member, Team, TeamMembership
 from api.API.serializers import (
     TeamMembershipEditSerializer,
+    TeamMembershipBulkEditSerializer,
     MemberInTeamSerializer,
     TeamMembershipSerializer,
     TeamViewSerializer,
@@ -30,6 +32,58 @@ class TeamMembershipEditSerializerTest(TestCase):
         self.assertRaises(ValidationError)
 
 
+class OneTeamConstraintTest(TestCase):
+    def setUp(self):
+        self.junior = Member.objects.create(username="junior", position="JUN")
+        self.architect = Member.objects.create(username="architect", position="ARC")
+        self.first_team = Team.objects.create(name="First Team")
+        self.second_team = Team.objects.create(name="Second Team")
+
+    def test_database_rejects_second_team(self):
+        TeamMembership.objects.create(member=self.junior, team=self.first_team)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TeamMembership.objects.create(member=self.junior, team=self.second_team)
+
+    def test_concurrent_add_is_validation_error(self):
+        serializer = TeamMembershipEditSerializer(data={"member": self.junior.id, "team": self.second_team.id})
+        self.assertTrue(serializer.is_valid())
+        # Added by another request after validation
+        TeamMembership.objects.create(member=self.junior, team=self.first_team)
+        with self.assertRaises(ValidationError) as raised:
+            serializer.save()
+        self.assertIn("First Team", raised.exception.detail["member"])
+
+    def test_bulk_insert_skips_conflicting_rows(self):
+        TeamMembership.objects.create(member=self.junior, team=self.first_team)
+        memberships = [
+            TeamMembership(
+                member=self.junior, team=self.second_team,
+                member_position="JUN", organization_id=self.second_team.organization_id
+            ),
+            TeamMembership(
+                member=self.architect, team=self.second_team,
+                member_position="ARC", organization_id=self.second_team.organization_id
+            ),
+        ]
+        created = TeamMembershipBulkEditSerializer.insert_one_by_one(memberships)
+        self.assertEqual([membership.member for membership in created], [self.architect])
+
+    def test_position_change_is_copied_to_memberships(self):
+        TeamMembership.objects.create(member=self.architect, team=self.first_team)
+        TeamMembership.objects.create(member=self.architect, team=self.second_team)
+        serializer = MembersViewSerializer(self.architect, data={"position": "JUN"}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaises(ValidationError) as raised:
+            serializer.save()
+        self.assertIn("position", raised.exception.detail)
+
+        self.architect.refresh_from_db()
+        self.architect.position = "PM"
+        self.architect.save()
+        positions = set(self.architect.team_memberships.values_list("member_position", flat=True))
+        self.assertEqual(positions, {"PM"})
+
+
 class MemberInTeamSerializerTest(TestCase):
     def test_member_in_team_serializer(self):
         member = Member.objects.create(username="testmember", position="INT")
@@ -0,0 +1,90 @@
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.API.blacklist import BloomFilter, blacklist_filter
+from api.models import Member
+
+
+class BloomFilterTest(TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        items = [f"jti-{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+FILTER_ENABLED = {"ENABLED": True, "CACHE_ALIAS": "default", "TTL": 300, "ERROR_RATE": 0.01}
+
+
+@override_settings(TOKEN_BLACKLIST_FILTER=FILTER_ENABLED)
+class BlacklistFilterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.bloom = None
+        self.client = APIClient()
+        self.member = Member.objects.create(username="testmember", position="PM")
+        self.refresh_url = "/api/login/token/refresh/"
+
+    def refresh(self, token):
+        return self.client.post(self.refresh_url, {"refresh": str(token)})
+
+    def test_refresh_skips_blacklist_query(self):
+        blacklist_filter.might_contain("warm-up")
+        with CaptureQueriesContext(connection) as filtered:
+            response = self.refresh(RefreshToken.for_user(self.member))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with override_settings(TOKEN_BLACKLIST_FILTER={**FILTER_ENABLED, "ENABLED": False}):
+            with CaptureQueriesContext(connection) as unfiltered:
+                self.refresh(RefreshToken.for_user(self.member))
+        self.assertEqual(len(unfiltered), len(filtered) + 1)
+
+    def test_logout_invalidates_filter(self):
+        token = RefreshToken.for_user(self.member)
+        blacklist_filter.might_contain("warm-up")
+        self.client.force_authenticate(user=self.member)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/logout/", {"refresh_token": str(token)})
+        self.assertEqual(self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_all_invalidates_filter(self):
+        token = RefreshToken.for_user(self.member)
+        blacklist_filter.might_contain("warm-up")
+        self.client.force_authenticate(user=self.member)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/logout-all/")
+        self.assertEqual(self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotated_token_is_rejected(self):
+        token = RefreshToken.for_user(self.member)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.refresh(token).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_unshared_generation_falls_back_to_database(self):
+        blacklist_filter.might_contain("warm-up")
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}):
+            self.assertTrue(blacklist_filter.might_contain("not-blacklisted"))
+            token = RefreshToken.for_user(self.member)
+            token.blacklist()
+            self.assertEqual(self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_check_refuses_process_local_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            blacklist_filter.check()
+        with override_settings(TOKEN_BLACKLIST_FILTER={**FILTER_ENABLED, "ENABLED": False}):
+            blacklist_filter.check()
@@ -1,11 +1,80 @@
+import asyncio
+import json
+import threading
+from datetime import date, timedelta
+from unittest import mock, skipIf
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import IntegrityError, connection, connections, transaction
 from django.db.models import Q
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
 
+from api.API.cache import team_rosters
+from api.API.pagination import MemberCursorPagination
+from api.API.tokens import MemberRefreshToken
+from api.API.views import (
+    AsyncMemberPositionView,
+    AsyncMembersAllViewSet,
+    AsyncMembersAvailableView,
+    AsyncOrganizationExportView,
+    AsyncTeamViewSet,
+    OrganizationExportView
+)
 from api.API.serializers import TeamViewSerializer, MembersViewSerializer
-from api.models import Member, Team, MemberPosition, TeamMembership
+from api import history, outbox, stats
+from api.urls import resource_urls
+from api.models import ChangeEvent, Member, MembershipPeriod, Organization, Team, MemberPosition, TeamMembership
+
+
+class MemberPasswordTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.member = Member.objects.create(username="testuser", position="PM", password="testpassword")
+        self.client.force_authenticate(user=self.member)
+
+    def test_password_is_not_rehashed_on_profile_edit(self):
+        encoded = self.member.password
+        url = reverse("member-detail", args=[self.member.id])
+        response = self.client.patch(url, {"first_name": "Renamed"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.password, encoded)
+        self.assertTrue(self.member.check_password("testpassword"))
+
+    def test_changed_password_is_hashed(self):
+        url = reverse("member-detail", args=[self.member.id])
+        self.client.patch(url, {"password": "newpassword"})
+        self.member.refresh_from_db()
+        self.assertTrue(self.member.check_password("newpassword"))
+
+    def test_password_looking_like_a_hash_is_hashed(self):
+        raw = "pbkdf2_sha256$1$salt$hash"
+        url = reverse("member-detail", args=[self.member.id])
+        self.client.patch(url, {"password": raw})
+        self.member.refresh_from_db()
+        self.assertNotEqual(self.member.password, raw)
+        self.assertTrue(self.member.check_password(raw))
+
+        created = Member.objects.create(username="created", position="JUN", password=raw)
+        created.refresh_from_db()
+        self.assertTrue(created.check_password(raw))
+        self.assertTrue(Member.objects.create_user("user", password=raw).check_password(raw))
+
+    def test_login_keeps_password(self):
+        for _ in range(2):
+            response = self.client.post("/api/login/token/", {"username": "testuser", "password": "testpassword"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
 
 
 class TeamViewSetTest(TestCase):
@@ -20,7 +89,7 @@ class TeamViewSetTest(TestCase):
         response = self.client.get(url)
         teams = Team.objects.all()
         serializer = TeamViewSerializer(teams, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_create_team(self):
@@ -44,6 +113,265 @@ class TeamViewSetTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
 
+class TeamRosterCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.member = Member.objects.create(username="testuser", position="PM", password="testpassword")
+        self.team = Team.objects.create(name="Test Team")
+        TeamMembership.objects.create(member=self.member, team=self.team)
+        self.url = reverse("team-detail", args=[self.team.id])
+        self.client.force_authenticate(user=self.member)
+
+    def test_roster_is_read_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data, TeamViewSerializer(self.team).data)
+        self.assertEqual(team_rosters.stats(), {"hits": 1, "misses": 1})
+
+    def test_list_reads_rosters_from_cache(self):
+        self.client.get(reverse("team-list"))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("team-list"))
+        self.assertEqual(response.data['results'], [TeamViewSerializer(self.team).data])
+
+    def test_membership_change_invalidates_roster(self):
+        self.client.get(self.url)
+        other = Member.objects.create(username="other", position="JUN")
+        self.client.post(reverse("team-member-add"), {"member": other.id, "team": self.team.id})
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data['members']), 2)
+
+        self.client.delete(reverse("team-member-delete", args=[response.data['members'][1]['id']]))
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data['members']), 1)
+
+    def test_member_and_team_save_invalidates_roster(self):
+        self.client.get(self.url)
+        self.member.first_name = "Renamed"
+        self.member.save()
+        self.team.name = "Renamed Team"
+        self.team.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['name'], "Renamed Team")
+        self.assertEqual(response.data['members'][0]['member']['first_name'], "Renamed")
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.member = Member.objects.create(username="testuser", position="PM", password="testpassword")
+        self.team = Team.objects.create(name="Test Team")
+        self.client.force_authenticate(user=self.member)
+
+    def test_unchanged_list_is_not_modified(self):
+        for url in (reverse("team-list"), reverse("member-list"), reverse("team-detail", args=[self.team.id])):
+            etag = self.client.get(url)["ETag"]
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response["ETag"], etag)
+
+    def test_not_modified_list_skips_queries(self):
+        response = self.client.get(reverse("team-list"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("team-list"), HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_writes_change_etag(self):
+        url = reverse("team-list")
+        etag = self.client.get(url)["ETag"]
+        TeamMembership.objects.create(member=self.member, team=self.team)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = response["ETag"]
+        self.team.name = "Renamed Team"
+        self.team.save()
+        self.assertNotEqual(self.client.get(url)["ETag"], etag)
+
+    def test_etag_depends_on_query(self):
+        url = reverse("member-list")
+        self.assertNotEqual(self.client.get(url)["ETag"], self.client.get(url, {"search": "test"})["ETag"])
+
+    def test_member_positions_are_not_modified(self):
+        etag = self.client.get(reverse("member-positions"))["ETag"]
+        response = self.client.get(reverse("member-positions"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class TenantIsolationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.acme = Organization.objects.create(name="Acme", slug="acme")
+        self.manager = Member.objects.create(username="manager", position="PM", organization=self.acme)
+        self.junior = Member.objects.create(username="junior", position="JUN")
+        self.team = Team.objects.create(name="Test Team")
+        self.acme_team = Team.objects.create(name="Test Team", organization=self.acme)
+        self.client.force_authenticate(user=self.manager)
+
+    def get(self, url, **extra):
+        return self.client.get(url, HTTP_X_ORGANIZATION="acme", **extra)
+
+    def post(self, url, data):
+        return self.client.post(url, data, HTTP_X_ORGANIZATION="acme")
+
+    def test_rows_of_other_organizations_are_hidden(self):
+        response = self.get(reverse("team-list"))
+        self.assertEqual([team["id"] for team in response.data["results"]], [self.acme_team.id])
+        response = self.get(reverse("team-detail", args=[self.team.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.post(reverse("team-member-add"), {"member": self.junior.id, "team": self.acme_team.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_team_names_are_unique_within_organization(self):
+        response = self.post(reverse("team-list"), {"name": "Test Team"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("name", response.data)
+        response = self.post(reverse("team-list"), {"name": "New Team"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Team.objects.get(pk=response.data["id"]).organization, self.acme)
+
+    def test_usernames_are_unique_across_organizations(self):
+        self.manager.is_manager = True
+        self.manager.save()
+        data = {"username": "junior", "password": "Passw0rd!1", "position": "JUN"}
+        response = self.post(reverse("member-list"), data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("username", response.data)
+
+    def test_writes_change_etag_of_their_organization_only(self):
+        url = reverse("team-list")
+        etag = self.get(url)["ETag"]
+        TeamMembership.objects.create(member=self.junior, team=self.team)
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        TeamMembership.objects.create(member=self.manager, team=self.acme_team)
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+class AsyncViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.manager = Member.objects.create(username="manager", position="PM")
+        self.junior = Member.objects.create(username="junior", position="JUN")
+        self.team = Team.objects.create(name="Test Team")
+        self.other_team = Team.objects.create(name="Other Team")
+        TeamMembership.objects.create(member=self.junior, team=self.team)
+        self.teams = [TeamViewSerializer(team).data for team in (self.other_team, self.team)]
+        self.members = MembersViewSerializer([self.junior, self.manager], many=True).data
+        self.tokens = {
+            member: MemberRefreshToken.for_user(member).access_token for member in (self.manager, self.junior)
+        }
+        self.factory = APIRequestFactory()
+
+    def request(self, path, member=None, method="get", **params):
+        token = self.tokens[member or self.manager]
+        return getattr(self.factory, method)(path, params, HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    async def test_views_are_async(self):
+        self.assertTrue(asyncio.iscoroutinefunction(AsyncTeamViewSet.as_view({"get": "list"})))
+        self.assertTrue(asyncio.iscoroutinefunction(AsyncMemberPositionView.as_view()))
+
+    async def test_team_list_and_detail(self):
+        view = AsyncTeamViewSet.as_view({"get": "list"})
+        response = await view(self.request("/api/teams/"))
+        self.assertEqual(response.data["results"], self.teams)
+
+        response = await view(self.request("/api/teams/", page_size=1))
+        self.assertEqual(response.data["results"], self.teams[:1])
+        self.assertIsNotNone(response.data["next"])
+
+        view = AsyncTeamViewSet.as_view({"get": "retrieve"})
+        response = await view(self.request(f"/api/teams/{self.team.id}/"), pk=self.team.id)
+        self.assertEqual(response.data, self.teams[1])
+
+    @override_settings(FAST_SERIALIZATION={"ENABLED": False})
+    async def test_lists_without_fast_serialization(self):
+        response = await AsyncTeamViewSet.as_view({"get": "list"})(self.request("/api/teams/"))
+        self.assertEqual(response.data["results"], self.teams)
+        response = await AsyncMembersAllViewSet.as_view({"get": "list"})(self.request("/api/all-members/"))
+        self.assertEqual(response.data["results"], self.members)
+
+    async def test_team_detail_of_other_team_is_forbidden(self):
+        view = AsyncTeamViewSet.as_view({"get": "retrieve"})
+        response = await view(self.request("/api/teams/", self.junior), pk=self.other_team.id)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = await view(self.request("/api/teams/", self.junior), pk=self.team.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    async def test_member_list_and_detail(self):
+        view = AsyncMembersAllViewSet.as_view({"get": "list"})
+        response = await view(self.request("/api/all-members/"))
+        self.assertEqual(response.data["results"], self.members)
+
+        response = await view(self.request("/api/all-members/", fields="id,username"))
+        self.assertEqual(response.data["results"][0], {"id": self.junior.id, "username": "junior"})
+
+        view = AsyncMembersAllViewSet.as_view({"get": "retrieve"})
+        response = await view(self.request("/api/all-members/"), pk=self.junior.id)
+        self.assertEqual(response.data, self.members[0])
+        response = await view(self.request("/api/all-members/"), pk=0)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_member_tenures(self):
+        view = AsyncMembersAllViewSet.as_view({"get": "tenures"})
+        response = await view(self.request(f"/api/all-members/{self.junior.id}/tenures/"), pk=self.junior.id)
+        self.assertEqual([tenure["team_name"] for tenure in response.data], ["Test Team"])
+
+    async def test_available_members_and_positions(self):
+        response = await AsyncMembersAvailableView.as_view()(self.request("/api/available-members/"))
+        self.assertEqual([member["username"] for member in response.data["results"]], ["manager"])
+
+        response = await AsyncMemberPositionView.as_view()(self.request("/api/member-positions/", self.junior))
+        self.assertEqual(response.data, dict(MemberPosition.choices))
+
+    async def test_invalid_token_is_rejected(self):
+        request = self.factory.get("/api/teams/", HTTP_AUTHORIZATION="Bearer invalid")
+        response = await AsyncTeamViewSet.as_view({"get": "list"})(request)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_cache_is_not_used_synchronously_on_the_event_loop(self):
+        calls = []
+
+        def watch(name):
+            method = getattr(LocMemCache, name)
+
+            def call(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    pass
+                else:
+                    calls.append(name)
+                return method(*args, **kwargs)
+            return call
+
+        claims = {**settings.TOKEN_PERMISSION_CLAIMS, "ENABLED": True}
+        with self.settings(TOKEN_PERMISSION_CLAIMS=claims), \
+                mock.patch.multiple(LocMemCache, **{name: watch(name) for name in ("get", "get_many", "add", "incr")}):
+            token = await sync_to_async(lambda: MemberRefreshToken.for_user(self.junior).access_token)()
+            self.assertIn("claims_version", token)
+            view = AsyncTeamViewSet.as_view({"get": "retrieve"})
+            headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+            response = await view(self.factory.get("/api/teams/", **headers), pk=self.team.id)
+            self.assertEqual(response.data, self.teams[1])
+
+            headers["HTTP_IF_NONE_MATCH"] = response["ETag"]
+            response = await view(self.factory.get("/api/teams/", **headers), pk=self.team.id)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            await AsyncMembersAllViewSet.as_view({"get": "list"})(self.request("/api/all-members/"))
+        self.assertEqual(calls, [])
+
+    async def test_writes_are_handled_by_sync_view(self):
+        view = AsyncTeamViewSet.as_view({"get": "list", "post": "create"})
+        response = await view(self.request("/api/teams/", method="post", name="New Team"))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(await Team.objects.filter(name="New Team").aexists())
+
+
 class MembersAvailableViewTest(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -59,10 +387,64 @@ class MembersAvailableViewTest(TestCase):
             | ~Q(position__in=[choice[0] for choice in MemberPosition.choices])
         )
         serializer = MembersViewSerializer(members, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
 
+class MemberAvailabilityTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = Member.objects.create(username="manager", position="PM", password="testpassword")
+        self.junior = Member.objects.create(username="junior", position="JUN")
+        self.architect = Member.objects.create(username="architect", position="ARC")
+        self.team = Team.objects.create(name="Test Team")
+        self.client.force_authenticate(user=self.manager)
+
+    def available(self):
+        response = self.client.get(reverse("available-members"))
+        return [item["username"] for item in response.data["results"]]
+
+    def test_membership_changes_update_availability(self):
+        membership = TeamMembership.objects.create(member=self.junior, team=self.team)
+        TeamMembership.objects.create(member=self.architect, team=self.team)
+        self.assertEqual(self.available(), ["architect", "manager"])
+        membership.delete()
+        self.assertEqual(self.available(), ["architect", "junior", "manager"])
+
+    def test_team_deletion_updates_availability(self):
+        TeamMembership.objects.create(member=self.junior, team=self.team)
+        self.team.delete()
+        self.assertIn("junior", self.available())
+
+    def test_position_change_updates_availability(self):
+        TeamMembership.objects.create(member=self.architect, team=self.team)
+        self.architect.position = "SEN"
+        self.architect.save(update_fields=["position"])
+        self.assertNotIn("architect", self.available())
+        self.architect.position = ""
+        self.architect.save()
+        self.assertNotIn("architect", self.available())
+
+    def test_bulk_edit_updates_availability(self):
+        url = reverse("team-members-bulk-edit")
+        pair = {"member": self.junior.id, "team": self.team.id}
+        self.client.post(url, {"add": [pair]}, format="json")
+        self.assertNotIn("junior", self.available())
+        self.client.post(url, {"remove": [pair]}, format="json")
+        self.assertIn("junior", self.available())
+
+    def test_flag_is_consistent(self):
+        TeamMembership.objects.create(member=self.junior, team=self.team)
+        self.assertFalse(Member.objects.inconsistent_availability().exists())
+
+    def test_team_save_with_update_fields(self):
+        self.team.name = "Renamed Team"
+        self.team.save(update_fields=["name"])
+        self.team.refresh_from_db()
+        self.assertEqual(self.team.name, "Renamed Team")
+        self.assertEqual(self.team.search_text, "renamed team")
+
+
 class MembersAllViewSetTest(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -75,8 +457,181 @@ class MembersAllViewSetTest(TestCase):
         response = self.client.get(self.url)
         members = Member.objects.all()
         serializer = MembersViewSerializer(members, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class SparseFieldsetTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.member = Member.objects.create(username="manager", position="PM", password="testpassword")
+        self.team = Team.objects.create(name="Test Team")
+        TeamMembership.objects.create(member=self.member, team=self.team)
+        self.client.force_authenticate(user=self.member)
+
+    def test_member_fields_without_teams_skip_prefetch(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("member-list"), {"fields": "id,username"})
+        self.assertEqual(response.data["results"], [{"id": self.member.id, "username": "manager"}])
+        self.assertEqual(len(context), 1)
+
+    def test_member_teams_are_ids_unless_expanded(self):
+        response = self.client.get(reverse("member-list"), {"fields": "username,teams"})
+        self.assertEqual(response.data["results"], [{"username": "manager", "teams": [self.team.id]}])
+        response = self.client.get(reverse("member-list"), {"fields": "username,teams", "expand": "teams"})
+        self.assertEqual(response.data["results"][0]["teams"][0]["team"], "Test Team")
+
+    def test_expand_alone_keeps_full_representation(self):
+        full = self.client.get(reverse("member-list"))
+        expanded = self.client.get(reverse("member-list"), {"expand": "teams"})
+        self.assertEqual(full.data["results"], expanded.data["results"])
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(reverse("member-list"), {"fields": "id,salary"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse("team-list"), {"expand": "name"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_team_fieldsets(self):
+        url = reverse("team-detail", args=[self.team.id])
+        self.assertEqual(self.client.get(url, {"fields": "name"}).data, {"name": "Test Team"})
+        self.assertEqual(
+            self.client.get(url, {"fields": "id,members"}).data,
+            {"id": self.team.id, "members": [self.member.id]}
+        )
+        response = self.client.get(url, {"fields": "members", "expand": "members"})
+        self.assertEqual(list(response.data), ["members"])
+        self.assertEqual(response.data["members"][0]["member"]["username"], "manager")
+        # The cached roster stays complete.
+        self.assertEqual(self.client.get(url).data, TeamViewSerializer(self.team).data)
+
+    def test_fields_do_not_apply_to_writes(self):
+        response = self.client.post(reverse("team-list") + "?fields=id", {"name": "New Team"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["name"], "New Team")
+
+
+class FastSerializationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.member = Member.objects.create(username="manager", position="PM", password="testpassword")
+        Member.objects.create(username="admin", is_superuser=True)
+        for i, name in enumerate(["Backend", "Frontend"]):
+            team = Team.objects.create(name=name)
+            TeamMembership.objects.create(member=self.member, team=team)
+            junior = Member.objects.create(username=f"junior{i}", first_name="Ірина", position="JUN")
+            TeamMembership.objects.create(member=junior, team=team)
+        self.client.force_authenticate(user=self.member)
+
+    def assert_same_content(self, url, params=None):
+        with self.settings(FAST_SERIALIZATION={"ENABLED": False}):
+            cache.clear()
+            expected = self.client.get(url, params)
+        with self.settings(FAST_SERIALIZATION={"ENABLED": True}):
+            cache.clear()
+            response = self.client.get(url, params)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, expected.content)
+
+    def test_member_lists_are_identical(self):
+        self.assert_same_content(reverse("member-list"))
+        self.assert_same_content(reverse("member-list"), {"page_size": 2})
+        self.assert_same_content(reverse("member-list"), {"search": "junior"})
+        self.assert_same_content(reverse("available-members"))
+
+    def test_team_rosters_are_identical(self):
+        self.assert_same_content(reverse("team-list"))
+        self.assert_same_content(reverse("team-detail", args=[Team.objects.first().id]))
+
+
+class CursorPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.member = Member.objects.create(username="manager", position="PM", password="testpassword")
+        for i in range(7):
+            Member.objects.create(username=f"member{i}", position="JUN", password="testpassword")
+            Team.objects.create(name=f"Team {i}")
+        self.client.force_authenticate(user=self.member)
+
+    def collect_pages(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data['results'])
+            url = response.data['next']
+        return pages
+
+    def test_members_are_paged_by_username(self):
+        pages = self.collect_pages(reverse("member-list") + "?page_size=3")
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        usernames = [item['username'] for page in pages for item in page]
+        self.assertEqual(usernames, list(Member.objects.values_list('username', flat=True)))
+
+    def test_teams_are_paged_by_name(self):
+        pages = self.collect_pages(reverse("team-list") + "?page_size=4")
+        names = [item['name'] for page in pages for item in page]
+        self.assertEqual(names, list(Team.objects.values_list('name', flat=True)))
+
+    def test_page_size_is_bounded(self):
+        request = Request(APIRequestFactory().get("/", {"page_size": 100000}))
+        page_size = MemberCursorPagination().get_page_size(request)
+        self.assertEqual(page_size, MemberCursorPagination.max_page_size)
+
+    def test_next_cursor_is_stable_after_insert(self):
+        response = self.client.get(reverse("member-list") + "?page_size=3")
+        next_url = response.data['next']
+        Member.objects.create(username="aaa", position="JUN", password="testpassword")
+        response = self.client.get(next_url)
+        self.assertEqual(response.data['results'][0]['username'], "member2")
+
+
+class IndexedSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.member = Member.objects.create(username="manager", position="PM", password="testpassword")
+        Member.objects.create(username="olena", first_name="Olena", last_name="Melnyk", position="JUN")
+        Member.objects.create(username="melnyk.taras", first_name="Taras", position="MID")
+        Member.objects.create(username="bohdan", first_name="Bohdan", last_name="Kovalenko", position="SEN")
+        Team.objects.create(name="Backend Core")
+        Team.objects.create(name="Core Services")
+        self.client.force_authenticate(user=self.member)
+
+    def search(self, url_name, term, key="username"):
+        response = self.client.get(reverse(url_name), {"search": term})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item[key] for item in response.data['results']]
+
+    def test_members_are_ranked_by_match(self):
+        self.assertEqual(self.search("member-list", "melnyk"), ["melnyk.taras", "olena"])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search("member-list", "Mel Ole"), ["olena"])
+
+    def test_search_text_follows_updates(self):
+        member = Member.objects.get(username="bohdan")
+        member.last_name = "Shevchenko"
+        member.save(update_fields=["last_name"])
+        self.assertEqual(self.search("member-list", "shev"), ["bohdan"])
+        self.assertEqual(self.search("member-list", "kovalenko"), [])
+        member.delete()
+        self.assertEqual(self.search("member-list", "shev"), [])
+
+    def test_teams_are_searched_by_name(self):
+        self.assertEqual(self.search("team-list", "core", key="name"), ["Core Services", "Backend Core"])
+        self.assertEqual(self.search("team-list", "serv", key="name"), ["Core Services"])
+
+    def test_ranked_results_are_paged(self):
+        for i in range(5):
+            Member.objects.create(username=f"taras{i}", position="JUN")
+        response = self.client.get(reverse("member-list"), {"search": "taras", "page_size": 2})
+        usernames = []
+        while True:
+            usernames.extend(item['username'] for item in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(usernames, [f"taras{i}" for i in range(5)] + ["melnyk.taras"])
 
 
 class TeamMemberAddAPIViewTest(TestCase):
@@ -93,6 +648,111 @@ class TeamMemberAddAPIViewTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
 
+@skipIf(connection.vendor == "sqlite", "SQLite serializes concurrent transactions with table locks")
+class ConcurrentTeamMemberAddTest(TransactionTestCase):
+    def setUp(self):
+        self.manager = Member.objects.create(username="manager", position="PM", password="testpassword")
+        self.junior = Member.objects.create(username="junior", position="JUN")
+        self.teams = [Team.objects.create(name=f"Team {i}") for i in range(16)]
+
+    def test_concurrent_adds_keep_one_team(self):
+        started = threading.Barrier(len(self.teams))
+        added, rejected = [], []
+
+        def add(number, team):
+            client = APIClient()
+            client.force_authenticate(user=self.manager)
+            started.wait()
+            try:
+                # Half of the clients add the member with the bulk endpoint
+                if number % 2:
+                    response = client.post(reverse("team-member-add"), {"member": self.junior.id, "team": team.id})
+                    created = response.status_code == status.HTTP_201_CREATED
+                    errors = response.data if response.status_code == status.HTTP_400_BAD_REQUEST else {}
+                else:
+                    pairs = [{"member": self.junior.id, "team": team.id}]
+                    response = client.post(reverse("team-members-bulk-edit"), {"add": pairs}, format="json")
+                    result = response.data["added"][0]
+                    created, errors = result["status"] == "created", result.get("errors", {})
+                (added if created else rejected).append(errors)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=add, args=item) for item in enumerate(self.teams)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(TeamMembership.objects.filter(member=self.junior).count(), 1)
+        self.assertEqual(len(added), 1)
+        self.assertEqual(len(rejected), len(self.teams) - 1)
+        self.assertTrue(all("member" in errors for errors in rejected))
+
+
+class TeamMemberBulkEditAPIViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = Member.objects.create(username="manager", position="PM", password="testpassword")
+        self.intern = Member.objects.create(username="intern", position="INT")
+        self.junior = Member.objects.create(username="junior", position="JUN")
+        self.first_team = Team.objects.create(name="First Team")
+        self.second_team = Team.objects.create(name="Second Team")
+        TeamMembership.objects.create(member=self.intern, team=self.first_team)
+        self.url = reverse("team-members-bulk-edit")
+        self.client.force_authenticate(user=self.manager)
+
+    def test_add_members_in_bulk(self):
+        pairs = [
+            {"member": self.intern.id, "team": self.second_team.id},
+            {"member": self.junior.id, "team": self.first_team.id},
+            {"member": self.junior.id, "team": self.second_team.id},
+            {"member": self.manager.id, "team": self.first_team.id},
+            {"member": self.manager.id, "team": self.second_team.id},
+            {"member": self.manager.id, "team": self.second_team.id},
+            {"member": 999999, "team": self.first_team.id},
+        ]
+        response = self.client.post(self.url, {"add": pairs}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statuses = [result["status"] for result in response.data["added"]]
+        self.assertEqual(
+            statuses,
+            ["rejected", "created", "rejected", "created", "created", "rejected", "rejected"]
+        )
+        self.assertIn("First Team", response.data["added"][0]["errors"]["member"][0])
+        self.assertIn("First Team", response.data["added"][2]["errors"]["member"][0])
+        self.assertEqual(TeamMembership.objects.count(), 4)
+        self.assertTrue(TeamMembership.objects.filter(id=response.data["added"][1]["id"]).exists())
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        juniors = [Member.objects.create(username=f"junior{i}", position="JUN") for i in range(20)]
+        with CaptureQueriesContext(connection) as small_batch:
+            self.client.post(self.url, {"add": [{"member": self.junior.id, "team": self.first_team.id}]}, format="json")
+        pairs = [{"member": junior.id, "team": self.second_team.id} for junior in juniors]
+        with CaptureQueriesContext(connection) as large_batch:
+            response = self.client.post(self.url, {"add": pairs}, format="json")
+        self.assertEqual(len(small_batch), len(large_batch))
+        self.assertEqual(TeamMembership.objects.filter(team=self.second_team).count(), 20)
+        self.assertTrue(all(result["status"] == "created" for result in response.data["added"]))
+
+    def test_move_member_between_teams(self):
+        data = {
+            "remove": [
+                {"member": self.intern.id, "team": self.first_team.id},
+                {"member": self.junior.id, "team": self.first_team.id},
+            ],
+            "add": [{"member": self.intern.id, "team": self.second_team.id}],
+        }
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual([result["status"] for result in response.data["removed"]], ["removed", "rejected"])
+        self.assertEqual(response.data["added"][0]["status"], "created")
+        self.assertEqual(list(self.intern.team_memberships.values_list("team", flat=True)), [self.second_team.id])
+
+    def test_empty_batch_is_invalid(self):
+        response = self.client.post(self.url, {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class TeamMemberDeleteViewTest(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -105,3 +765,338 @@ class TeamMemberDeleteViewTest(TestCase):
         self.client.force_authenticate(user=self.member)
         response = self.client.delete(self.url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class LogoutAllViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.member = Member.objects.create(username="testmember", position="PM", password="testpassword")
+        self.other = Member.objects.create(username="other", position="JUN")
+        self.tokens = [RefreshToken.for_user(self.member) for _ in range(5)]
+        RefreshToken.for_user(self.other)
+        self.tokens[0].blacklist()
+        self.client.force_authenticate(user=self.member)
+
+    def test_logout_all_blacklists_tokens_in_constant_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.post("/api/logout-all/")
+        self.assertEqual(response.status_code, status.HTTP_205_RESET_CONTENT)
+        self.assertEqual(BlacklistedToken.objects.filter(token__user=self.member).count(), 5)
+        self.assertFalse(BlacklistedToken.objects.filter(token__user=self.other).exists())
+
+
+class OrganizationExportViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = Member.objects.create(username="manager", position="PM", email="manager@example.com")
+        self.junior = Member.objects.create(username="junior", position="JUN")
+        self.team = Team.objects.create(name="Test Team")
+        self.membership = TeamMembership.objects.create(member=self.junior, team=self.team)
+        self.url = reverse("organization-export")
+        self.client.force_authenticate(user=self.manager)
+
+    def test_export_ndjson(self):
+        response = self.client.get(self.url, {"format": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        records = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([record["type"] for record in records], ["member", "member", "team", "membership"])
+        self.assertEqual(records[0]["email"], "manager@example.com")
+        self.assertEqual(records[3], {
+            "type": "membership", "id": self.membership.id, "member_id": self.junior.id,
+            "team_id": self.team.id, "date_joined": self.membership.date_joined.isoformat(),
+        })
+
+    def test_export_json(self):
+        response = OrganizationExportView.as_view(chunk_size=1)(self.export_request())
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([member["username"] for member in data["members"]], ["manager", "junior"])
+        self.assertEqual(data["teams"], [{"id": self.team.id, "name": "Test Team"}])
+        self.assertEqual(len(data["memberships"]), 1)
+
+    def test_export_queries_do_not_grow_with_rows(self):
+        for i in range(10):
+            Member.objects.create(username=f"member{i}", position="JUN")
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+            b"".join(response.streaming_content)
+        self.assertEqual(len(context), 4)
+
+    def test_export_requires_manager(self):
+        self.client.force_authenticate(user=self.junior)
+        response = self.client.get(self.url, {"format": "ndjson"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_is_streamed_asynchronously_under_asgi(self):
+        patterns = {pattern.name: pattern for pattern in resource_urls(async_views=True) if hasattr(pattern, "name")}
+        self.assertIs(patterns["organization-export"].callback.view_class, AsyncOrganizationExportView)
+
+        response = AsyncOrganizationExportView.as_view(chunk_size=1)(self.export_request())
+        self.assertTrue(response.is_async)
+
+        async def consume():
+            return [chunk async for chunk in response.streaming_content]
+
+        chunks = async_to_sync(consume)()
+        self.assertEqual(len(chunks), 11)
+        expected = OrganizationExportView.as_view(chunk_size=1)(self.export_request())
+        self.assertEqual(b"".join(chunks), b"".join(expected.streaming_content))
+
+    def test_export_carries_change_cursor(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Change-Cursor"], str(ChangeEvent.objects.latest("id").id))
+
+    def export_request(self):
+        request = APIRequestFactory().get(self.url)
+        force_authenticate(request, user=self.manager)
+        return request
+
+
+class ChangeFeedTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = Member.objects.create(username="manager", position="PM")
+        self.junior = Member.objects.create(username="junior", position="JUN")
+        self.url = reverse("change-feed")
+        self.client.force_authenticate(user=self.manager)
+        self.since = ChangeEvent.objects.latest("id").id
+
+    def changes(self, since=None, **params):
+        return self.client.get(self.url, {"since": self.since if since is None else since, **params})
+
+    def test_changes_are_recorded_in_order(self):
+        team = Team.objects.create(name="Test Team")
+        membership = TeamMembership.objects.create(member=self.junior, team=team)
+        team.name = "Renamed Team"
+        team.save()
+        team_id = team.id
+        team.delete()
+
+        events = self.changes().data["results"]
+        self.assertEqual(
+            [(event["model"], event["object_id"], event["action"]) for event in events],
+            [
+                ("team", team_id, "created"),
+                ("membership", membership.id, "created"),
+                ("team", team_id, "updated"),
+                ("membership", membership.id, "deleted"),
+                ("team", team_id, "deleted"),
+            ],
+        )
+        self.assertEqual(events[2]["data"], {"name": "Renamed Team"})
+        self.assertEqual(events[1]["data"]["member_id"], self.junior.id)
+        self.assertIsNone(events[4]["data"])
+
+    def test_feed_is_paged_by_cursor(self):
+        for i in range(5):
+            Team.objects.create(name=f"Team {i}")
+        response = self.changes(limit=3)
+        self.assertTrue(response.data["has_more"])
+        self.assertEqual(response.data["next"], response.data["results"][-1]["id"])
+
+        response = self.changes(since=response.data["next"], limit=3)
+        self.assertFalse(response.data["has_more"])
+        self.assertEqual([event["data"]["name"] for event in response.data["results"]], ["Team 3", "Team 4"])
+
+        cursor = response.data["next"]
+        response = self.changes(since=cursor)
+        self.assertEqual(response.data, {"next": cursor, "has_more": False, "results": []})
+
+    def test_saves_of_untracked_fields_are_not_recorded(self):
+        self.junior.last_login = timezone.now()
+        self.junior.save(update_fields=["last_login"])
+        self.assertEqual(self.changes().data["results"], [])
+
+    def test_rolled_back_changes_are_not_recorded(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Team.objects.create(name="Test Team")
+            Team.objects.create(name="Test Team")
+        self.assertEqual(self.changes().data["results"], [])
+
+    def test_invalid_cursor(self):
+        response = self.changes(since="-1")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("since", response.data)
+
+    def test_pages_end_at_the_last_settled_event(self):
+        rows = [{"id": id, "settled": settled} for id, settled in ((1, True), (2, False), (3, True), (4, False))]
+        self.assertEqual(outbox.settled_page(rows), [{"id": 1}, {"id": 2}, {"id": 3}])
+        self.assertEqual(outbox.settled_page(rows[1:2]), [])
+
+
+@skipIf(connection.vendor == "sqlite", "SQLite serializes concurrent transactions with table locks")
+class ChangeFeedInFlightTest(TransactionTestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=Member.objects.create(username="manager", position="PM"))
+        self.since = ChangeEvent.objects.latest("id").id
+
+    def test_events_of_transactions_in_flight_are_not_skipped(self):
+        recorded, release = threading.Event(), threading.Event()
+
+        def slow_transaction():
+            try:
+                with transaction.atomic():
+                    Team.objects.create(name="Slow Team")
+                    recorded.set()
+                    release.wait(10)
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=slow_transaction)
+        thread.start()
+        try:
+            recorded.wait(10)
+            # Committed with a greater ID while the slow transaction is open, however long it stays open
+            Team.objects.create(name="Fast Team")
+            response = self.client.get(reverse("change-feed"), {"since": self.since})
+            self.assertEqual(response.data, {"next": self.since, "has_more": False, "results": []})
+            export = self.client.get(reverse("organization-export"))
+            export.close()
+            self.assertEqual(export["X-Change-Cursor"], str(self.since))
+        finally:
+            release.set()
+            thread.join()
+
+        response = self.client.get(reverse("change-feed"), {"since": self.since})
+        self.assertEqual([event["data"]["name"] for event in response.data["results"]], ["Slow Team", "Fast Team"])
+
+
+class TeamHistoryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.manager = Member.objects.create(username="manager", position="PM")
+        self.junior = Member.objects.create(username="junior", position="JUN")
+        self.senior = Member.objects.create(username="senior", position="SEN")
+        self.team = Team.objects.create(name="Test Team")
+        self.url = reverse("team-detail", args=[self.team.id])
+        self.client.force_authenticate(user=self.manager)
+
+        self.today = date.today()
+        self.joined = self.today - timedelta(days=30)
+        for member in (self.junior, self.senior):
+            TeamMembership.objects.create(member=member, team=self.team)
+        MembershipPeriod.objects.update(date_joined=self.joined)
+
+    def roster(self, day, **params):
+        response = self.client.get(self.url, {"as_of": day.isoformat(), **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["members"]
+
+    def test_past_roster(self):
+        membership = TeamMembership.objects.get(member=self.senior)
+        self.client.delete(reverse("team-member-delete", args=[membership.id]))
+
+        members = self.roster(self.today - timedelta(days=1))
+        self.assertEqual([entry["member"]["username"] for entry in members], ["junior", "senior"])
+        self.assertEqual(members[1], {
+            "id": membership.id,
+            "date_joined": self.joined.isoformat(),
+            "member": {"username": "senior", "first_name": "", "last_name": "", "position": "SEN"},
+        })
+        self.assertEqual(self.roster(self.today, expand=""), [self.junior.id])
+        self.assertEqual(self.roster(self.joined - timedelta(days=1)), [])
+
+    def test_bulk_edit_is_recorded(self):
+        self.client.post(reverse("team-members-bulk-edit"), {
+            "remove": [{"member": self.junior.id, "team": self.team.id}],
+            "add": [{"member": self.manager.id, "team": self.team.id}],
+        }, format="json")
+        tomorrow = self.today + timedelta(days=1)
+        self.assertEqual(self.roster(tomorrow, expand=""), [self.senior.id, self.manager.id])
+        self.assertEqual(
+            [(period["team_id"], period["days"]) for period in history.tenures(self.junior.id, tomorrow)],
+            [(self.team.id, 30)],
+        )
+
+    def test_past_roster_query_count(self):
+        with self.assertNumQueries(2):
+            self.roster(self.today)
+
+    def test_tenures(self):
+        response = self.client.get(reverse("member-tenures", args=[self.junior.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{
+            "team_id": self.team.id,
+            "team_name": "Test Team",
+            "date_joined": self.joined.isoformat(),
+            "date_left": None,
+            "days": 30,
+        }])
+
+    def test_deleted_member_is_kept_in_past_roster(self):
+        self.senior.delete()
+
+        members = self.roster(self.today - timedelta(days=1))
+        self.assertEqual([entry["member"]["username"] for entry in members], ["junior", "senior"])
+        self.assertEqual(self.roster(self.today, expand=""), [self.junior.id])
+
+    def test_deleted_team_is_kept_in_tenures(self):
+        self.team.delete()
+
+        self.assertEqual(history.tenures(self.junior.id), [{
+            "team_id": None,
+            "team_name": "Test Team",
+            "date_joined": self.joined,
+            "date_left": self.today,
+            "days": 30,
+        }])
+
+    def test_invalid_date(self):
+        response = self.client.get(self.url, {"as_of": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("as_of", response.data)
+
+
+class OrganizationStatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.manager = Member.objects.create(username="manager", position="PM")
+        self.junior = Member.objects.create(username="junior", position="JUN")
+        self.other_junior = Member.objects.create(username="other_junior", position="JUN")
+        self.senior = Member.objects.create(username="senior", position="SEN")
+        self.first_team = Team.objects.create(name="First Team")
+        self.second_team = Team.objects.create(name="Second Team")
+        self.url = reverse("organization-stats")
+        self.client.force_authenticate(user=self.manager)
+
+    def stats(self):
+        self.assertEqual(stats.drift(), {})
+        return self.client.get(self.url).data
+
+    def test_stats_follow_changes(self):
+        self.client.post(reverse("team-member-add"), {"member": self.junior.id, "team": self.first_team.id})
+        self.client.post(reverse("team-members-bulk-edit"), {"add": [
+            {"member": self.other_junior.id, "team": self.second_team.id},
+            {"member": self.manager.id, "team": self.second_team.id},
+        ]}, format="json")
+        self.assertEqual(self.stats(), {
+            "teams": [
+                {"id": self.first_team.id, "name": "First Team", "size": 1, "positions": {"JUN": 1}},
+                {"id": self.second_team.id, "name": "Second Team", "size": 2, "positions": {"JUN": 1, "PM": 1}},
+            ],
+            "unassigned": {"total": 1, "positions": {"SEN": 1}},
+        })
+
+        self.junior.position = "MID"
+        self.junior.save()
+        self.assertEqual(self.stats()["teams"][0]["positions"], {"MID": 1})
+
+        membership = TeamMembership.objects.get(member=self.other_junior)
+        self.client.delete(reverse("team-member-delete", args=[membership.id]))
+        self.first_team.delete()
+        self.senior.delete()
+        self.assertEqual(self.stats(), {
+            "teams": [{"id": self.second_team.id, "name": "Second Team", "size": 1, "positions": {"PM": 1}}],
+            "unassigned": {"total": 2, "positions": {"JUN": 1, "MID": 1}},
+        })
+
+    def test_stats_query_count_does_not_grow_with_members(self):
+        for i in range(10):
+            member = Member.objects.create(username=f"junior{i}", position="JUN")
+            TeamMembership.objects.create(member=member, team=self.first_team)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data["teams"][0]["size"], 10)
+        self.assertEqual(response.data["unassigned"]["total"], 3)
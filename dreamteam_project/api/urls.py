@@ -2,32 +2,70 @@
 API URL Configuration Module.
 """
 
+from django.conf import settings
 from django.urls import path, include
 from rest_framework import routers
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .API.views import (
+    AsyncMembersAllViewSet,
+    AsyncMembersAvailableView,
+    AsyncMemberPositionView,
+    AsyncOrganizationExportView,
+    AsyncTeamViewSet,
+    ChangeFeedView,
     MembersAllViewSet,
     MembersAvailableView,
     MemberPositionView,
     TeamViewSet,
     TeamMemberAddAPIView,
+    TeamMemberBulkEditAPIView,
     TeamMemberDeleteView,
+    OrganizationExportView,
+    OrganizationStatsView,
     LogoutView,
     LogoutAllView
 )
 
-router = routers.DefaultRouter()
-router.register(r'all-members', MembersAllViewSet, basename='member')
-router.register(r'teams', TeamViewSet)
+
+def resource_urls(async_views=False) -> list:
+    """
+    Returns URLs of the API resources.
+
+    :param async_views: Serve read endpoints by async views (for ASGI).
+    """
+    router = routers.DefaultRouter()
+    router.register(r'all-members', AsyncMembersAllViewSet if async_views else MembersAllViewSet, basename='member')
+    router.register(r'teams', AsyncTeamViewSet if async_views else TeamViewSet, basename='team')
+
+    return [
+        path(
+            'member-positions/',
+            (AsyncMemberPositionView if async_views else MemberPositionView).as_view(),
+            name='member-positions'
+        ),
+        path(
+            'available-members/',
+            (AsyncMembersAvailableView if async_views else MembersAvailableView).as_view(),
+            name='available-members'
+        ),
+        path('team-add-member/', TeamMemberAddAPIView.as_view(), name='team-member-add'),
+        path('team-bulk-edit-members/', TeamMemberBulkEditAPIView.as_view(), name='team-members-bulk-edit'),
+        path('team-delete-member/<int:pk>/', TeamMemberDeleteView.as_view(), name='team-member-delete'),
+        path(
+            'export/',
+            (AsyncOrganizationExportView if async_views else OrganizationExportView).as_view(),
+            name='organization-export'
+        ),
+        path('changes/', ChangeFeedView.as_view(), name='change-feed'),
+        path('stats/', OrganizationStatsView.as_view(), name='organization-stats'),
+        path('', include(router.urls)),
+    ]
+
 
 urlpatterns = [
     # Resource URLs
-    path('member-positions/', MemberPositionView.as_view(), name='member-positions'),
-    path('available-members/', MembersAvailableView.as_view(), name='available-members'),
-    path('team-add-member/', TeamMemberAddAPIView.as_view(), name='team-member-add'),
-    path('team-delete-member/<int:pk>/', TeamMemberDeleteView.as_view(), name='team-member-delete'),
-    path('', include(router.urls)),
+    *resource_urls(async_views=settings.ASYNC_VIEWS['ENABLED']),
 
     # Authentication URLs
     path('login/token/', TokenObtainPairView.as_view()),
@@ -30,7 +30,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv('DJANGO_SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DJANGO_DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = []
 
@@ -42,9 +42,11 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'django_filters',
     'django_extensions',
     'drf_yasg',
@@ -54,6 +56,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.QueryProfilingMiddleware',
+    'api.middleware.TenantMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -85,20 +89,99 @@ WSGI_APPLICATION = 'dreamteam_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connections are persistent for `DATABASES_CONN_MAX_AGE` seconds (0 closes them
+# at the end of every request) and checked before they are reused.
+# `DATABASES_POOL_SIZE` keeps closed connections in an in-process pool,
+# see `api.db.postgresql_pool`.
+DATABASE = {
+    'ENGINE': (
+        'api.db.postgresql_pool' if int(os.getenv('DATABASES_POOL_SIZE', '0'))
+        else 'django.db.backends.postgresql_psycopg2'
+    ),
+    'NAME': os.getenv('DATABASES_NAME', 'dreamteam_db'),
+    'USER': os.getenv('DATABASES_USER', 'dreamteam_user'),
+    'PASSWORD': os.getenv('DATABASES_PASSWORD'),
+    'CONN_MAX_AGE': int(os.getenv('DATABASES_CONN_MAX_AGE', '60')),
+    'CONN_HEALTH_CHECKS': os.getenv('DATABASES_CONN_HEALTH_CHECKS', 'True') == 'True',
+    'POOL_SIZE': int(os.getenv('DATABASES_POOL_SIZE', '0')),
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
-        'NAME': 'dreamteam_db',
-        'USER': 'dreamteam_user',
-        'PASSWORD': os.getenv('DATABASES_PASSWORD'),
-        'HOST': 'localhost',
-        'PORT': '5432',
+        **DATABASE,
+        'HOST': os.getenv('DATABASES_HOST', 'localhost'),
+        'PORT': os.getenv('DATABASES_PORT', '5432'),
         'TEST': {
             'NAME': 'dreamteam_test_db',
         },
     }
 }
 
+# Read replicas (`host[:port]`, comma separated) used by the list
+# and retrieve actions of teams and members, see `api.db.routers`.
+DATABASE_REPLICAS = []
+for number, address in enumerate(filter(None, os.getenv('DATABASES_REPLICA_HOSTS', '').split(',')), start=1):
+    host, _, port = address.strip().partition(':')
+    DATABASE_REPLICAS.append(f'replica_{number}')
+    DATABASES[f'replica_{number}'] = {
+        **DATABASE,
+        'HOST': host,
+        'PORT': port or '5432',
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    }
+
+DATABASE_ROUTERS = ['api.db.routers.ReplicaRouter']
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', 'dreamteam'),
+    }
+}
+
+# Serialized team rosters, see `api.API.cache.team_rosters`.
+TEAM_ROSTER_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 60 * 60,
+}
+
+# Versions of tables used as ETag and Last-Modified of read endpoints,
+# see `api.API.cache.ChangeMarkers`.
+CHANGE_MARKERS = {
+    'ALIAS': 'default',
+    'TIMEOUT': None,
+}
+
+# Change feed of members, teams and memberships, see `api.outbox`.
+CHANGE_FEED = {
+    'PAGE_SIZE': 500,
+    'MAX_PAGE_SIZE': 5000,
+    # Events older than this are compacted to the latest event
+    # of each object by the `compact_changes` command,
+    'RETENTION_DAYS': 7,
+    # and deleted events older than this are removed.
+    'TOMBSTONE_DAYS': 30,
+}
+
+# Organizations (tenants) of requests, see `api.tenants`.
+TENANCY = {
+    # Header with the slug of the organization of a request.
+    'HEADER': 'HTTP_X_ORGANIZATION',
+    # Organizations are also resolved from subdomains of this domain
+    # (`<slug>.<domain>`), if it is set.
+    'DOMAIN': os.getenv('TENANT_DOMAIN'),
+    # Organization of members and teams created outside of requests.
+    'DEFAULT': 'default',
+    # Keeps IDs of organizations by slug.
+    'ALIAS': 'default',
+    'TIMEOUT': 60 * 60,
+}
+
 # Set the custom user model for authentication.
 AUTH_USER_MODEL = 'api.Member'
 
@@ -143,10 +226,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'api.API.renderers.FastJSONRenderer',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.API.authentication.AsyncJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -154,7 +237,7 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
-
+    'DEFAULT_PAGINATION_CLASS': 'api.API.pagination.KeysetPagination',
 }
 
 LOGGING = {
@@ -166,13 +249,32 @@ LOGGING = {
         },
     },
     'loggers': {
+        # Every query is logged only if asked for explicitly,
+        # use the profiling middleware to see queries of a request.
         'django.db.backends': {
-            'level': 'DEBUG',
+            'level': 'DEBUG' if os.getenv('DJANGO_LOG_SQL') == 'True' else 'INFO',
             'handlers': ['console'],
         },
+        'api.profiling': {
+            'level': 'INFO',
+            'handlers': ['console'],
+            'propagate': False,
+        },
     },
 }
 
+# Per-request SQL profiling, see `api.middleware.QueryProfilingMiddleware`.
+QUERY_PROFILING = {
+    # Requests with this header are always profiled.
+    'HEADER': 'HTTP_X_PROFILE_QUERIES',
+    # Share of other requests profiled, from 0 to 1.
+    'SAMPLE_RATE': float(os.getenv('QUERY_PROFILING_SAMPLE_RATE', 0)),
+    # Queries repeated this many times are reported as N+1 candidates.
+    'REPEATED_THRESHOLD': 3,
+    # Number of the slowest queries reported.
+    'SLOWEST': 5,
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': dt.timedelta(hours=12),
     'REFRESH_TOKEN_LIFETIME': dt.timedelta(days=2),
@@ -203,6 +305,59 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
     'SLIDING_TOKEN_LIFETIME': dt.timedelta(hours=3),
     'SLIDING_TOKEN_REFRESH_LIFETIME': dt.timedelta(days=2),
+
+    'TOKEN_OBTAIN_SERIALIZER': 'api.API.serializers.MemberTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'api.API.serializers.FilteredTokenRefreshSerializer',
+}
+
+# Permission claims (`is_manager`, `team_ids`) in access tokens,
+# see `api.API.tokens.MemberRefreshToken`. When enabled, permission classes
+# decide from the claims without queries while the claims are current.
+TOKEN_PERMISSION_CLAIMS = {
+    'ENABLED': os.getenv('TOKEN_PERMISSION_CLAIMS') == 'True',
+    # Keeps versions of claims, must be shared by all server processes.
+    'ALIAS': 'default',
+    'TIMEOUT': None,
+}
+
+# Process-local cache of authenticated members, see `api.API.authentication.MemberAuthCache`.
+MEMBER_AUTH_CACHE = {
+    'ENABLED': True,
+    # Seconds a member is kept, bounds staleness if the cache of `TOKEN_PERMISSION_CLAIMS` is not shared.
+    'TTL': 30,
+    'MAX_SIZE': 10000,
+}
+
+# In-memory filter of blacklisted tokens, see `api.API.blacklist.BlacklistFilter`.
+TOKEN_BLACKLIST_FILTER = {
+    # Requires a cache shared by all server processes (e.g. Redis), checked on startup.
+    'ENABLED': os.getenv('TOKEN_BLACKLIST_FILTER') == 'True',
+    # Must be shared by all server processes for cross-process invalidation.
+    'CACHE_ALIAS': 'default',
+    # Seconds after which the filter is rebuilt from the database.
+    'TTL': 5 * 60,
+    'ERROR_RATE': 0.01,
+}
+
+# Pruning of expired tokens, see `api.API.tokens.prune_expired_tokens`.
+TOKEN_PRUNING = {
+    'BATCH_SIZE': 1000,
+    # Seconds between runs of the in-process scheduler, disabled if not set.
+    # Enable it for the web server process only, not for management commands.
+    'INTERVAL': int(os.getenv('TOKEN_PRUNE_INTERVAL', 0)) or None,
+}
+
+# Read-only serialization of member lists and team rosters
+# straight from `.values()` rows, see `api.API.fastpath`.
+FAST_SERIALIZATION = {
+    'ENABLED': os.getenv('FAST_SERIALIZATION', 'True') == 'True',
+}
+
+# Read endpoints served by async views (`api.API.views.Async*`),
+# to be enabled where the project is served by `asgi.py`;
+# under WSGI async views only add overhead.
+ASYNC_VIEWS = {
+    'ENABLED': os.getenv('ASYNC_VIEWS', 'False') == 'True',
 }
 
 SWAGGER_SETTINGS = {